@@ -1,6 +1,7 @@
 import re
 from collections import namedtuple
-from dataclasses import asdict, dataclass, field
+from copy import deepcopy
+from dataclasses import asdict, dataclass, field, fields
 from datetime import datetime
 from typing import Any, List, Mapping, NamedTuple, Sequence, Set, Tuple, Union
 
@@ -29,6 +30,7 @@ from sentry.search.utils import (
     parse_percentage,
 )
 from sentry.utils.compat import filter, map
+from sentry.utils.lru import LRUCache
 from sentry.utils.snuba import (
     Dataset,
     is_duration_measurement,
@@ -42,6 +44,13 @@ from sentry.utils.validators import is_event_id, is_span_id
 # before the asterisk is actually escaping the asterisk.
 WILDCARD_CHARS = re.compile(r"(?<!\\)(\\\\)*\*")
 
+# A plain, optionally negated `key:value` filter without quotes, parens,
+# brackets or operators. See `parse_simple_search_query`.
+SIMPLE_FILTER_RE = re.compile(r"(!?)([a-zA-Z0-9_.-]+):([^\s()\[\]\"<>=!:][^\s()\[\]\"]*)")
+
+# Number of parsed queries kept per process
+PARSE_CACHE_SIZE = 2000
+
 event_search_grammar = Grammar(
     r"""
 search = spaces term*
@@ -460,6 +469,37 @@ class SearchConfig:
         return config
 
 
+def get_config_cache_key(config: SearchConfig):
+    """
+    Returns a hashable key covering everything in the config that affects
+    parsing.
+    """
+
+    def freeze(value):
+        if isinstance(value, Mapping):
+            return tuple(sorted((key, freeze(val)) for key, val in value.items()))
+        if isinstance(value, (set, frozenset)):
+            return frozenset(value)
+        if isinstance(value, (list, tuple)):
+            return tuple(freeze(val) for val in value)
+        return value
+
+    return (
+        type(config),
+        config.allow_boolean,
+        config.free_text_key,
+        *(freeze(getattr(config, config_field.name)) for config_field in fields(config)),
+    )
+
+
+def get_key_mappings_lookup(config: SearchConfig):
+    lookup = {}
+    for target_field, source_fields in config.key_mappings.items():
+        for source_field in source_fields:
+            lookup[source_field] = target_field
+    return lookup
+
+
 class SearchVisitor(NodeVisitor):
     unwrapped_exceptions = (InvalidSearchQuery,)
 
@@ -470,6 +510,9 @@ class SearchVisitor(NodeVisitor):
             config = SearchConfig()
         self.config = config
         self.params = params if params is not None else {}
+        # Whether the result only depends on the query and the config. It does
+        # not if relative dates were resolved or the builder was consulted.
+        self.cacheable = True
         if builder is None:
             # Avoid circular import
             from sentry.search.events.builder import UnresolvedQuery
@@ -483,11 +526,7 @@ class SearchVisitor(NodeVisitor):
 
     @cached_property
     def key_mappings_lookup(self):
-        lookup = {}
-        for target_field, source_fields in self.config.key_mappings.items():
-            for source_field in source_fields:
-                lookup[source_field] = target_field
-        return lookup
+        return get_key_mappings_lookup(self.config)
 
     def is_numeric_key(self, key):
         return key in self.config.numeric_keys or is_measurement(key) or is_span_op_breakdown(key)
@@ -615,6 +654,7 @@ class SearchVisitor(NodeVisitor):
         (search_key, _, value) = children
 
         if self.is_date_key(search_key.name):
+            self.cacheable = False
             try:
                 from_val, to_val = parse_datetime_range(value.text)
             except InvalidQuery as exc:
@@ -712,6 +752,7 @@ class SearchVisitor(NodeVisitor):
     def visit_aggregate_duration_filter(self, node, children):
         (negation, search_key, _, operator, search_value) = children
         operator = handle_negation(negation, operator)
+        self.cacheable = False
 
         try:
             # Even if the search value matches duration format, only act as
@@ -738,6 +779,7 @@ class SearchVisitor(NodeVisitor):
     def visit_aggregate_percentage_filter(self, node, children):
         (negation, search_key, _, operator, search_value) = children
         operator = handle_negation(negation, operator)
+        self.cacheable = False
 
         aggregate_value = None
 
@@ -790,6 +832,7 @@ class SearchVisitor(NodeVisitor):
         operator = handle_negation(negation, operator)
         is_date_aggregate = any(key in search_key.name for key in self.config.date_keys)
         if is_date_aggregate:
+            self.cacheable = False
             try:
                 from_val, to_val = parse_datetime_range(search_value.text)
             except InvalidQuery as exc:
@@ -1074,10 +1117,65 @@ default_config = SearchConfig(
 )
 
 
-def parse_search_query(query, config=None, params=None, builder=None) -> Sequence[SearchFilter]:
-    if config is None:
-        config = default_config
+_parse_cache = LRUCache(max_weight=PARSE_CACHE_SIZE)
 
+
+def parse_simple_search_query(query, config):
+    """
+    Parses queries made up only of plain ``key:value`` filters and
+    ``is:value`` filters (such as ``is:unresolved level:error``) without
+    going through the grammar.
+
+    Returns ``None`` for any other query, including queries using keys that
+    are parsed differently depending on the config, or that would fail to
+    parse. Those are left to the grammar, so that results and errors are the
+    same either way.
+    """
+    key_mappings_lookup = None
+    search_filters = []
+
+    for token in query.split(" "):
+        if not token:
+            continue
+
+        match = SIMPLE_FILTER_RE.fullmatch(token)
+        if match is None:
+            return None
+
+        negation, key, value = match.groups()
+        if config.allowed_keys and key not in config.allowed_keys:
+            return None
+
+        if key == "is":
+            if value not in config.is_filter_translation:
+                return None
+            key, value = config.is_filter_translation[value]
+        elif key == "has":
+            return None
+        else:
+            if key_mappings_lookup is None:
+                key_mappings_lookup = get_key_mappings_lookup(config)
+            key = key_mappings_lookup.get(key, key)
+            if (
+                key in config.numeric_keys
+                or key in config.duration_keys
+                or key in config.date_keys
+                or key in config.boolean_keys
+                or key in config.percentage_keys
+                or key in config.text_operator_keys
+                or is_measurement(key)
+                or is_duration_measurement(key)
+                or is_span_op_breakdown(key)
+            ):
+                return None
+
+        operator = "!=" if negation else "="
+        search_filters.append(SearchFilter(SearchKey(key), operator, SearchValue(value)))
+
+    return search_filters or None
+
+
+def _parse_search_query(query, config, params=None, builder=None):
     try:
         tree = event_search_grammar.parse(query)
     except IncompleteParseError as e:
@@ -1090,4 +1188,27 @@ def parse_search_query(query, config=None, params=None, builder=None) -> Sequenc
                 "This is commonly caused by unmatched parentheses. Enclose any text in double quotes.",
             )
         )
-    return SearchVisitor(config, params=params, builder=builder).visit(tree)
+    visitor = SearchVisitor(config, params=params, builder=builder)
+    return visitor.visit(tree), visitor.cacheable
+
+
+def parse_search_query(query, config=None, params=None, builder=None) -> Sequence[SearchFilter]:
+    if config is None:
+        config = default_config
+
+    rv = parse_simple_search_query(query, config)
+    if rv is not None:
+        return rv
+
+    # Cached results are independent of params and builder, otherwise they
+    # would not have been cached. Callers may modify the result, so they
+    # always get their own copy.
+    cache_key = (query, get_config_cache_key(config))
+    rv = _parse_cache.get(cache_key)
+    if rv is not None:
+        return deepcopy(rv)
+
+    rv, cacheable = _parse_search_query(query, config, params=params, builder=builder)
+    if cacheable:
+        _parse_cache.set(cache_key, deepcopy(rv))
+    return rv
@@ -2,15 +2,20 @@ from __future__ import annotations
 
 import functools
 import logging
+import threading
 from collections import defaultdict
+from concurrent.futures import Future
 from datetime import datetime, timedelta
+from queue import Full
 from typing import Iterable, Mapping, Optional, Sequence, Tuple, TypedDict
 
 import pytz
 import sentry_sdk
 from django.conf import settings
+from django.db import close_old_connections
 from django.db.models import Min, prefetch_related_objects
 from django.utils import timezone
+from sentry_sdk import Hub
 
 from sentry import release_health, tagstore, tsdb
 from sentry.api.serializers import Serializer, register, serialize
@@ -60,8 +65,10 @@ from sentry.tsdb.snuba import SnubaTSDB
 from sentry.utils import metrics
 from sentry.utils.cache import cache
 from sentry.utils.compat import zip
+from sentry.utils.concurrent import SynchronousExecutor, ThreadedExecutor
 from sentry.utils.hashlib import hash_values
 from sentry.utils.json import JSONData
+from sentry.utils.request_cache import get_request_cache
 from sentry.utils.safe import safe_execute
 from sentry.utils.snuba import Dataset, aliased_query, raw_query
 
@@ -77,6 +84,118 @@ def merge_list_dictionaries(dict1, dict2):
         dict1.setdefault(key, []).extend(val)
 
 
+_stage_executor = None
+_stage_executor_lock = threading.Lock()
+
+
+def get_stage_executor():
+    global _stage_executor
+
+    if settings.SENTRY_GROUP_SERIALIZER_THREADS <= 0:
+        return None
+
+    with _stage_executor_lock:
+        if _stage_executor is None:
+            # Stages that don't fit in the queue run on the thread that starts them
+            _stage_executor = ThreadedExecutor(
+                worker_count=settings.SENTRY_GROUP_SERIALIZER_THREADS,
+                maxsize=settings.SENTRY_GROUP_SERIALIZER_THREADS,
+            )
+    return _stage_executor
+
+
+class GroupAttrsStages:
+    """
+    Runs the fetches of the group serializers that don't need the request thread
+    (mostly Snuba and tsdb queries) on a shared thread pool, so that they overlap with
+    each other and with the Postgres lookups done by `get_attrs`.
+
+    A stage can require the results of other stages, it's started as soon as all of
+    them are done. Stages given a `memo_key` are memoized for the rest of the request.
+    While the thread pool is saturated by other requests, stages run on the thread that
+    starts them instead of queueing up.
+    """
+
+    def __init__(self):
+        self.executor = get_stage_executor()
+        self.memo = get_request_cache("serializers.group.stages")
+        self.futures = {}
+
+    def submit(self, name, function, requires=(), memo_key=None):
+        """
+        Starts the stage `name`, which calls `function` with the results of the stages
+        listed in `requires`.
+        """
+        future = Future()
+        self.futures[name] = future
+
+        if memo_key is not None and self.memo is not None:
+            memo_key = (name, memo_key)
+            if memo_key in self.memo:
+                future.set_result(self.memo[memo_key])
+                return
+        else:
+            memo_key = None
+
+        hub = Hub(Hub.current)
+        executor = self.executor
+        request_thread = threading.current_thread()
+        dependencies = [self.futures[stage] for stage in requires]
+        remaining = [len(dependencies)]
+        lock = threading.Lock()
+
+        def run():
+            try:
+                with hub, hub.start_span(
+                    op="serialize.group.stage", description=name
+                ), metrics.timer("serializers.group.stage", tags={"stage": name}):
+                    return function(*(dependency.result() for dependency in dependencies))
+            finally:
+                if threading.current_thread() is not request_thread:
+                    # Worker threads aren't covered by the request signals that close
+                    # database connections
+                    close_old_connections()
+
+        def set_result(stage_future):
+            try:
+                result = stage_future.result()
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                if memo_key is not None:
+                    self.memo[memo_key] = result
+                future.set_result(result)
+
+        def start(done=None):
+            if done is not None:
+                with lock:
+                    remaining[0] -= 1
+                    if remaining[0] > 0:
+                        return
+                for dependency in dependencies:
+                    if dependency.exception() is not None:
+                        future.set_exception(dependency.exception())
+                        return
+
+            if executor is not None:
+                stage_future = executor.submit(run, block=False)
+                if not (stage_future.done() and isinstance(stage_future.exception(), Full)):
+                    stage_future.add_done_callback(set_result)
+                    return
+                metrics.incr("serializers.group.stage.inline", tags={"stage": name})
+
+            set_result(SynchronousExecutor().submit(run))
+
+        if dependencies:
+            for dependency in dependencies:
+                dependency.add_done_callback(start)
+        else:
+            start()
+
+    def result(self, name):
+        return self.futures[name].result()
+
+
 class GroupStatusDetailsResponseOptional(TypedDict, total=False):
     autoResolved: bool
     ignoreCount: int
@@ -282,6 +401,26 @@ class GroupSerializerBase(Serializer):
         )
 
     def get_attrs(self, item_list, user):
+        stages = GroupAttrsStages()
+        self._start_stages(stages, item_list, user)
+        return self._get_attrs(item_list, user, stages)
+
+    def _start_stages(self, stages, item_list, user):
+        """
+        Starts the fetches that `_get_attrs` doesn't need to do itself, so that they run
+        while it does its own lookups.
+        """
+        self._start_seen_stats_stages(stages, item_list, user)
+        stages.submit(
+            "unhandled",
+            functools.partial(self._get_group_snuba_stats, item_list),
+            requires=("seen_stats",),
+        )
+
+    def _start_seen_stats_stages(self, stages, item_list, user):
+        stages.submit("seen_stats", functools.partial(self._get_seen_stats, item_list, user))
+
+    def _get_attrs(self, item_list, user, stages):
         from sentry.integrations import IntegrationFeatures
         from sentry.models import PlatformExternalIssue
         from sentry.plugins.base import plugins
@@ -364,7 +503,7 @@ class GroupSerializerBase(Serializer):
 
         result = {}
 
-        seen_stats = self._get_seen_stats(item_list, user)
+        seen_stats = stages.result("seen_stats")
 
         annotations_by_group_id = defaultdict(list)
 
@@ -414,7 +553,7 @@ class GroupSerializerBase(Serializer):
         )
         merge_list_dictionaries(annotations_by_group_id, local_annotations_by_group_id)
 
-        snuba_stats = self._get_group_snuba_stats(item_list, seen_stats)
+        snuba_stats = stages.result("unhandled")
 
         for item in item_list:
             active_date = item.active_at or item.first_seen
@@ -760,11 +899,17 @@ class StreamGroupSerializer(GroupSerializer, GroupStatsMixin):
 
         return stats
 
-    def get_attrs(self, item_list, user):
-        attrs = super().get_attrs(item_list, user)
+    def _start_stages(self, stages, item_list, user):
+        super()._start_stages(stages, item_list, user)
 
         if self.stats_period:
-            stats = self.get_stats(item_list, user)
+            stages.submit("stats", functools.partial(self.get_stats, item_list, user))
+
+    def _get_attrs(self, item_list, user, stages):
+        attrs = super()._get_attrs(item_list, user, stages)
+
+        if self.stats_period:
+            stats = stages.result("stats")
             for item in item_list:
                 attrs[item].update({"stats": stats[item.id]})
 
@@ -933,8 +1078,33 @@ class GroupSerializerSnuba(GroupSerializerBase):
 
         return attrs
 
-    def _get_seen_stats(self, item_list, user):
-        return self._execute_seen_stats_query(
+    def _submit_seen_stats_query(
+        self, stages, name, item_list, start=None, end=None, conditions=None, environment_ids=None
+    ):
+        stages.submit(
+            name,
+            functools.partial(
+                self._execute_seen_stats_query,
+                item_list=item_list,
+                start=start,
+                end=end,
+                conditions=conditions,
+                environment_ids=environment_ids,
+            ),
+            memo_key=(
+                tuple(item.id for item in item_list),
+                start,
+                end,
+                repr(conditions),
+                repr(environment_ids),
+                repr(self.environment_ids),
+            ),
+        )
+
+    def _start_seen_stats_stages(self, stages, item_list, user):
+        self._submit_seen_stats_query(
+            stages,
+            "seen_stats",
             item_list=item_list,
             start=self.start,
             end=self.end,
@@ -978,39 +1148,46 @@ class StreamGroupSerializerSnuba(GroupSerializerSnuba, GroupStatsMixin):
         self.stats_period_end = stats_period_end
         self.matching_event_id = matching_event_id
 
-    def _get_seen_stats(self, item_list, user):
-        if not self._collapse("stats"):
-            partial_execute_seen_stats_query = functools.partial(
-                self._execute_seen_stats_query,
-                item_list=item_list,
-                environment_ids=self.environment_ids,
-                start=self.start,
-                end=self.end,
-            )
-            time_range_result = partial_execute_seen_stats_query()
-            filtered_result = (
-                partial_execute_seen_stats_query(conditions=self.conditions)
-                if self.conditions and not self._collapse("filtered")
-                else None
+    def _start_seen_stats_stages(self, stages, item_list, user):
+        if self._collapse("stats"):
+            stages.submit("seen_stats", lambda: None)
+            return
+
+        submit_seen_stats_query = functools.partial(
+            self._submit_seen_stats_query,
+            stages,
+            item_list=item_list,
+            environment_ids=self.environment_ids,
+        )
+        submit_seen_stats_query("seen_stats.time_range", start=self.start, end=self.end)
+        requires = {"time_range": "seen_stats.time_range"}
+        if self.conditions and not self._collapse("filtered"):
+            submit_seen_stats_query(
+                "seen_stats.filtered", start=self.start, end=self.end, conditions=self.conditions
             )
-            if not self._collapse("lifetime"):
-                lifetime_result = (
-                    partial_execute_seen_stats_query(start=None, end=None)
-                    if self.start or self.end
-                    else time_range_result
-                )
+            requires["filtered"] = "seen_stats.filtered"
+        if not self._collapse("lifetime"):
+            if self.start or self.end:
+                submit_seen_stats_query("seen_stats.lifetime")
+                requires["lifetime"] = "seen_stats.lifetime"
             else:
-                lifetime_result = None
+                requires["lifetime"] = "seen_stats.time_range"
+
+        def merge_seen_stats(*results):
+            results = dict(zip(requires.keys(), results))
+            time_range_result = results["time_range"]
+            filtered_result = results.get("filtered")
+            lifetime_result = results.get("lifetime")
+            return {
+                item: {
+                    **time_range_result[item],
+                    "filtered": filtered_result.get(item) if filtered_result else None,
+                    "lifetime": lifetime_result.get(item) if lifetime_result else None,
+                }
+                for item in item_list
+            }
 
-            for item in item_list:
-                time_range_result[item].update(
-                    {
-                        "filtered": filtered_result.get(item) if filtered_result else None,
-                        "lifetime": lifetime_result.get(item) if lifetime_result else None,
-                    }
-                )
-            return time_range_result
-        return None
+        stages.submit("seen_stats", merge_seen_stats, requires=tuple(requires.values()))
 
     def query_tsdb(self, group_ids, query_params, conditions=None, environment_ids=None, **kwargs):
         return snuba_tsdb.get_range(
@@ -1021,23 +1198,48 @@ class StreamGroupSerializerSnuba(GroupSerializerSnuba, GroupStatsMixin):
             **query_params,
         )
 
-    def get_attrs(self, item_list, user):
+    def _start_stages(self, stages, item_list, user):
         if not self._collapse("base"):
-            attrs = super().get_attrs(item_list, user)
+            super()._start_stages(stages, item_list, user)
         else:
-            seen_stats = self._get_seen_stats(item_list, user)
-            if seen_stats:
-                attrs = {item: seen_stats.get(item, {}) for item in item_list}
-            else:
-                attrs = {item: {} for item in item_list}
+            self._start_seen_stats_stages(stages, item_list, user)
 
         if self.stats_period and not self._collapse("stats"):
             partial_get_stats = functools.partial(
                 self.get_stats, item_list=item_list, user=user, environment_ids=self.environment_ids
             )
-            stats = partial_get_stats()
+            memo_key = (
+                tuple(item.id for item in item_list),
+                self.stats_period,
+                self.stats_period_start,
+                self.stats_period_end,
+                repr(self.environment_ids),
+            )
+            stages.submit("stats", partial_get_stats, memo_key=memo_key)
+            if self.conditions and not self._collapse("filtered"):
+                stages.submit(
+                    "filtered_stats",
+                    functools.partial(partial_get_stats, conditions=self.conditions),
+                    memo_key=memo_key + (repr(self.conditions),),
+                )
+
+            if self._expand("sessions"):
+                stages.submit("sessions", functools.partial(self._get_session_counts, item_list))
+
+    def _get_attrs(self, item_list, user, stages):
+        if not self._collapse("base"):
+            attrs = super()._get_attrs(item_list, user, stages)
+        else:
+            seen_stats = stages.result("seen_stats")
+            if seen_stats:
+                attrs = {item: dict(seen_stats.get(item, {})) for item in item_list}
+            else:
+                attrs = {item: {} for item in item_list}
+
+        if self.stats_period and not self._collapse("stats"):
+            stats = stages.result("stats")
             filtered_stats = (
-                partial_get_stats(conditions=self.conditions)
+                stages.result("filtered_stats")
                 if self.conditions and not self._collapse("filtered")
                 else None
             )
@@ -1047,48 +1249,9 @@ class StreamGroupSerializerSnuba(GroupSerializerSnuba, GroupStatsMixin):
                 attrs[item].update({"stats": stats[item.id]})
 
             if self._expand("sessions"):
-                uniq_project_ids = list({item.project_id for item in item_list})
-                cache_keys = {pid: self._build_session_cache_key(pid) for pid in uniq_project_ids}
-                cache_data = cache.get_many(cache_keys.values())
-                missed_items = []
+                session_counts = stages.result("sessions")
                 for item in item_list:
-                    num_sessions = cache_data.get(cache_keys[item.project_id])
-                    if num_sessions is None:
-                        found = "miss"
-                        missed_items.append(item)
-                    else:
-                        found = "hit"
-                        attrs[item].update(
-                            {
-                                "sessionCount": num_sessions,
-                            }
-                        )
-                    metrics.incr(f"group.get_session_counts.{found}")
-
-                if missed_items:
-                    project_ids = list({item.project_id for item in missed_items})
-                    project_sessions = release_health.get_num_sessions_per_project(
-                        project_ids,
-                        self.start,
-                        self.end,
-                        self.environment_ids,
-                    )
-
-                    results = {}
-                    for project_id, count in project_sessions:
-                        cache_key = self._build_session_cache_key(project_id)
-                        results[project_id] = count
-                        cache.set(cache_key, count, 3600)
-
-                    for item in missed_items:
-                        if item.project_id in results.keys():
-                            attrs[item].update(
-                                {
-                                    "sessionCount": results[item.project_id],
-                                }
-                            )
-                        else:
-                            attrs[item].update({"sessionCount": None})
+                    attrs[item].update({"sessionCount": session_counts[item.id]})
 
         if self._expand("inbox"):
             inbox_stats = get_inbox_details(item_list)
@@ -1147,6 +1310,42 @@ class StreamGroupSerializerSnuba(GroupSerializerSnuba, GroupStatsMixin):
 
         return result
 
+    def _get_session_counts(self, item_list):
+        uniq_project_ids = list({item.project_id for item in item_list})
+        cache_keys = {pid: self._build_session_cache_key(pid) for pid in uniq_project_ids}
+        cache_data = cache.get_many(cache_keys.values())
+        session_counts = {}
+        missed_items = []
+        for item in item_list:
+            num_sessions = cache_data.get(cache_keys[item.project_id])
+            if num_sessions is None:
+                found = "miss"
+                missed_items.append(item)
+            else:
+                found = "hit"
+                session_counts[item.id] = num_sessions
+            metrics.incr(f"group.get_session_counts.{found}")
+
+        if missed_items:
+            project_ids = list({item.project_id for item in missed_items})
+            project_sessions = release_health.get_num_sessions_per_project(
+                project_ids,
+                self.start,
+                self.end,
+                self.environment_ids,
+            )
+
+            results = {}
+            for project_id, count in project_sessions:
+                cache_key = self._build_session_cache_key(project_id)
+                results[project_id] = count
+                cache.set(cache_key, count, 3600)
+
+            for item in missed_items:
+                session_counts[item.id] = results.get(item.project_id)
+
+        return session_counts
+
     def _build_session_cache_key(self, project_id):
         start_key = end_key = env_key = ""
         if self.start:
@@ -1161,8 +1360,8 @@ class StreamGroupSerializerSnuba(GroupSerializerSnuba, GroupStatsMixin):
             start_key = start_key.replace(minute=0)
 
         if self.environment_ids:
-            self.environment_ids.sort()
-            env_key = "-".join(str(eid) for eid in self.environment_ids)
+            # Not sorted in place as other stages may be using the list at the same time
+            env_key = "-".join(str(eid) for eid in sorted(self.environment_ids))
 
         start_key = start_key.strftime("%m/%d/%Y, %H:%M:%S") if start_key != "" else ""
         end_key = end_key.strftime("%m/%d/%Y, %H:%M:%S") if end_key != "" else ""
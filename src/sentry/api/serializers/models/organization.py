@@ -129,17 +129,74 @@ class OrganizationSerializer(Serializer):  # type: ignore
             a.organization_id: a
             for a in OrganizationAvatar.objects.filter(organization__in=item_list)
         }
+        feature_lists = self._get_feature_lists(item_list, user)
         data: MutableMapping[Organization, MutableMapping[str, Any]] = {}
         for item in item_list:
-            data[item] = {"avatar": avatars.get(item.id)}
+            data[item] = {"avatar": avatars.get(item.id), "features": feature_lists[item]}
         return data
 
+    def _get_feature_lists(
+        self, item_list: Sequence[Organization], user: User
+    ) -> Mapping[Organization, set[str]]:
+        from sentry.features.base import OrganizationFeature
+
+        # Retrieve all registered organization features
+        org_features = [
+            feature
+            for feature in features.all(feature_type=OrganizationFeature).keys()
+            if feature.startswith(_ORGANIZATION_SCOPE_PREFIX)
+        ]
+
+        org_ids = [item.id for item in item_list]
+        orgs_with_options = set(
+            OrganizationOption.objects.filter(organization_id__in=org_ids)
+            .values_list("organization_id", flat=True)
+            .distinct()
+        )
+        orgs_with_api_keys = set(
+            ApiKey.objects.filter(organization_id__in=org_ids)
+            .values_list("organization_id", flat=True)
+            .distinct()
+        )
+        orgs_with_legacy_rate_limits = set(
+            OrganizationOption.objects.filter(
+                organization_id__in=org_ids, key__in=LEGACY_RATE_LIMIT_OPTIONS
+            )
+            .values_list("organization_id", flat=True)
+            .distinct()
+        )
+
+        feature_lists = {}
+        for obj, flags in features.has_for_objects(org_features, item_list, actor=user).items():
+            # Remove the organization scope prefix
+            feature_list = {
+                feature_name[len(_ORGANIZATION_SCOPE_PREFIX) :]
+                for feature_name in org_features
+                if flags[feature_name]
+            }
+
+            # Do not include the onboarding feature if OrganizationOptions exist
+            if "onboarding" in feature_list and obj.id in orgs_with_options:
+                feature_list.remove("onboarding")
+
+            # Include api-keys feature if they previously had any api-keys
+            if obj.id in orgs_with_api_keys:
+                feature_list.add("api-keys")
+
+            # Organization flag features (not provided through the features module)
+            if obj.id in orgs_with_legacy_rate_limits:
+                feature_list.add("legacy-rate-limits")
+            if getattr(obj.flags, "allow_joinleave"):
+                feature_list.add("open-membership")
+            if not getattr(obj.flags, "disable_shared_issues"):
+                feature_list.add("shared-issues")
+
+            feature_lists[obj] = feature_list
+        return feature_lists
+
     def serialize(
         self, obj: Organization, attrs: Mapping[str, Any], user: User
     ) -> OrganizationSerializerResponse:
-        from sentry import features
-        from sentry.features.base import OrganizationFeature
-
         if attrs.get("avatar"):
             avatar = {
                 "avatarType": attrs["avatar"].get_avatar_type_display(),
@@ -150,53 +207,7 @@ class OrganizationSerializer(Serializer):  # type: ignore
 
         status = OrganizationStatus(obj.status)
 
-        # Retrieve all registered organization features
-        org_features = [
-            feature
-            for feature in features.all(feature_type=OrganizationFeature).keys()
-            if feature.startswith(_ORGANIZATION_SCOPE_PREFIX)
-        ]
-        feature_list = set()
-
-        # Check features in batch using the entity handler
-        batch_features = features.batch_has(org_features, actor=user, organization=obj)
-
-        # batch_has has found some features
-        if batch_features:
-            for feature_name, active in batch_features.get(f"organization:{obj.id}", {}).items():
-                if active:
-                    # Remove organization prefix
-                    feature_list.add(feature_name[len(_ORGANIZATION_SCOPE_PREFIX) :])
-
-                # This feature_name was found via `batch_has`, don't check again using `has`
-                org_features.remove(feature_name)
-
-        # Remaining features should not be checked via the entity handler
-        for feature_name in org_features:
-            if features.has(feature_name, obj, actor=user, skip_entity=True):
-                # Remove the organization scope prefix
-                feature_list.add(feature_name[len(_ORGANIZATION_SCOPE_PREFIX) :])
-
-        # Do not include the onboarding feature if OrganizationOptions exist
-        if (
-            "onboarding" in feature_list
-            and OrganizationOption.objects.filter(organization=obj).exists()
-        ):
-            feature_list.remove("onboarding")
-
-        # Include api-keys feature if they previously had any api-keys
-        if "api-keys" not in feature_list and ApiKey.objects.filter(organization=obj).exists():
-            feature_list.add("api-keys")
-
-        # Organization flag features (not provided through the features module)
-        if OrganizationOption.objects.filter(
-            organization=obj, key__in=LEGACY_RATE_LIMIT_OPTIONS
-        ).exists():
-            feature_list.add("legacy-rate-limits")
-        if getattr(obj.flags, "allow_joinleave"):
-            feature_list.add("open-membership")
-        if not getattr(obj.flags, "disable_shared_issues"):
-            feature_list.add("shared-issues")
+        feature_list = attrs["features"]
 
         return {
             "id": str(obj.id),
@@ -0,0 +1,163 @@
+import atexit
+import logging
+import os
+import threading
+import weakref
+from time import time
+
+from celery.signals import worker_process_shutdown
+
+from sentry.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# All aggregators of this process, flushed once when it shuts down
+_aggregators = weakref.WeakSet()
+
+
+class PendingIncr:
+    __slots__ = ("model", "columns", "filters", "extra", "signal_only")
+
+    def __init__(self, model, columns, filters, extra, signal_only):
+        self.model = model
+        self.columns = columns
+        self.filters = filters
+        self.extra = extra
+        self.signal_only = signal_only
+
+    def merge(self, columns, extra, signal_only):
+        for column, amount in columns.items():
+            self.columns[column] = self.columns.get(column, 0) + amount
+        if extra:
+            # last write wins, the same as `hset` in the Redis buffer
+            self.extra.update(extra)
+        if signal_only is True:
+            self.signal_only = True
+
+
+class LocalAggregator:
+    """
+    Pre-aggregates buffer increments in process memory before they are sent
+    to the shared buffer.
+
+    Increments are summed per buffer key (which is derived from the model and
+    its filters), ``extra`` values are last-write-wins and ``signal_only`` is
+    sticky, which matches what the Redis buffer does with the same calls.
+
+    Pending increments are handed to ``flush_func`` when ``max_keys`` distinct
+    keys are buffered, when the oldest one is older than ``max_age`` seconds,
+    and when the process exits. ``max_age`` is therefore the window of
+    increments that can be lost if the process crashes.
+    """
+
+    def __init__(self, flush_func, max_keys=1000, max_age=1.0):
+        assert max_keys > 0
+        assert max_age > 0
+        self.flush_func = flush_func
+        self.max_keys = max_keys
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._oldest = None
+        self._pid = None
+        _aggregators.add(self)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def get(self, key, column):
+        """
+        Returns the amount of ``column`` for ``key`` that has not been flushed
+        yet.
+        """
+        pending = self._pending.get(key)
+        if pending is None:
+            return 0
+        return pending.columns.get(column, 0)
+
+    def _ensure_flusher(self):
+        # Pending increments and the flusher thread do not survive a fork, the
+        # parent process still owns (and flushes) whatever it had buffered.
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        self._pid = pid
+        self._pending = {}
+        self._oldest = None
+
+        t = threading.Thread(
+            target=_run_flusher,
+            args=(weakref.ref(self), self.max_age),
+            name="sentry.buffer.aggregator",
+        )
+        t.daemon = True
+        t.start()
+
+    def add(self, key, model, columns, filters, extra=None, signal_only=None):
+        with self._lock:
+            self._ensure_flusher()
+            pending = self._pending.get(key)
+            if pending is None:
+                self._pending[key] = PendingIncr(
+                    model, dict(columns), filters, dict(extra or {}), signal_only
+                )
+                if self._oldest is None:
+                    self._oldest = time()
+            else:
+                pending.merge(columns, extra, signal_only)
+            is_full = len(self._pending) >= self.max_keys
+
+        metrics.incr(
+            "buffer.aggregator.incr", skip_internal=True, tags={"merged": pending is not None}
+        )
+
+        if is_full:
+            self.flush(reason="size")
+
+    def flush(self, reason="shutdown"):
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            oldest, self._oldest = self._oldest, None
+
+        metrics.timing("buffer.aggregator.flush.size", len(pending), tags={"reason": reason})
+        metrics.timing("buffer.aggregator.flush.age", time() - oldest, tags={"reason": reason})
+
+        with metrics.timer("buffer.aggregator.flush", tags={"reason": reason}):
+            for incr in pending.values():
+                try:
+                    self.flush_func(
+                        incr.model,
+                        incr.columns,
+                        incr.filters,
+                        extra=incr.extra or None,
+                        signal_only=incr.signal_only,
+                    )
+                except Exception:
+                    logger.exception(
+                        "buffer.aggregator.flush-failed", extra={"model": incr.model.__name__}
+                    )
+
+
+def _run_flusher(ref, max_age):
+    # Only holds a weak reference, so that the thread stops once the
+    # aggregator is gone.
+    event = threading.Event()
+    while not event.wait(max_age / 2):
+        aggregator = ref()
+        if aggregator is None:
+            return
+        if aggregator._oldest is not None and time() - aggregator._oldest >= max_age:
+            aggregator.flush(reason="age")
+        del aggregator
+
+
+def flush_all(**kwargs):
+    for aggregator in list(_aggregators):
+        aggregator.flush()
+
+
+atexit.register(flush_all)
+# celery's prefork pool may leave its children without running atexit handlers
+worker_process_shutdown.connect(flush_all, weak=False)
@@ -1,12 +1,29 @@
 import logging
+from collections import defaultdict
+from itertools import chain
 
+from django.db import DatabaseError, connections, router, transaction
 from django.db.models import F
 
 from sentry.signals import buffer_incr_complete
 from sentry.tasks.process_buffer import process_incr
+from sentry.utils import metrics
+from sentry.utils.dates import to_timestamp
 from sentry.utils.services import Service
 
 
+def get_cast_type(field, connection):
+    """
+    Returns the type values for ``field`` are cast to. Auto fields have
+    ``serial`` column types, which only exist in DDL, so they're cast to the
+    type of the columns referencing them instead.
+    """
+    get_related_db_type = getattr(field, "get_related_db_type", None)
+    if get_related_db_type is not None:
+        return get_related_db_type(connection)
+    return field.rel_db_type(connection)
+
+
 class BufferMount(type):
     def __new__(cls, name, bases, attrs):
         new_cls = type.__new__(cls, name, bases, attrs)
@@ -88,3 +105,153 @@ class Buffer(Service, metaclass=BufferMount):
             created=created,
             sender=model,
         )
+
+    def process_batch(self, model, rows):
+        """
+        Applies many buffered increments for ``model`` at once.
+
+        ``rows`` is a list of ``(columns, filters, extra)`` tuples. Rows sharing
+        the same filter, counter and extra columns are written with a single
+        ``UPDATE ... FROM (VALUES ...)`` statement. Rows that did not match an
+        existing row, or that carry query expressions, fall back to ``process``
+        so they keep the ``create_or_update`` semantics.
+
+        ``buffer_incr_complete`` is still sent once per row.
+        """
+        from sentry.models import Group
+
+        fallback = []
+        batches = defaultdict(list)
+        for columns, filters, extra in rows:
+            values = dict(extra or {})
+            if model is Group and "last_seen" in values and "times_seen" in columns:
+                # `score` is recomputed from the coalesced values in the UPDATE,
+                # the same way `process` replaces it with a `ScoreClause`.
+                values.pop("score", None)
+            if any(
+                hasattr(v, "resolve_expression") for v in chain(filters.values(), values.values())
+            ):
+                fallback.append((columns, filters, extra))
+                continue
+            signature = (tuple(sorted(filters)), tuple(sorted(columns)), tuple(sorted(values)))
+            batches[signature].append((columns, filters, extra, values))
+
+        for signature, batch in batches.items():
+            with metrics.timer("buffer.process-batch.update", tags={"model": model.__name__}):
+                try:
+                    updated = self._coalesced_update(model, signature, batch)
+                except DatabaseError:
+                    # The counters were already taken out of the buffer, so
+                    # write them row by row rather than losing them.
+                    self.logger.exception(
+                        "buffer.process-batch.update-failed", extra={"model": model.__name__}
+                    )
+                    updated = set()
+
+            for idx, (columns, filters, extra, _) in enumerate(batch):
+                if idx not in updated:
+                    fallback.append((columns, filters, extra))
+                    continue
+                buffer_incr_complete.send_robust(
+                    model=model,
+                    columns=columns,
+                    filters=filters,
+                    extra=extra,
+                    created=False,
+                    sender=model,
+                )
+
+        metrics.incr(
+            "buffer.process-batch.fallback",
+            amount=len(fallback),
+            skip_internal=True,
+            tags={"model": model.__name__},
+        )
+        for columns, filters, extra in fallback:
+            Buffer.process(self, model, columns, filters, extra)
+
+    def _coalesced_update(self, model, signature, batch):
+        """
+        Issues one UPDATE for rows sharing ``signature`` and returns the
+        indexes (into ``batch``) of the rows that were updated.
+        """
+        from sentry.models import Group
+
+        filter_names, column_names, extra_names = signature
+        opts = model._meta
+        using = router.db_for_write(model)
+        connection = connections[using]
+        qn = connection.ops.quote_name
+
+        def get_field(name):
+            return opts.pk if name == "pk" else opts.get_field(name)
+
+        filter_fields = [get_field(name) for name in filter_names]
+        column_fields = [get_field(name) for name in column_names]
+        extra_fields = [get_field(name) for name in extra_names]
+        with_score = model is Group and "last_seen" in extra_names and "times_seen" in column_names
+
+        aliases = ["idx"]
+        casts = ["integer"]
+        for prefix, fields in (("f", filter_fields), ("i", column_fields), ("e", extra_fields)):
+            for n, field in enumerate(fields):
+                aliases.append(f"{prefix}{n}")
+                casts.append(get_cast_type(field, connection))
+        if with_score:
+            aliases.append("score_ts")
+            casts.append("integer")
+
+        params = []
+        placeholders = []
+        seen = set()
+        for idx, (columns, filters, _, extra) in enumerate(batch):
+            filter_values = tuple(
+                field.get_db_prep_save(getattr(filters[name], "pk", filters[name]), connection)
+                for name, field in zip(filter_names, filter_fields)
+            )
+            # A row can only be updated once per statement, leave duplicates
+            # to the per-row fallback.
+            if filter_values in seen:
+                continue
+            seen.add(filter_values)
+
+            params.append(idx)
+            params.extend(filter_values)
+            params.extend(columns[name] for name in column_names)
+            params.extend(
+                field.get_db_prep_save(extra[name], connection)
+                for name, field in zip(extra_names, extra_fields)
+            )
+            if with_score:
+                params.append(int(to_timestamp(extra["last_seen"])))
+            placeholders.append("(%s)" % ", ".join(f"%s::{cast}" for cast in casts))
+
+        assignments = [
+            f"{qn(field.column)} = t.{qn(field.column)} + v.i{n}"
+            for n, field in enumerate(column_fields)
+        ]
+        assignments.extend(f"{qn(field.column)} = v.e{n}" for n, field in enumerate(extra_fields))
+        if with_score:
+            times_seen = column_names.index("times_seen")
+            assignments.append(f"score = log(t.times_seen + v.i{times_seen}) * 600 + v.score_ts")
+        if not assignments:
+            # Nothing to write, only the signal needs to be sent.
+            return set(range(len(batch)))
+
+        conditions = [f"t.{qn(field.column)} = v.f{n}" for n, field in enumerate(filter_fields)]
+        sql = """
+            UPDATE {table} AS t SET {assignments}
+            FROM (VALUES {values}) AS v ({aliases})
+            WHERE {conditions}
+            RETURNING v.idx
+        """.format(
+            table=qn(opts.db_table),
+            assignments=", ".join(assignments),
+            values=", ".join(placeholders),
+            aliases=", ".join(aliases),
+            conditions=" AND ".join(conditions),
+        )
+
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return {row[0] for row in cursor.fetchall()}
@@ -1,5 +1,6 @@
 import pickle
 import threading
+from collections import defaultdict
 from datetime import datetime
 from time import time
 
@@ -8,6 +9,7 @@ from django.utils import timezone
 from django.utils.encoding import force_bytes, force_text
 
 from sentry.buffer import Buffer
+from sentry.buffer.aggregator import LocalAggregator
 from sentry.exceptions import InvalidConfiguration
 from sentry.tasks.process_buffer import process_incr, process_pending
 from sentry.utils import json, metrics
@@ -51,10 +53,30 @@ class RedisBuffer(Buffer):
     key_expire = 60 * 60  # 1 hour
     pending_key = "b:p"
 
-    def __init__(self, pending_partitions=1, incr_batch_size=2, **options):
+    def __init__(
+        self,
+        pending_partitions=1,
+        incr_batch_size=2,
+        coalesce_batches=False,
+        aggregate_max_keys=0,
+        aggregate_max_age=1.0,
+        **options,
+    ):
         self.cluster, options = get_cluster_from_options("SENTRY_BUFFER_OPTIONS", options)
         self.pending_partitions = pending_partitions
         self.incr_batch_size = incr_batch_size
+        # When enabled, a `process_incr` task fetches and clears all of its
+        # keys in one pipeline per host and writes them with one UPDATE per
+        # model and column set (see `Buffer.process_batch`).
+        self.coalesce_batches = coalesce_batches
+        # When enabled, `incr` calls are summed in process memory and only
+        # sent to Redis once `aggregate_max_keys` distinct keys are pending or
+        # after `aggregate_max_age` seconds (see `LocalAggregator`).
+        self.aggregator = None
+        if aggregate_max_keys > 0:
+            self.aggregator = LocalAggregator(
+                self._incr, max_keys=aggregate_max_keys, max_age=aggregate_max_age
+            )
         assert self.pending_partitions > 0
         assert self.incr_batch_size > 0
 
@@ -154,11 +176,23 @@ class RedisBuffer(Buffer):
             pipe.hget(key, f"i+{col}")
         results = pipe.execute()
 
-        return {
+        result = {
             col: (int(results[i]) if results[i] is not None else 0) for i, col in enumerate(columns)
         }
+        if self.aggregator is not None:
+            for col in columns:
+                result[col] += self.aggregator.get(key, col)
+        return result
 
     def incr(self, model, columns, filters, extra=None, signal_only=None, return_incr_results=True):
+        if self.aggregator is not None:
+            self.aggregator.add(
+                self._make_key(model, filters), model, columns, filters, extra, signal_only
+            )
+            return
+        self._incr(model, columns, filters, extra, signal_only)
+
+    def _incr(self, model, columns, filters, extra=None, signal_only=None):
         """
         Increment the key by doing the following:
 
@@ -259,6 +293,10 @@ class RedisBuffer(Buffer):
         if key is not None:
             batch_keys = [key]
 
+        if self.coalesce_batches and len(batch_keys) > 1:
+            self._process_batch_incr(batch_keys)
+            return
+
         for key in batch_keys:
             self._process_single_incr(key)
 
@@ -282,42 +320,124 @@ class RedisBuffer(Buffer):
             pipe.delete(key)
             values = pipe.execute()[0]
 
-            # XXX(python3): In python2 this isn't as important since redis will
-            # return string tyes (be it, byte strings), but in py3 we get bytes
-            # back, and really we just want to deal with keys as strings.
-            values = {force_text(k): v for k, v in values.items()}
+            incr = self._load_incr(key, values)
+            if incr is None:
+                return
+
+            super().process(*incr)
+        finally:
+            client.delete(lock_key)
 
-            if not values:
-                metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
-                self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+    def _process_batch_incr(self, batch_keys):
+        # dedupe while preserving order, a key can only be locked once
+        batch_keys = list(dict.fromkeys(batch_keys))
+
+        with metrics.timer("buffer.process-batch"):
+            # prevent a stampede due to the way we use celery etas + duplicate
+            # tasks, same as `_process_single_incr` but for the whole batch
+            with self.cluster.map() as conn:
+                locks = [
+                    (key, conn.set(self._make_lock_key(key), "1", nx=True, ex=10))
+                    for key in batch_keys
+                ]
+
+            locked_keys = []
+            for key, result in locks:
+                if result.value:
+                    locked_keys.append(key)
+                else:
+                    metrics.incr("buffer.revoked", tags={"reason": "locked"}, skip_internal=False)
+                    self.logger.debug("buffer.revoked.locked", extra={"redis_key": key})
+
+            if not locked_keys:
                 return
 
-            # XXX(py3): Note that ``import_string`` explicitly wants a str in
-            # python2, so we'll decode (for python3) and then translate back to
-            # a byte string (in python2) for import_string.
-            model = import_string(str(values.pop("m").decode("utf-8")))  # NOQA
-
-            if values["f"].startswith(b"{"):
-                filters = self._load_values(json.loads(values.pop("f").decode("utf-8")))
-            else:
-                # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                filters = pickle.loads(values.pop("f"))
-
-            incr_values = {}
-            extra_values = {}
-            signal_only = None
-            for k, v in values.items():
-                if k.startswith("i+"):
-                    incr_values[k[2:]] = int(v)
-                elif k.startswith("e+"):
-                    if v.startswith(b"["):
-                        extra_values[k[2:]] = self._load_value(json.loads(v.decode("utf-8")))
+            try:
+                with metrics.timer("buffer.process-batch.fetch"):
+                    payloads = self._fetch_and_clear(locked_keys)
+
+                rows_by_model = defaultdict(list)
+                for key in locked_keys:
+                    incr = self._load_incr(key, payloads[key])
+                    if incr is None:
+                        continue
+
+                    model, columns, filters, extra, signal_only = incr
+                    if signal_only:
+                        super().process(model, columns, filters, extra, signal_only)
                     else:
-                        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                        extra_values[k[2:]] = pickle.loads(v)
-                elif k == "s":
-                    signal_only = bool(int(v))  # Should be 1 if set
+                        rows_by_model[model].append((columns, filters, extra))
 
-            super().process(model, incr_values, filters, extra_values, signal_only)
-        finally:
-            client.delete(lock_key)
+                for model, rows in rows_by_model.items():
+                    self.process_batch(model, rows)
+
+                metrics.timing("buffer.process-batch.size", len(locked_keys))
+            finally:
+                with self.cluster.map() as conn:
+                    for key in locked_keys:
+                        conn.delete(self._make_lock_key(key))
+
+    def _fetch_and_clear(self, keys):
+        """
+        Reads and removes the buffered hashes for ``keys`` using one
+        transactional pipeline per Redis host.
+        """
+        router = self.cluster.get_router()
+        keys_by_host = defaultdict(list)
+        for key in keys:
+            keys_by_host[router.get_host_for_key(key)].append(key)
+
+        payloads = {}
+        for host_id, host_keys in keys_by_host.items():
+            pipe = self.cluster.get_local_client(host_id).pipeline()
+            for key in host_keys:
+                pipe.hgetall(key)
+                pipe.zrem(self._make_pending_key_from_key(key), key)
+                pipe.delete(key)
+            results = pipe.execute()
+            for i, key in enumerate(host_keys):
+                payloads[key] = results[i * 3]
+        return payloads
+
+    def _load_incr(self, key, values):
+        """
+        Decodes a buffered hash into ``(model, columns, filters, extra,
+        signal_only)``, or returns ``None`` if the buffer was already flushed.
+        """
+        # XXX(python3): In python2 this isn't as important since redis will
+        # return string tyes (be it, byte strings), but in py3 we get bytes
+        # back, and really we just want to deal with keys as strings.
+        values = {force_text(k): v for k, v in values.items()}
+
+        if not values:
+            metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
+            self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+            return None
+
+        # XXX(py3): Note that ``import_string`` explicitly wants a str in
+        # python2, so we'll decode (for python3) and then translate back to
+        # a byte string (in python2) for import_string.
+        model = import_string(str(values.pop("m").decode("utf-8")))  # NOQA
+
+        if values["f"].startswith(b"{"):
+            filters = self._load_values(json.loads(values.pop("f").decode("utf-8")))
+        else:
+            # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+            filters = pickle.loads(values.pop("f"))
+
+        incr_values = {}
+        extra_values = {}
+        signal_only = None
+        for k, v in values.items():
+            if k.startswith("i+"):
+                incr_values[k[2:]] = int(v)
+            elif k.startswith("e+"):
+                if v.startswith(b"["):
+                    extra_values[k[2:]] = self._load_value(json.loads(v.decode("utf-8")))
+                else:
+                    # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+                    extra_values[k[2:]] = pickle.loads(v)
+            elif k == "s":
+                signal_only = bool(int(v))  # Should be 1 if set
+
+        return model, incr_values, filters, extra_values, signal_only
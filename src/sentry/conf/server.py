@@ -1361,6 +1361,29 @@ SENTRY_DEFAULT_MAX_EVENTS_PER_MINUTE = "90%"
 SENTRY_SNUBA = os.environ.get("SNUBA", "http://127.0.0.1:1218")
 SENTRY_SNUBA_TIMEOUT = 30
 SENTRY_SNUBA_CACHE_TTL_SECONDS = 60
+# Seconds an expired query result is still served from the cache while one
+# caller refreshes it.
+SENTRY_SNUBA_CACHE_STALE_SECONDS = 60
+# Referrers whose queries always go through the query cache.
+SENTRY_SNUBA_CACHE_REFERRERS = frozenset()
+# Seconds a caller waits for the result of an identical query that another
+# caller is already running, before running the query itself.
+SENTRY_SNUBA_CACHE_FILL_TIMEOUT = 10
+# Number of connections each process keeps open to Snuba, and number of threads
+# running the queries of bulk requests.
+SENTRY_SNUBA_CONNECTION_POOL_SIZE = 10
+SENTRY_SNUBA_QUERY_THREADS = 10
+# Maximum number of bulk queries of a single referrer running at the same time,
+# so that one endpoint issuing many queries cannot starve all others.
+# Defaults to `SENTRY_SNUBA_QUERY_THREADS`, i.e. no limit, and
+# `SENTRY_SNUBA_REFERRER_CONCURRENCY` lowers the limit of single referrers.
+SENTRY_SNUBA_DEFAULT_REFERRER_CONCURRENCY = None
+SENTRY_SNUBA_REFERRER_CONCURRENCY = {}
+# Send identical queries that are in flight at the same time only once.
+SENTRY_SNUBA_DEDUPLICATE_QUERIES = True
+# Number of threads fetching the Snuba and tsdb attributes of the issue
+# serializers concurrently. Set to 0 to fetch them on the request thread.
+SENTRY_GROUP_SERIALIZER_THREADS = 8
 
 # Node storage backend
 SENTRY_NODESTORE = "sentry.nodestore.django.DjangoNodeStorage"
@@ -1409,6 +1432,13 @@ SENTRY_METRICS_SKIP_INTERNAL_PREFIXES = []  # Order this by most frequent prefix
 SENTRY_METRICS_INDEXER = "sentry.sentry_metrics.indexer.postgres.PGStringIndexer"
 SENTRY_METRICS_INDEXER_OPTIONS = {}
 SENTRY_METRICS_INDEXER_CACHE_TTL = 3600 * 2
+# Size of the process-local cache in front of the shared indexer cache, 0
+# disables it. Strings are only admitted once they were looked up
+# SENTRY_METRICS_INDEXER_LOCAL_CACHE_ADMISSION_THRESHOLD times, which keeps
+# high-cardinality tag values out of it.
+SENTRY_METRICS_INDEXER_LOCAL_CACHE_SIZE = 100000
+SENTRY_METRICS_INDEXER_LOCAL_CACHE_TTL = 600
+SENTRY_METRICS_INDEXER_LOCAL_CACHE_ADMISSION_THRESHOLD = 2
 
 # Release Health
 SENTRY_RELEASE_HEALTH = "sentry.release_health.sessions.SessionsReleaseHealthBackend"
@@ -1464,6 +1494,16 @@ SENTRY_SOURCE_FETCH_MAX_SIZE = 40 * 1024 * 1024
 # e.g. memcached defaults to 1MB  = 1024 * 1024
 SENTRY_CACHE_MAX_VALUE_SIZE = None
 
+# Maximum total size (in bytes of the raw files) of parsed JavaScript sources
+# and source maps each worker keeps in memory between events.  Set to 0 to
+# disable.
+SENTRY_JS_PARSED_VIEW_CACHE_SIZE = 256 * 1024 * 1024
+
+# Number of processed stack frames each worker keeps in memory in front of the
+# shared frame cache, and for how many seconds.  Set the size to 0 to disable.
+SENTRY_PROCESSED_FRAME_CACHE_SIZE = 10000
+SENTRY_PROCESSED_FRAME_CACHE_LOCAL_TTL = 300
+
 # Fields which managed users cannot change via Sentry UI. Username and password
 # cannot be changed by managed users. Optionally include 'email' and
 # 'name' in SENTRY_MANAGED_USER_FIELDS.
@@ -2358,6 +2398,14 @@ SYMBOLICATOR_POLL_TIMEOUT = 10
 # max number of second to wait between subsequent attempts.
 SYMBOLICATOR_MAX_RETRY_AFTER = 5
 
+# With the `symbolicate-event.async` option, `symbolicate_events` tasks wait
+# for symbolicator on an event loop instead of blocking the worker. These limit
+# how many events of one project are symbolicated at the same time, and how
+# many requests to symbolicator are made at the same time per task.
+SYMBOLICATOR_ASYNC_PROJECT_CONCURRENCY = 64
+SYMBOLICATOR_ASYNC_LOW_PRIORITY_PROJECT_CONCURRENCY = 8
+SYMBOLICATOR_ASYNC_MAX_REQUESTS = 32
+
 SENTRY_REQUEST_METRIC_ALLOWED_PATHS = (
     "sentry.web.api",
     "sentry.web.frontend",
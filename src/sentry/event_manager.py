@@ -655,12 +655,15 @@ def _get_or_create_release_many(jobs, projects):
         if old_datetime is None or new_datetime > old_datetime:
             release_date_added[release_key] = new_datetime
 
-    for (project_id, version), jobs_to_update in jobs_with_releases.items():
-        release = Release.get_or_create(
-            project=projects[project_id],
-            version=version,
-            date_added=release_date_added[(project_id, version)],
-        )
+    releases = Release.get_or_create_many(
+        {
+            (projects[project_id], version): date_added
+            for (project_id, version), date_added in release_date_added.items()
+        }
+    )
+
+    for release_key, jobs_to_update in jobs_with_releases.items():
+        release = releases[release_key]
 
         for job in jobs_to_update:
             # Don't allow a conflicting 'release' tag
@@ -680,10 +683,10 @@ def _get_or_create_release_many(jobs, projects):
 
 @metrics.wraps("save_event.get_event_user_many")
 def _get_event_user_many(jobs, projects):
-    for job in jobs:
-        data = job["data"]
-        user = _get_event_user(projects[job["project_id"]], data)
+    users = _get_event_users([(projects[job["project_id"]], job["data"]) for job in jobs])
 
+    for job, user in zip(jobs, users):
+        data = job["data"]
         if user:
             pop_tag(data, "user")
             set_tag(data, "sentry:user", user.tag_value)
@@ -751,10 +754,12 @@ def _materialize_metadata_many(jobs):
 
 @metrics.wraps("save_event.get_or_create_environment_many")
 def _get_or_create_environment_many(jobs, projects):
+    environments = Environment.get_or_create_many(
+        (projects[job["project_id"]], job["environment"]) for job in jobs
+    )
+
     for job in jobs:
-        job["environment"] = Environment.get_or_create(
-            project=projects[job["project_id"]], name=job["environment"]
-        )
+        job["environment"] = environments[(job["project_id"], job["environment"])]
 
 
 @metrics.wraps("save_event.get_or_create_release_associated_models")
@@ -783,12 +788,16 @@ def _get_or_create_release_associated_models(jobs, projects):
 @metrics.wraps("save_event.tsdb_record_all_metrics")
 def _tsdb_record_all_metrics(jobs):
     """
-    Do all tsdb-related things for save_event in here s.t. we can potentially
-    put everything in a single redis pipeline someday.
+    Do all tsdb-related things for save_event in here s.t. we can put
+    everything in a single redis pipeline (see `record_batch`).
     """
 
     # XXX: validate whether anybody actually uses those metrics
 
+    batch_incrs = []
+    batch_records = []
+    batch_frequencies = []
+
     for job in jobs:
         incrs = []
         frequencies = []
@@ -827,13 +836,15 @@ def _tsdb_record_all_metrics(jobs):
                 records.append((tsdb.models.users_affected_by_group, group.id, (user.tag_value,)))
 
         if incrs:
-            tsdb.incr_multi(incrs, timestamp=event.datetime, environment_id=environment.id)
+            batch_incrs.append((incrs, event.datetime, environment.id))
 
         if records:
-            tsdb.record_multi(records, timestamp=event.datetime, environment_id=environment.id)
+            batch_records.append((records, event.datetime, environment.id))
 
         if frequencies:
-            tsdb.record_frequency_multi(frequencies, timestamp=event.datetime)
+            batch_frequencies.append((frequencies, event.datetime, None))
+
+    tsdb.record_batch(incrs=batch_incrs, records=batch_records, frequencies=batch_frequencies)
 
 
 @metrics.wraps("save_event.nodestore_save_many")
@@ -911,19 +922,11 @@ def _get_event_instance(data, project_id):
     )
 
 
-def _get_event_user(project, data):
-    with metrics.timer("event_manager.get_event_user") as metrics_tags:
-        return _get_event_user_impl(project, data, metrics_tags)
-
-
-def _get_event_user_impl(project, data, metrics_tags):
+def _build_event_user(project, data):
     user_data = data.get("user")
     if not user_data:
-        metrics_tags["event_has_user"] = "false"
         return
 
-    metrics_tags["event_has_user"] = "true"
-
     ip_address = user_data.get("ip_address")
 
     if ip_address:
@@ -944,33 +947,106 @@ def _get_event_user_impl(project, data, metrics_tags):
     if not euser.hash:
         return
 
-    cache_key = f"euserid:1:{project.id}:{euser.hash}"
-    euser_id = cache.get(cache_key)
-    if euser_id is None:
-        metrics_tags["cache_hit"] = "false"
-
-        euser, created = EventUser.objects.get_or_create(
-            project_id=euser.project_id,
-            hash=euser.hash,
-            defaults={
-                "ident": euser.ident,
-                "email": euser.email,
-                "username": euser.username,
-                "ip_address": euser.ip_address,
-                "name": euser.name,
-            },
+    return euser
+
+
+def _get_event_users(projects_and_data):
+    """
+    Returns the `EventUser` for each ``(project, data)`` pair, or `None` if
+    the event has no user. Cached users are fetched in one round-trip and all
+    others with a single query, only users that do not exist yet are created
+    one by one.
+
+    Besides timing the batch, this emits the per-event
+    ``event_manager.get_event_user`` timing with the duration of the batch.
+    """
+    event_tags = [{} for _ in projects_and_data]
+    result = "failure"
+    start = time.monotonic()
+    try:
+        with metrics.timer("event_manager.get_event_users") as metrics_tags:
+            rv = _get_event_users_impl(projects_and_data, metrics_tags, event_tags)
+        result = "success"
+        return rv
+    finally:
+        duration = time.monotonic() - start
+        for tags in event_tags:
+            tags["result"] = result
+            metrics.timing("event_manager.get_event_user", duration, tags=tags)
+
+
+def _get_event_users_impl(projects_and_data, metrics_tags, event_tags):
+    eusers = [_build_event_user(project, data) for project, data in projects_and_data]
+    for (_, data), tags in zip(projects_and_data, event_tags):
+        tags["event_has_user"] = "true" if data.get("user") else "false"
+
+    cache_keys = {
+        (euser.project_id, euser.hash): f"euserid:1:{euser.project_id}:{euser.hash}"
+        for euser in eusers
+        if euser is not None
+    }
+    if not cache_keys:
+        return eusers
+
+    cached = cache.get_many(list(cache_keys.values()))
+    missing = {}
+    for euser in eusers:
+        if euser is not None and cache_keys[(euser.project_id, euser.hash)] not in cached:
+            missing[(euser.project_id, euser.hash)] = euser
+
+    metrics_tags["cache_hit"] = "false" if missing else "true"
+    for euser, tags in zip(eusers, event_tags):
+        if euser is not None:
+            key = (euser.project_id, euser.hash)
+            tags["cache_hit"] = "false" if key in missing else "true"
+    if not missing:
+        return eusers
+
+    existing = {
+        (euser.project_id, euser.hash): euser
+        for euser in EventUser.objects.filter(
+            project_id__in={project_id for project_id, _ in missing},
+            hash__in={euser_hash for _, euser_hash in missing},
         )
+    }
 
-        metrics_tags["created"] = str(created).lower()
+    resolved = {}
+    created_keys = set()
+    for key, euser in missing.items():
+        found = existing.get(key)
+        if found is None:
+            found, created = EventUser.objects.get_or_create(
+                project_id=euser.project_id,
+                hash=euser.hash,
+                defaults={
+                    "ident": euser.ident,
+                    "email": euser.email,
+                    "username": euser.username,
+                    "ip_address": euser.ip_address,
+                    "name": euser.name,
+                },
+            )
+        else:
+            created = False
 
-        if not created and user_data.get("name") and euser.name != user_data.get("name"):
-            euser.update(name=user_data["name"])
+        if created:
+            created_keys.add(key)
+        elif euser.name and found.name != euser.name:
+            found.update(name=euser.name)
 
-        cache.set(cache_key, euser.id, 3600)
-    else:
-        metrics_tags["cache_hit"] = "true"
+        resolved[key] = found
 
-    return euser
+    for euser, tags in zip(eusers, event_tags):
+        if euser is not None and (euser.project_id, euser.hash) in missing:
+            tags["created"] = str((euser.project_id, euser.hash) in created_keys).lower()
+
+    metrics.incr("event_manager.get_event_users.fetched", amount=len(existing))
+    cache.set_many({cache_keys[key]: euser.id for key, euser in resolved.items()}, 3600)
+
+    return [
+        None if euser is None else resolved.get((euser.project_id, euser.hash), euser)
+        for euser in eusers
+    ]
 
 
 def get_event_type(data):
@@ -366,7 +366,9 @@ class Event:
                 return rv
 
         # Create fresh hashes
-        flat_variants, hierarchical_variants = self.get_sorted_grouping_variants(force_config)
+        flat_variants, hierarchical_variants = self.get_sorted_grouping_variants(
+            force_config, hash_only=True
+        )
         flat_hashes, _ = self._hashes_from_sorted_grouping_variants(flat_variants)
         hierarchical_hashes, tree_labels = self._hashes_from_sorted_grouping_variants(
             hierarchical_variants
@@ -384,11 +386,11 @@ class Event:
             hashes=flat_hashes, hierarchical_hashes=hierarchical_hashes, tree_labels=tree_labels
         )
 
-    def get_sorted_grouping_variants(self, force_config=None):
+    def get_sorted_grouping_variants(self, force_config=None, hash_only=False):
         """Get grouping variants sorted into flat and hierarchical variants"""
         from sentry.grouping.api import sort_grouping_variants
 
-        variants = self.get_grouping_variants(force_config)
+        variants = self.get_grouping_variants(force_config, hash_only=hash_only)
         return sort_grouping_variants(variants)
 
     @staticmethod
@@ -427,7 +429,9 @@ class Event:
         # We have modified event data, so any cached interfaces have to be reset:
         self.__dict__.pop("interfaces", None)
 
-    def get_grouping_variants(self, force_config=None, normalize_stacktraces=False):
+    def get_grouping_variants(
+        self, force_config=None, normalize_stacktraces=False, hash_only=False
+    ):
         """
         This is similar to `get_hashes` but will instead return the
         grouping components for each variant in a dictionary.
@@ -436,6 +440,9 @@ class Event:
         modified for `in_app` in addition to event variants being created.  This
         means that after calling that function the event data has been modified
         in place.
+
+        If `hash_only` is set to `True` the components are only good for
+        calculating hashes, see `get_grouping_variants_for_event`.
         """
         from sentry.grouping.api import get_grouping_variants_for_event, load_grouping_config
 
@@ -467,7 +474,7 @@ class Event:
             span.set_tag("project", self.project_id)
             span.set_tag("event_id", self.event_id)
 
-            return get_grouping_variants_for_event(self, config)
+            return get_grouping_variants_for_event(self, config, hash_only=hash_only)
 
     def get_primary_hash(self):
         hashes = self.get_hashes()
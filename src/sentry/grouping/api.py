@@ -19,6 +19,7 @@ from sentry.grouping.variants import (
     FallbackVariant,
     SaltedComponentVariant,
 )
+from sentry.utils.lru import LRUCache
 from sentry.utils.safe import get_path
 
 HASH_RE = re.compile(r"^[0-9a-f]{32}$")
@@ -171,6 +172,10 @@ def load_default_grouping_config():
     return load_grouping_config(config_dict=None)
 
 
+# Compiled fingerprinting rules by config, shared between events in a worker
+_fingerprinting_rules_cache = LRUCache(max_weight=500)
+
+
 def get_fingerprinting_config_for_project(project):
     from sentry.grouping.fingerprinting import FingerprintingRules, InvalidFingerprintingConfig
 
@@ -182,15 +187,21 @@ def get_fingerprinting_config_for_project(project):
     from sentry.utils.hashlib import md5_text
 
     cache_key = "fingerprinting-rules:" + md5_text(rules).hexdigest()
+    rv = _fingerprinting_rules_cache.get(cache_key)
+    if rv is not None:
+        return rv
+
     rv = cache.get(cache_key)
     if rv is not None:
-        return FingerprintingRules.from_json(rv)
+        rv = FingerprintingRules.from_json(rv)
+    else:
+        try:
+            rv = FingerprintingRules.from_config_string(rules)
+        except InvalidFingerprintingConfig:
+            rv = FingerprintingRules([])
+        cache.set(cache_key, rv.to_json())
 
-    try:
-        rv = FingerprintingRules.from_config_string(rules)
-    except InvalidFingerprintingConfig:
-        rv = FingerprintingRules([])
-    cache.set(cache_key, rv.to_json())
+    _fingerprinting_rules_cache.set(cache_key, rv)
     return rv
 
 
@@ -249,8 +260,13 @@ def _get_calculated_grouping_variants_for_event(event, context):
     return rv
 
 
-def get_grouping_variants_for_event(event, config=None):
-    """Returns a dict of all grouping variants for this event."""
+def get_grouping_variants_for_event(event, config=None, hash_only=False):
+    """Returns a dict of all grouping variants for this event.
+
+    With ``hash_only`` the variants produce the same hashes, but their
+    components are not fully described (hints may be missing.)  This is
+    enough for ingestion, but not for displaying grouping information.
+    """
     # If a checksum is set the only variant that comes back from this
     # event is the checksum variant.
     checksum = event.data.get("checksum")
@@ -279,7 +295,7 @@ def get_grouping_variants_for_event(event, config=None):
 
     if config is None:
         config = load_default_grouping_config()
-    context = GroupingContext(config)
+    context = GroupingContext(config, hash_only=hash_only)
 
     # At this point we need to calculate the default event values.  If the
     # fingerprint is salted we will wrap it.
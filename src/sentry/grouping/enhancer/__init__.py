@@ -1,6 +1,7 @@
 import base64
 import os
 import zlib
+from functools import lru_cache
 
 import msgpack
 from parsimonious.exceptions import ParseError
@@ -16,8 +17,10 @@ from .matchers import (
     CalleeMatch,
     CallerMatch,
     ExceptionFieldMatch,
+    FamilyMatch,
     FrameMatch,
     Match,
+    MatchFrameMasks,
     create_match_frame,
 )
 
@@ -70,6 +73,12 @@ _        = space*
 VERSIONS = [1, 2]
 LATEST_VERSION = VERSIONS[-1]
 
+# Match frame fields written by modifier actions
+MODIFIED_MATCH_KEYS = frozenset(["app", "category"])
+
+# Number of deserialized enhancements kept in memory, keyed by their config
+LOADED_ENHANCEMENTS_CACHE_SIZE = 100
+
 
 class StacktraceState:
     def __init__(self):
@@ -115,36 +124,45 @@ class Enhancements:
 
         self._modifier_rules = [rule for rule in self.iter_rules() if rule.is_modifier]
         self._updater_rules = [rule for rule in self.iter_rules() if rule.is_updater]
+        self._hash_updater_rules = [
+            rule for rule in self._updater_rules if not rule.updates_hints_only
+        ]
 
     def apply_modifications_to_frame(self, frames, platform, exception_data):
         """This applies the frame modifications to the frames itself.  This
         does not affect grouping.
         """
 
-        cache = {}
-
         match_frames = [create_match_frame(frame, platform) for frame in frames]
+        masks = MatchFrameMasks(match_frames, platform, exception_data)
 
         for rule in self._modifier_rules:
-            for idx, action in rule.get_matching_frame_actions(
-                match_frames, platform, exception_data, cache
-            ):
+            actions = rule.get_matching_frame_actions(match_frames, platform, masks=masks)
+            for idx, action in actions:
                 action.apply_modifications_to_frame(frames, match_frames, idx, rule=rule)
+            if actions:
+                # Later rules have to see the modified frames
+                masks.invalidate(MODIFIED_MATCH_KEYS)
 
-    def update_frame_components_contributions(self, components, frames, platform, exception_data):
-
-        cache = {}
+    def update_frame_components_contributions(
+        self, components, frames, platform, exception_data, hash_only=False
+    ):
+        """With ``hash_only`` only the contributions of the components are
+        updated, rules that only add hints are skipped and hints do not
+        describe the rule that set them.
+        """
 
         match_frames = [create_match_frame(frame, platform) for frame in frames]
+        masks = MatchFrameMasks(match_frames, platform, exception_data)
 
         stacktrace_state = StacktraceState()
         # Apply direct frame actions and update the stack state alongside
-        for rule in self._updater_rules:
+        for rule in self._hash_updater_rules if hash_only else self._updater_rules:
 
-            for idx, action in rule.get_matching_frame_actions(
-                match_frames, platform, exception_data, cache
-            ):
-                action.update_frame_components_contributions(components, frames, idx, rule=rule)
+            for idx, action in rule.get_matching_frame_actions(match_frames, platform, masks=masks):
+                action.update_frame_components_contributions(
+                    components, frames, idx, rule=None if hash_only else rule
+                )
                 action.modify_stacktrace_state(stacktrace_state, rule)
 
         # Use the stack state to update frame contributions again to trim
@@ -164,13 +182,14 @@ class Enhancements:
                     max_frames,
                     "frames are" if max_frames != 1 else "frame is",
                 )
-                hint = stacktrace_state.add_to_hint(hint, var="max-frames")
+                if not hash_only:
+                    hint = stacktrace_state.add_to_hint(hint, var="max-frames")
                 component.update(hint=hint, contributes=False)
 
         return stacktrace_state
 
     def assemble_stacktrace_component(
-        self, components, frames, platform, exception_data=None, **kw
+        self, components, frames, platform, exception_data=None, hash_only=False, **kw
     ):
         """This assembles a stacktrace grouping component out of the given
         frame components and source frames.  Internally this invokes the
@@ -180,7 +199,7 @@ class Enhancements:
         hint = None
         contributes = None
         stacktrace_state = self.update_frame_components_contributions(
-            components, frames, platform, exception_data
+            components, frames, platform, exception_data, hash_only=hash_only
         )
 
         min_frames = stacktrace_state.get("min-frames")
@@ -192,7 +211,8 @@ class Enhancements:
                     "frame%s which is under the configured threshold"
                     % (total_contributes, "s" if total_contributes != 1 else "")
                 )
-                hint = stacktrace_state.add_to_hint(hint, var="min-frames")
+                if not hash_only:
+                    hint = stacktrace_state.add_to_hint(hint, var="min-frames")
                 contributes = False
 
         inverted_hierarchy = stacktrace_state.get("invert-stacktrace")
@@ -249,8 +269,18 @@ class Enhancements:
 
     @classmethod
     def loads(cls, data):
+        """
+        Deserializes enhancements. Loaded enhancements are immutable, so they
+        are cached in memory and shared between all events using the same
+        config.
+        """
         if isinstance(data, str):
             data = data.encode("ascii", "ignore")
+        return cls._loads(data)
+
+    @classmethod
+    @lru_cache(maxsize=LOADED_ENHANCEMENTS_CACHE_SIZE)
+    def _loads(cls, data):
         padded = data + b"=" * (4 - (len(data) % 4))
         try:
             return cls._from_config_structure(
@@ -279,15 +309,30 @@ class Rule:
 
         self._exception_matchers = []
         self._other_matchers = []
+        # The frame families this rule can match at all, `None` for any
+        self._families = None
         for matcher in matchers:
             if isinstance(matcher, ExceptionFieldMatch):
                 self._exception_matchers.append(matcher)
             else:
                 self._other_matchers.append(matcher)
 
+            if (
+                isinstance(matcher, FamilyMatch)
+                and not matcher.negated
+                and b"all" not in matcher._flags
+            ):
+                if self._families is None:
+                    self._families = frozenset(matcher._flags)
+                else:
+                    self._families &= matcher._flags
+
         self.actions = actions
         self._is_updater = any(action.is_updater for action in actions)
         self._is_modifier = any(action.is_modifier for action in actions)
+        self._updates_hints_only = all(
+            action.updates_hints_only for action in actions if action.is_updater
+        )
 
     @property
     def matcher_description(self):
@@ -306,32 +351,51 @@ class Rule:
         """Does this rule update grouping components?"""
         return self._is_updater
 
+    @property
+    def updates_hints_only(self):
+        """Does this rule only update the hints of grouping components?"""
+        return self._updates_hints_only
+
     def as_dict(self):
         matchers = {}
         for matcher in self.matchers:
             matchers[matcher.key] = matcher.pattern
         return {"match": matchers, "actions": [str(x) for x in self.actions]}
 
-    def get_matching_frame_actions(self, frames, platform, exception_data=None, cache=None):
+    def get_matching_frame_actions(
+        self, frames, platform, exception_data=None, cache=None, masks=None
+    ):
         """Given a frame returns all the matching actions based on this rule.
         If the rule does not match `None` is returned.
+
+        ``masks`` holds the matcher results for ``frames`` and can be shared
+        by all rules evaluated against the same stack trace.
         """
-        if not self.matchers:
+        if not self.matchers or not frames:
             return []
 
-        # 1 - Check if exception matchers match
+        if masks is None:
+            masks = MatchFrameMasks(frames, platform, exception_data, cache)
+
+        # 1 - Skip rules for families not present in the stack trace
+        if self._families is not None and masks.families.isdisjoint(self._families):
+            return []
+
+        # 2 - Check if exception matchers match
         for m in self._exception_matchers:
-            if not m.matches_frame(frames, -1, platform, exception_data, cache):
+            if not masks.matches_exception(m):
                 return []
 
-        rv = []
+        # 3 - Check if frame matchers match
+        matching = masks.all_frames
+        for m in self._other_matchers:
+            matching &= masks.get(m)
+            if not matching:
+                return []
 
-        # 2 - Check if frame matchers match
-        for idx, frame in enumerate(frames):
-            if all(
-                m.matches_frame(frames, idx, platform, exception_data, cache)
-                for m in self._other_matchers
-            ):
+        rv = []
+        for idx in range(len(frames)):
+            if matching >> idx & 1:
                 for action in self.actions:
                     rv.append((idx, action))
 
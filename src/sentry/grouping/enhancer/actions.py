@@ -27,6 +27,8 @@ class Action:
 
     is_modifier = False
     is_updater = False
+    # Whether updating grouping components only changes their hints
+    updates_hints_only = False
 
     def apply_modifications_to_frame(self, frames, match_frames, idx, rule=None):
         pass
@@ -60,6 +62,7 @@ class FlagAction(Action):
         self.key = key
         self._is_updater = key in {"group", "app", "prefix", "sentinel"}
         self._is_modifier = key == "app"
+        self.updates_hints_only = key == "app"
         self.flag = flag
         self.range = range
 
@@ -318,3 +318,61 @@ class CalleeMatch(Match):
         return idx < len(frames) - 1 and self.caller.matches_frame(
             frames, idx + 1, platform, exception_data, cache
         )
+
+
+class MatchFrameMasks:
+    """
+    Evaluates matchers against all frames of a stack trace at once.
+
+    The result for every matcher is memoized as a bitmask in which bit ``idx``
+    is set if the matcher matches frame ``idx``. Frame matchers are interned
+    by ``FrameMatch.from_key``, so rules sharing a matcher (which is common
+    between the enhancement bases and custom rules) evaluate it only once per
+    stack trace, and a rule is matched by combining the masks of its matchers.
+    """
+
+    def __init__(self, frames, platform, exception_data=None, cache=None):
+        self.frames = frames
+        self.platform = platform
+        self.exception_data = exception_data
+        self.cache = {} if cache is None else cache
+        self.all_frames = (1 << len(frames)) - 1
+        self.families = {frame["family"] for frame in frames}
+        self._masks = {}
+        self._exception_matches = {}
+
+    def get(self, matcher):
+        mask = self._masks.get(matcher)
+        if mask is None:
+            if isinstance(matcher, CallerMatch):
+                mask = (self.get(matcher.caller) << 1) & self.all_frames
+            elif isinstance(matcher, CalleeMatch):
+                mask = self.get(matcher.caller) >> 1
+            else:
+                mask = 0
+                for idx in range(len(self.frames)):
+                    if matcher.matches_frame(
+                        self.frames, idx, self.platform, self.exception_data, self.cache
+                    ):
+                        mask |= 1 << idx
+            self._masks[matcher] = mask
+        return mask
+
+    def matches_exception(self, matcher):
+        rv = self._exception_matches.get(matcher)
+        if rv is None:
+            rv = self._exception_matches[matcher] = matcher.matches_frame(
+                self.frames, -1, self.platform, self.exception_data, self.cache
+            )
+        return rv
+
+    def invalidate(self, keys):
+        """
+        Forgets the masks of all matchers on ``keys``, which must be called
+        after modifying these fields of the match frames.
+        """
+        self._masks = {
+            matcher: mask
+            for matcher, mask in self._masks.items()
+            if getattr(matcher, "caller", matcher).key not in keys
+        }
@@ -1,4 +1,5 @@
 import inspect
+import re
 
 from parsimonious.exceptions import ParseError
 from parsimonious.grammar import Grammar, NodeVisitor
@@ -184,6 +185,21 @@ class FingerprintingRules:
         self.rules = rules
         self.changelog = changelog
 
+        # Rules that can only match a single value of some field are indexed
+        # by that value, so that for every event only the rules that can
+        # possibly match have to be evaluated.
+        self._unanchored_rules = []
+        self._anchored_rules = {}
+        for idx, rule in enumerate(rules):
+            anchor = rule.anchor
+            if anchor is None:
+                self._unanchored_rules.append(idx)
+            else:
+                match_group, key, value = anchor
+                self._anchored_rules.setdefault((match_group, key), {}).setdefault(
+                    value, []
+                ).append(idx)
+
     def iter_rules(self):
         return iter(self.rules)
 
@@ -191,11 +207,25 @@ class FingerprintingRules:
         if not self.rules:
             return
         access = EventAccess(event)
-        for rule in self.iter_rules():
+        for rule in self._iter_candidate_rules(access):
             new_values = rule.get_fingerprint_values_for_event_access(access)
             if new_values is not None:
                 return (rule,) + new_values
 
+    def _iter_candidate_rules(self, access):
+        """
+        Yields the rules that might match the event, in order.
+        """
+        if not self._anchored_rules:
+            return self.iter_rules()
+
+        candidates = list(self._unanchored_rules)
+        for (match_group, key), rules_by_value in self._anchored_rules.items():
+            for values in access.get_values(match_group):
+                candidates.extend(rules_by_value.get(values.get(key), ()))
+
+        return (self.rules[idx] for idx in sorted(set(candidates)))
+
     @classmethod
     def _from_config_structure(cls, data):
         version = data["version"]
@@ -253,6 +283,11 @@ MATCHERS = {
     "app": "app",
 }
 
+# Keys that are matched case-sensitively and without path normalization, a
+# pattern without glob syntax therefore only matches the exact same value.
+LITERAL_MATCH_KEYS = frozenset(["type", "module", "function", "logger"])
+_glob_syntax_re = re.compile(r"[*?\[\]{}\\!]")
+
 
 class Match:
     def __init__(self, key, pattern, negated=False):
@@ -278,6 +313,18 @@ class Match:
             return "tags"
         return "frames"
 
+    @property
+    def literal_value(self):
+        """
+        The only value this matcher can match, or `None` if it can match more
+        than one.
+        """
+        if self.negated or _glob_syntax_re.search(self.pattern):
+            return None
+        if self.key in LITERAL_MATCH_KEYS or self.key.startswith("tags."):
+            return self.pattern
+        return None
+
     def matches(self, values):
         rv = self._positive_match(values)
         if self.negated:
@@ -364,12 +411,23 @@ class Rule:
         self.fingerprint = fingerprint
         self.attributes = attributes
 
-    def get_fingerprint_values_for_event_access(self, access):
-        by_match_group = {}
+        self._matchers_by_group = {}
+        for matcher in matchers:
+            self._matchers_by_group.setdefault(matcher.match_group, []).append(matcher)
+
+    @property
+    def anchor(self):
+        """
+        A ``(match_group, key, value)`` tuple if the rule can only match
+        events where ``key`` has ``value`` in ``match_group``.
+        """
         for matcher in self.matchers:
-            by_match_group.setdefault(matcher.match_group, []).append(matcher)
+            value = matcher.literal_value
+            if value is not None:
+                return matcher.match_group, matcher.key, value
 
-        for match_group, matchers in by_match_group.items():
+    def get_fingerprint_values_for_event_access(self, access):
+        for match_group, matchers in self._matchers_by_group.items():
             for values in access.get_values(match_group):
                 if all(x.matches(values) for x in matchers):
                     break
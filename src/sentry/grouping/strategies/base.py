@@ -94,11 +94,14 @@ def strategy(
 
 
 class GroupingContext:
-    def __init__(self, strategy_config: "StrategyConfiguration"):
+    def __init__(self, strategy_config: "StrategyConfiguration", hash_only: bool = False):
         self._stack = [strategy_config.initial_context]
         self.config = strategy_config
         self.push()
         self["variant"] = None
+        # Only the hashes of the components are going to be used, strategies
+        # may skip work that only serves to describe them.
+        self["hash_only"] = hash_only
 
     def __setitem__(self, key: str, value: ContextValue) -> None:
         self._stack[-1][key] = value
@@ -461,7 +461,7 @@ def stacktrace_legacy(
         prev_frame = frame
 
     rv, _ = context.config.enhancements.assemble_stacktrace_component(
-        values, frames_for_filtering, event.platform
+        values, frames_for_filtering, event.platform, hash_only=context["hash_only"]
     )
     rv.update(contributes=contributes, hint=hint)
     return {variant: rv}
@@ -522,6 +522,7 @@ def _single_stacktrace_variant(
         frames_for_filtering,
         event.platform,
         exception_data=context["exception_data"],
+        hash_only=context["hash_only"],
         similarity_self_encoder=_stacktrace_encoder,
     )
 
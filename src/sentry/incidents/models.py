@@ -85,6 +85,29 @@ class IncidentManager(BaseManager):
 
         return incident
 
+    def get_active_incidents(self, alert_rule_projects):
+        """
+        Bulk version of `get_active_incident`. Takes `(alert_rule, project)` pairs and
+        returns a dict of `(alert_rule_id, project_id)` to the active incident or None,
+        with a single cache round trip for all pairs.
+        """
+        cache_keys = {
+            self._build_active_incident_cache_key(alert_rule.id, project.id): (
+                alert_rule,
+                project,
+            )
+            for alert_rule, project in alert_rule_projects
+        }
+        cached = cache.get_many(list(cache_keys))
+
+        result = {}
+        for cache_key, (alert_rule, project) in cache_keys.items():
+            incident = cached.get(cache_key)
+            if incident is None:
+                incident = self.get_active_incident(alert_rule, project)
+            result[(alert_rule.id, project.id)] = incident or None
+        return result
+
     @classmethod
     def clear_active_incident_cache(cls, instance, **kwargs):
         for project in instance.projects.all():
@@ -316,6 +339,41 @@ class AlertRuleManager(BaseManager):
 
         return alert_rule
 
+    def get_for_subscriptions(self, subscriptions):
+        """
+        Bulk version of `get_for_subscription`. Returns a dict of subscription id to
+        AlertRule, subscriptions without an alert rule are left out.
+        """
+        cache_keys = {
+            self.__build_subscription_cache_key(subscription.id): subscription
+            for subscription in subscriptions
+        }
+        result = {}
+        missing = []
+        for cache_key, alert_rule in cache.get_many(list(cache_keys)).items():
+            if alert_rule is not None:
+                result[cache_keys[cache_key].id] = alert_rule
+        for subscription in cache_keys.values():
+            if subscription.id not in result:
+                missing.append(subscription)
+
+        if missing:
+            alert_rules = {
+                alert_rule.snuba_query_id: alert_rule
+                for alert_rule in self.filter(
+                    snuba_query_id__in={subscription.snuba_query_id for subscription in missing}
+                )
+            }
+            to_cache = {}
+            for subscription in missing:
+                alert_rule = alert_rules.get(subscription.snuba_query_id)
+                if alert_rule is not None:
+                    result[subscription.id] = alert_rule
+                    to_cache[self.__build_subscription_cache_key(subscription.id)] = alert_rule
+            cache.set_many(to_cache, 3600)
+
+        return result
+
     @classmethod
     def clear_subscription_cache(cls, instance, **kwargs):
         cache.delete(cls.__build_subscription_cache_key(instance.id))
@@ -461,6 +519,37 @@ class AlertRuleTriggerManager(BaseManager):
             cache.set(cache_key, triggers, 3600)
         return triggers
 
+    def get_for_alert_rules(self, alert_rules):
+        """
+        Bulk version of `get_for_alert_rule`. Returns a dict of alert rule id to the
+        list of its AlertRuleTriggers.
+        """
+        cache_keys = {
+            self._build_trigger_cache_key(alert_rule.id): alert_rule.id
+            for alert_rule in alert_rules
+        }
+        result = {}
+        for cache_key, triggers in cache.get_many(list(cache_keys)).items():
+            if triggers is not None:
+                result[cache_keys[cache_key]] = triggers
+
+        missing = [
+            alert_rule_id for alert_rule_id in cache_keys.values() if alert_rule_id not in result
+        ]
+        if missing:
+            for alert_rule_id in missing:
+                result[alert_rule_id] = []
+            for trigger in AlertRuleTrigger.objects.filter(alert_rule_id__in=missing):
+                result[trigger.alert_rule_id].append(trigger)
+            cache.set_many(
+                {
+                    self._build_trigger_cache_key(alert_rule_id): result[alert_rule_id]
+                    for alert_rule_id in missing
+                },
+                3600,
+            )
+        return result
+
     @classmethod
     def clear_trigger_cache(cls, instance, **kwargs):
         cache.delete(cls._build_trigger_cache_key(instance.alert_rule_id))
@@ -1,11 +1,13 @@
 import logging
 import operator
+from contextlib import contextmanager
 from copy import deepcopy
 from datetime import timedelta
 from typing import Optional
 
 from django.conf import settings
 from django.db import transaction
+from django.db.models import prefetch_related_objects
 
 from sentry import features
 from sentry.constants import CRASH_RATE_ALERT_AGGREGATE_ALIAS, CRASH_RATE_ALERT_SESSION_COUNT_ALIAS
@@ -52,6 +54,10 @@ ALERT_RULE_TRIGGER_STAT_KEYS = ("alert_triggered", "resolve_triggered")
 #  functionality, then maybe we should move this to constants
 CRASH_RATE_ALERT_MINIMUM_THRESHOLD: Optional[int] = None
 
+# The `SubscriptionBatch` of the updates currently being processed, see
+# `subscription_batch`
+_current_batch = None
+
 
 class SubscriptionProcessor:
     """
@@ -69,33 +75,56 @@ class SubscriptionProcessor:
 
     def __init__(self, subscription):
         self.subscription = subscription
+        self.batch = _current_batch
+        if self.batch is not None and subscription.id not in self.batch.subscription_ids:
+            self.batch = None
+
         try:
-            self.alert_rule = AlertRule.objects.get_for_subscription(subscription)
+            if self.batch is not None:
+                self.alert_rule = self.batch.get_alert_rule(subscription)
+            else:
+                self.alert_rule = AlertRule.objects.get_for_subscription(subscription)
         except AlertRule.DoesNotExist:
             return
 
-        self.triggers = AlertRuleTrigger.objects.get_for_alert_rule(self.alert_rule)
+        if self.batch is not None:
+            self.triggers = self.batch.get_triggers(self.alert_rule)
+        else:
+            self.triggers = AlertRuleTrigger.objects.get_for_alert_rule(self.alert_rule)
         self.triggers.sort(key=lambda trigger: trigger.alert_threshold)
 
+        if self.batch is not None:
+            stats = self.batch.get_alert_rule_stats(self.alert_rule, subscription, self.triggers)
+        else:
+            stats = get_alert_rule_stats(self.alert_rule, subscription, self.triggers)
         (
             self.last_update,
             self.trigger_alert_counts,
             self.trigger_resolve_counts,
-        ) = get_alert_rule_stats(self.alert_rule, self.subscription, self.triggers)
+        ) = stats
         self.orig_trigger_alert_counts = deepcopy(self.trigger_alert_counts)
         self.orig_trigger_resolve_counts = deepcopy(self.trigger_resolve_counts)
 
     @property
     def active_incident(self):
         if not hasattr(self, "_active_incident"):
-            self._active_incident = Incident.objects.get_active_incident(
-                self.alert_rule, self.subscription.project
-            )
+            if self.batch is not None:
+                self._active_incident = self.batch.get_active_incident(
+                    self.alert_rule, self.subscription.project
+                )
+            else:
+                self._active_incident = Incident.objects.get_active_incident(
+                    self.alert_rule, self.subscription.project
+                )
         return self._active_incident
 
     @active_incident.setter
     def active_incident(self, active_incident):
         self._active_incident = active_incident
+        if self.batch is not None:
+            self.batch.set_active_incident(
+                self.alert_rule, self.subscription.project, active_incident
+            )
 
     @property
     def incident_triggers(self):
@@ -604,7 +633,11 @@ class SubscriptionProcessor:
             if alert_count != self.orig_trigger_resolve_counts[trigger_id]
         }
 
-        update_alert_rule_stats(
+        if self.batch is not None:
+            update_stats = self.batch.update_alert_rule_stats
+        else:
+            update_stats = update_alert_rule_stats
+        update_stats(
             self.alert_rule,
             self.subscription,
             self.last_update,
@@ -667,6 +700,10 @@ def get_alert_rule_stats(alert_rule, subscription, triggers):
     alert_rule_keys = build_alert_rule_stat_keys(alert_rule, subscription)
     trigger_keys = build_trigger_stat_keys(alert_rule, subscription, triggers)
     results = get_redis_client().mget(alert_rule_keys + trigger_keys)
+    return _parse_alert_rule_stats(results, triggers)
+
+
+def _parse_alert_rule_stats(results, triggers):
     results = tuple(0 if result is None else int(result) for result in results)
     last_update = to_datetime(results[0])
     trigger_results = results[1:]
@@ -686,7 +723,15 @@ def update_alert_rule_stats(alert_rule, subscription, last_update, alert_counts,
     Updates stats about the alert rule, subscription and triggers if they've changed.
     """
     pipeline = get_redis_client().pipeline()
+    _set_alert_rule_stats(
+        pipeline, alert_rule, subscription, last_update, alert_counts, resolve_counts
+    )
+    pipeline.execute()
 
+
+def _set_alert_rule_stats(
+    pipeline, alert_rule, subscription, last_update, alert_counts, resolve_counts
+):
     counts_with_stat_keys = zip(ALERT_RULE_TRIGGER_STAT_KEYS, (alert_counts, resolve_counts))
     for stat_key, trigger_counts in counts_with_stat_keys:
         for trigger_id, alert_count in trigger_counts.items():
@@ -700,9 +745,138 @@ def update_alert_rule_stats(alert_rule, subscription, last_update, alert_counts,
 
     last_update_key = build_alert_rule_stat_keys(alert_rule, subscription)[0]
     pipeline.set(last_update_key, int(to_timestamp(last_update)), ex=REDIS_TTL)
-    pipeline.execute()
 
 
 def get_redis_client():
     cluster_key = getattr(settings, "SENTRY_INCIDENT_RULES_REDIS_CLUSTER", "default")
     return redis.redis_clusters.get(cluster_key)
+
+
+class SubscriptionBatch:
+    """
+    Holds the state `SubscriptionProcessor` needs for a batch of subscription updates.
+    Alert rules, triggers, active incidents and trigger stats of all the subscriptions
+    are fetched in bulk up front and kept for the rest of the batch, and stat writes
+    are buffered until `flush` writes them with a single Redis pipeline.
+    """
+
+    def __init__(self, subscriptions):
+        self.subscription_ids = {subscription.id for subscription in subscriptions}
+        self.stats = {}
+        self.pending_stats = {}
+        prefetch_related_objects(subscriptions, "project")
+
+        self.alert_rules = alert_rules = AlertRule.objects.get_for_subscriptions(subscriptions)
+        self.triggers = triggers = AlertRuleTrigger.objects.get_for_alert_rules(
+            alert_rules.values()
+        )
+
+        pairs = [
+            (alert_rules[subscription.id], subscription)
+            for subscription in subscriptions
+            if subscription.id in alert_rules
+        ]
+        self.active_incidents = Incident.objects.get_active_incidents(
+            [(alert_rule, subscription.project) for alert_rule, subscription in pairs]
+        )
+
+        # Every subscription needs its own MGET as the keys of different alert rules and
+        # projects can live on different nodes, but a pipeline sends them all at once.
+        pipeline = get_redis_client().pipeline()
+        for alert_rule, subscription in pairs:
+            pipeline.mget(
+                build_alert_rule_stat_keys(alert_rule, subscription)
+                + build_trigger_stat_keys(alert_rule, subscription, triggers[alert_rule.id])
+            )
+        for (alert_rule, subscription), results in zip(pairs, pipeline.execute()):
+            self.stats[(alert_rule.id, subscription.project_id)] = _parse_alert_rule_stats(
+                results, triggers[alert_rule.id]
+            )
+
+    def get_alert_rule(self, subscription):
+        alert_rule = self.alert_rules.get(subscription.id)
+        if alert_rule is None:
+            # Raises `AlertRule.DoesNotExist` for subscriptions without an alert rule
+            alert_rule = AlertRule.objects.get_for_subscription(subscription)
+            self.alert_rules[subscription.id] = alert_rule
+        return alert_rule
+
+    def get_triggers(self, alert_rule):
+        triggers = self.triggers.get(alert_rule.id)
+        if triggers is None:
+            triggers = AlertRuleTrigger.objects.get_for_alert_rule(alert_rule)
+            self.triggers[alert_rule.id] = triggers
+        # Processors sort their triggers in place
+        return list(triggers)
+
+    def get_alert_rule_stats(self, alert_rule, subscription, triggers):
+        stats = self.stats.get((alert_rule.id, subscription.project_id))
+        if stats is None or set(stats[1]) != {trigger.id for trigger in triggers}:
+            # The alert rule or its triggers changed since the batch was fetched
+            return get_alert_rule_stats(alert_rule, subscription, triggers)
+
+        last_update, alert_counts, resolve_counts = stats
+        return last_update, dict(alert_counts), dict(resolve_counts)
+
+    def update_alert_rule_stats(
+        self, alert_rule, subscription, last_update, alert_counts, resolve_counts
+    ):
+        key = (alert_rule.id, subscription.project_id)
+        stats = self.stats.get(key)
+        if stats is not None:
+            stats[1].update(alert_counts)
+            stats[2].update(resolve_counts)
+            self.stats[key] = (last_update, stats[1], stats[2])
+
+        if key in self.pending_stats:
+            _, _, _, pending_alert_counts, pending_resolve_counts = self.pending_stats[key]
+            alert_counts = {**pending_alert_counts, **alert_counts}
+            resolve_counts = {**pending_resolve_counts, **resolve_counts}
+        self.pending_stats[key] = (
+            alert_rule,
+            subscription,
+            last_update,
+            alert_counts,
+            resolve_counts,
+        )
+
+    def get_active_incident(self, alert_rule, project):
+        key = (alert_rule.id, project.id)
+        if key not in self.active_incidents:
+            self.active_incidents[key] = Incident.objects.get_active_incident(alert_rule, project)
+        return self.active_incidents[key]
+
+    def set_active_incident(self, alert_rule, project, incident):
+        self.active_incidents[(alert_rule.id, project.id)] = incident
+
+    def flush(self):
+        if not self.pending_stats:
+            return
+
+        pipeline = get_redis_client().pipeline()
+        for args in self.pending_stats.values():
+            _set_alert_rule_stats(pipeline, *args)
+        pipeline.execute()
+        self.pending_stats = {}
+
+
+@contextmanager
+def subscription_batch(subscriptions):
+    """
+    Makes the `SubscriptionProcessor`s created for `subscriptions` use a shared
+    `SubscriptionBatch` and writes their stats back once the batch is done.
+    """
+    global _current_batch
+
+    with metrics.timer("incidents.subscription_processor.fetch_batch"):
+        batch = SubscriptionBatch(subscriptions)
+    _current_batch = batch
+    try:
+        yield batch
+    finally:
+        _current_batch = None
+        with metrics.timer("incidents.subscription_processor.flush_batch"):
+            try:
+                batch.flush()
+            except Exception:
+                logger.exception("Failed to write alert rule stats of subscription batch")
@@ -17,7 +17,10 @@ from sentry.incidents.models import (
 )
 from sentry.models import Project
 from sentry.snuba.models import QueryDatasets
-from sentry.snuba.query_subscription_consumer import register_subscriber
+from sentry.snuba.query_subscription_consumer import (
+    register_subscriber,
+    register_subscriber_batch_context,
+)
 from sentry.tasks.base import instrumented_task
 from sentry.utils import metrics
 from sentry.utils.email import MessageBuilder
@@ -148,6 +151,18 @@ def handle_snuba_query_update(subscription_update, subscription):
         SubscriptionProcessor(subscription).process_update(subscription_update)
 
 
+@register_subscriber_batch_context(INCIDENTS_SNUBA_SUBSCRIPTION_TYPE)
+def snuba_query_update_batch(subscriptions):
+    """
+    Fetches the alert rule state of a batch of `QuerySubscription`s at once when the
+    subscription consumer runs in batched mode.
+    :param subscriptions: The `QuerySubscription`s that the batch has updates for
+    """
+    from sentry.incidents.subscription_processor import subscription_batch
+
+    return subscription_batch(subscriptions)
+
+
 @instrumented_task(
     name="sentry.incidents.tasks.handle_trigger_action",
     queue="incidents",
@@ -1,8 +1,16 @@
 import functools
 import logging
+import multiprocessing
 import random
 import time
-from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from collections import defaultdict
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
 from typing import (
     Any,
     Callable,
@@ -32,6 +40,7 @@ from sentry.killswitches import killswitch_matches_context
 from sentry.models import Project
 from sentry.signals import event_accepted
 from sentry.tasks.store import preprocess_event, save_event_transaction
+from sentry.tasks.symbolication import symbolicate_batch
 from sentry.utils import json, metrics
 from sentry.utils.batching_kafka_consumer import AbstractBatchWorker
 from sentry.utils.cache import cache_key_for_event
@@ -57,8 +66,30 @@ Message = Any
 
 
 class IngestConsumerWorker(AbstractBatchWorker):
-    def __init__(self, process_event_executor: Optional[ThreadPoolExecutor] = None) -> None:
+    """
+    Processes batches of ingest messages.
+
+    By default messages are processed one after another on the consumer
+    thread, with only the event cache writes optionally dispatched to
+    ``process_event_executor``.
+
+    With ``project_executor``, each batch is partitioned by project instead
+    and the partitions are processed concurrently (see
+    ``process_project_messages``). Messages of one project keep their order,
+    and the batch (and therefore its offsets) is only completed once all
+    partitions are done. The two executors cannot be combined.
+    """
+
+    def __init__(
+        self,
+        process_event_executor: Optional[ThreadPoolExecutor] = None,
+        project_executor: Optional[Executor] = None,
+    ) -> None:
+        if process_event_executor is not None and project_executor is not None:
+            raise ValueError("Cannot process events asynchronously when processing by project")
+
         self.__process_event_executor = process_event_executor
+        self.__project_executor = project_executor
         if self.__process_event_executor is None:
             self.__process_event = process_event
         else:
@@ -76,6 +107,10 @@ class IngestConsumerWorker(AbstractBatchWorker):
             return self._flush_batch(batch)
 
     def _flush_batch(self, batch: Sequence[Message]):
+        if self.__project_executor is not None:
+            self._flush_batch_by_project(batch)
+            return
+
         attachment_chunks = []
 
         # Processing functions may be either synchronous or asynchronous.
@@ -125,7 +160,8 @@ class IngestConsumerWorker(AbstractBatchWorker):
                     process_attachment_chunk(attachment_chunk, projects=projects)
 
         if other_messages:
-            with metrics.timer("ingest_consumer.process_other_messages_batch"):
+            # Native events of the batch that need symbolication are submitted together
+            with metrics.timer("ingest_consumer.process_other_messages_batch"), symbolicate_batch():
                 other_messages_flush_start = time.monotonic()
 
                 # Keep a mapping of futures to their metadata so that we can
@@ -148,9 +184,42 @@ class IngestConsumerWorker(AbstractBatchWorker):
                     (time.monotonic() - other_messages_flush_start) / len(other_messages),
                 )
 
+    def _flush_batch_by_project(self, batch: Sequence[Message]) -> None:
+        messages_by_project: MutableMapping[int, MutableSequence[Message]] = defaultdict(list)
+        for message in batch:
+            message_type = message["type"]
+            if message_type not in ("event", "attachment_chunk", "attachment", "user_report"):
+                raise ValueError(f"Unknown message type: {message_type}")
+            messages_by_project[int(message["project_id"])].append(message)
+            metrics.incr("ingest_consumer.flush.messages_seen", tags={"message_type": message_type})
+
+        with metrics.timer("ingest_consumer.fetch_projects"):
+            projects = {
+                p.id: p for p in Project.objects.get_many_from_cache(list(messages_by_project))
+            }
+
+        with metrics.timer("ingest_consumer.process_project_batches"):
+            futures = [
+                self.__project_executor.submit(
+                    process_project_messages,
+                    messages,
+                    {project_id: projects[project_id]} if project_id in projects else {},
+                )
+                for project_id, messages in messages_by_project.items()
+            ]
+
+            # Re-raise the first failure, which fails the whole batch so its
+            # offsets are not committed.
+            for future in as_completed(futures):
+                future.result()
+
+        metrics.timing("ingest_consumer.process_project_batches.projects", len(futures))
+
     def shutdown(self):
         if self.__process_event_executor is not None:
             self.__process_event_executor.shutdown()
+        if self.__project_executor is not None:
+            self.__project_executor.shutdown()
 
 
 def trace_func(**span_kwargs):
@@ -421,15 +490,71 @@ def process_userreport(message, projects) -> None:
         return False
 
 
+def process_project_messages(messages: Sequence[Message], projects: Mapping[int, Project]) -> None:
+    """
+    Processes the messages of a single project in order. Attachment chunks
+    are stored before everything else since events and attachments of the same
+    batch read them.
+    """
+    for message in messages:
+        if message["type"] == "attachment_chunk":
+            process_attachment_chunk(message, projects=projects)
+
+    with symbolicate_batch():
+        for message in messages:
+            message_type = message["type"]
+            if message_type == "event":
+                process_event(message, projects)
+            elif message_type == "attachment":
+                process_individual_attachment(message, projects)
+            elif message_type == "user_report":
+                process_userreport(message, projects)
+
+
+def initializer() -> None:
+    from sentry.runner import configure
+
+    configure()
+
+
+def get_project_executor(concurrency: int, mode: str = "thread") -> Executor:
+    """
+    Creates the executor used to process the projects of a batch
+    concurrently. Processes are started with a fresh interpreter so that no
+    database or cache connections are shared with the consumer.
+    """
+    if mode == "thread":
+        return ThreadPoolExecutor(concurrency)
+    if mode == "process":
+        return ProcessPoolExecutor(
+            concurrency, mp_context=multiprocessing.get_context("spawn"), initializer=initializer
+        )
+    raise ValueError(f"Unknown project concurrency mode: {mode}")
+
+
 def get_ingest_consumer(
-    consumer_types, once=False, executor: Optional[ThreadPoolExecutor] = None, **options
+    consumer_types,
+    once=False,
+    executor: Optional[ThreadPoolExecutor] = None,
+    project_concurrency: Optional[int] = None,
+    project_concurrency_mode: str = "thread",
+    **options,
 ):
     """
     Handles events coming via a kafka queue.
 
     The events should have already been processed (normalized... ) upstream (by Relay).
+
+    With ``project_concurrency``, every batch is split up by project and up to
+    that many projects are processed at the same time, in threads or
+    processes depending on ``project_concurrency_mode``.
     """
     topic_names = {ConsumerType.get_topic_name(consumer_type) for consumer_type in consumer_types}
+    project_executor = None
+    if project_concurrency is not None:
+        project_executor = get_project_executor(project_concurrency, project_concurrency_mode)
     return create_batching_kafka_consumer(
-        topic_names=topic_names, worker=IngestConsumerWorker(executor), **options
+        topic_names=topic_names,
+        worker=IngestConsumerWorker(executor, project_executor=project_executor),
+        **options,
     )
@@ -1,8 +1,19 @@
+import hashlib
+from time import monotonic
+from uuid import uuid4
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
 from symbolic import SourceView
 
+from sentry.models import ReleaseFile
+from sentry.stacktraces.processing import FRAME_CACHE_TTL
+from sentry.utils import metrics
+from sentry.utils.cache import cache
+from sentry.utils.lru import LRUCache
 from sentry.utils.strings import codec_lookup
 
-__all__ = ["SourceCache", "SourceMapCache"]
+__all__ = ["SourceCache", "SourceMapCache", "ParsedViewCache", "parsed_view_cache"]
 
 
 def is_utf8(codec):
@@ -10,6 +21,20 @@ def is_utf8(codec):
     return name in ("utf-8", "ascii")
 
 
+def make_source_view(source, encoding=None):
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    # If an encoding is provided and it's not utf-8 compatible
+    # we try to re-encoding the source and create a source view
+    # from it.
+    elif encoding is not None and not is_utf8(encoding):
+        try:
+            source = source.decode(encoding).encode("utf-8")
+        except UnicodeError:
+            pass
+    return SourceView.from_bytes(source)
+
+
 class SourceCache:
     def __init__(self):
         self._cache = {}
@@ -40,17 +65,7 @@ class SourceCache:
         url = self._get_canonical_url(url)
 
         if not isinstance(source, SourceView):
-            if isinstance(source, str):
-                source = source.encode("utf-8")
-            # If an encoding is provided and it's not utf-8 compatible
-            # we try to re-encoding the source and create a source view
-            # from it.
-            elif encoding is not None and not is_utf8(encoding):
-                try:
-                    source = source.decode(encoding).encode("utf-8")
-                except UnicodeError:
-                    pass
-            source = SourceView.from_bytes(source)
+            source = make_source_view(source, encoding)
         self._cache[url] = source
 
     def add_error(self, url, error):
@@ -90,3 +105,111 @@ class SourceMapCache:
             sourcemap = self.get(sourcemap_url)
             return (sourcemap_url, sourcemap)
         return (None, None)
+
+
+class ParsedViewCache:
+    """
+    A size-bounded cache of parsed ``SourceView`` and ``SourceMapView``
+    objects, shared by all events processed in a worker.
+
+    Views are keyed by ``(kind, release_id, dist, url, checksum)`` where the
+    checksum is taken over the raw body, so a changed artifact never returns
+    a stale view even in workers that did not see the change.  Views are
+    evicted by the size of their body once ``max_size`` bytes are exceeded,
+    and all views of a release are dropped when one of its files changes.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._cache = None
+        if max_size > 0:
+            # (view, size, parse time)
+            self._cache = LRUCache(max_weight=max_size, weigher=lambda item: item[1])
+
+    def get_or_parse(self, kind, body, parse, release=None, dist=None, url=None):
+        """
+        Returns the view of ``body`` created by ``parse``, parsing it only if
+        it is not cached yet.  ``kind`` distinguishes the type of view.
+        """
+        if self._cache is None:
+            return parse(body)
+
+        key = (
+            kind,
+            release.id if release else None,
+            dist.id if dist else None,
+            url,
+            hashlib.sha1(body).hexdigest(),
+        )
+        item = self._cache.get(key)
+        if item is not None:
+            metrics.incr("sourcemaps.view_cache", tags={"kind": kind, "result": "hit"})
+            metrics.timing("sourcemaps.view_cache.parse_time_saved", item[2], tags={"kind": kind})
+            return item[0]
+
+        metrics.incr("sourcemaps.view_cache", tags={"kind": kind, "result": "miss"})
+        start = monotonic()
+        view = parse(body)
+        self._cache.set(key, (view, len(body), monotonic() - start))
+        return view
+
+    def invalidate_release(self, release_id):
+        if self._cache is not None:
+            self._cache.delete_where(lambda key: key[1] == release_id)
+
+    def clear(self):
+        if self._cache is not None:
+            self._cache.clear()
+
+
+parsed_view_cache = ParsedViewCache(settings.SENTRY_JS_PARSED_VIEW_CACHE_SIZE)
+
+
+def _invalidate_release_views(instance, **kwargs):
+    parsed_view_cache.invalidate_release(instance.release_id)
+
+
+post_save.connect(
+    _invalidate_release_views,
+    sender=ReleaseFile,
+    dispatch_uid="invalidate_release_views_on_save",
+    weak=False,
+)
+post_delete.connect(
+    _invalidate_release_views,
+    sender=ReleaseFile,
+    dispatch_uid="invalidate_release_views_on_delete",
+    weak=False,
+)
+
+
+def _get_release_generation_key(release_id):
+    return f"jsframes:gen:{release_id}"
+
+
+def get_release_generation(release_id):
+    """
+    Returns a token that changes whenever a file of the release changes, for
+    use in the cache keys of processed frames.
+    """
+    return cache.get(_get_release_generation_key(release_id))
+
+
+def _bump_release_generation(instance, **kwargs):
+    # Outlive all frames cached under the previous generation, otherwise an
+    # expired generation could make their keys valid again.
+    cache.set(_get_release_generation_key(instance.release_id), uuid4().hex, FRAME_CACHE_TTL * 2)
+
+
+post_save.connect(
+    _bump_release_generation,
+    sender=ReleaseFile,
+    dispatch_uid="bump_release_generation_on_save",
+    weak=False,
+)
+post_delete.connect(
+    _bump_release_generation,
+    sender=ReleaseFile,
+    dispatch_uid="bump_release_generation_on_delete",
+    weak=False,
+)
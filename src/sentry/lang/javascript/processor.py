@@ -3,12 +3,15 @@ import errno
 import logging
 import re
 import sys
+import threading
 import time
 import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from io import BytesIO
 from os.path import splitext
-from typing import IO, Optional, Tuple
+from typing import IO, Optional, Tuple, Union
 from urllib.parse import urlsplit
 
 import sentry_sdk
@@ -21,7 +24,12 @@ from symbolic import SourceMapView
 from sentry import http, options
 from sentry.interfaces.stacktrace import Stacktrace
 from sentry.models import EventError, Organization, ReleaseFile
-from sentry.models.releasefile import ARTIFACT_INDEX_FILENAME, ReleaseArchive, read_artifact_index
+from sentry.models.releasefile import (
+    ARTIFACT_INDEX_FILENAME,
+    ReleaseArchive,
+    ReleaseBundle,
+    read_artifact_index,
+)
 from sentry.stacktraces.processing import StacktraceProcessor
 from sentry.utils import json, metrics
 
@@ -32,11 +40,18 @@ from sentry.utils.cache import cache
 from sentry.utils.files import compress_file
 from sentry.utils.hashlib import md5_text
 from sentry.utils.http import is_valid_origin
+from sentry.utils.lru import LRUCache
 from sentry.utils.retries import ConditionalRetryPolicy, exponential_delay
 from sentry.utils.safe import get_path
 from sentry.utils.urls import non_standard_url_join
 
-from .cache import SourceCache, SourceMapCache
+from .cache import (
+    SourceCache,
+    SourceMapCache,
+    get_release_generation,
+    make_source_view,
+    parsed_view_cache,
+)
 
 __all__ = ["JavaScriptStacktraceProcessor"]
 
@@ -72,6 +87,10 @@ CACHE_CONTROL_MIN = 60
 # the maximum number of remote resources (i.e. source files) that should be
 # fetched
 MAX_RESOURCE_FETCHES = 100
+# Number of remote files fetched at the same time for one event, and the
+# limit for a single domain
+MAX_CONCURRENT_FETCHES = 8
+MAX_CONCURRENT_FETCHES_PER_DOMAIN = 4
 
 CACHE_MAX_VALUE_SIZE = settings.SENTRY_CACHE_MAX_VALUE_SIZE
 
@@ -229,6 +248,10 @@ def should_retry_fetch(attempt: int, e: Exception) -> bool:
 
 fetch_retry_policy = ConditionalRetryPolicy(should_retry_fetch, exponential_delay(0.05))
 
+# Release files of recently used release archives, keyed by release id, dist
+# id and archive ident. Archives are never modified after upload.
+archive_releasefiles = LRUCache(max_weight=1000, ttl=3600)
+
 
 def fetch_and_cache_artifact(filename, fetch_fn, cache_key, cache_key_meta, headers, compress_fn):
     # If the release file is not in cache, check if we can retrieve at
@@ -383,7 +406,7 @@ def fetch_release_file(filename, release, dist=None):
 
 
 @metrics.wraps("sourcemaps.get_from_archive")
-def get_from_archive(url: str, archive: ReleaseArchive) -> Tuple[bytes, dict]:
+def get_from_archive(url: str, archive: Union[ReleaseArchive, ReleaseBundle]) -> Tuple[IO, dict]:
     candidates = ReleaseFile.normalize(url)
     for candidate in candidates:
         try:
@@ -447,8 +470,14 @@ def fetch_release_archive_for_url(release, dist, url) -> Optional[IO]:
         # is not yet known
         return None
 
-    archive_ident = info["archive_ident"]
+    return fetch_release_archive(release, dist, info["archive_ident"])
 
+
+def fetch_release_archive(release, dist, archive_ident) -> Optional[IO]:
+    """Fetch the release archive with the given ident and cache if possible.
+
+    If return value is not empty, the caller is responsible for closing the stream.
+    """
     # TODO(jjbayer): Could already extract filename from info and return
     # it later
 
@@ -508,6 +537,42 @@ def fetch_release_archive_for_url(release, dist, url) -> Optional[IO]:
             return file_
 
 
+def get_archive_releasefile(release, dist, archive_ident) -> Optional[ReleaseFile]:
+    key = (release.id, dist.id if dist else dist, archive_ident)
+    releasefile = archive_releasefiles.get(key)
+    if releasefile is None:
+        releasefile = (
+            ReleaseFile.objects.filter(release_id=release.id, dist_id=key[1], ident=archive_ident)
+            .select_related("file")
+            .first()
+        )
+        if releasefile is not None:
+            archive_releasefiles.set(key, releasefile)
+
+    return releasefile
+
+
+def fetch_release_bundle(release, dist, archive_ident) -> Optional[ReleaseBundle]:
+    """Fetch the release archive with the given ident as a memory-mapped bundle.
+
+    Returns `None` if the archive does not exist, is too large for the file
+    cache or could not be loaded.
+    """
+    with sentry_sdk.start_span(op="fetch_release_bundle.get_releasefile_db_entry"):
+        releasefile = get_archive_releasefile(release, dist, archive_ident)
+    if releasefile is None or releasefile.file.size > options.get(
+        "releasefile.cache-max-archive-size"
+    ):
+        return None
+
+    try:
+        with sentry_sdk.start_span(op="fetch_release_bundle.getbundle"):
+            return fetch_retry_policy(lambda: ReleaseFile.cache.getbundle(releasefile))
+    except Exception:
+        logger.error("sourcemaps.read_bundle_failed", exc_info=sys.exc_info())
+        return None
+
+
 def compress(fp: IO) -> Tuple[bytes, bytes]:
     """Alternative for compress_file when fp does not support chunks"""
     content = fp.read()
@@ -532,52 +597,57 @@ def fetch_release_artifact(url, release, dist):
         return result_from_cache(url, result)
 
     start = time.monotonic()
-    archive_file = fetch_release_archive_for_url(release, dist, url)
-    if archive_file is not None:
-        try:
-            archive = ReleaseArchive(archive_file)
-        except Exception as exc:
-            archive_file.seek(0)
-            logger.error(
-                "Failed to initialize archive for release %s",
-                release.id,
-                exc_info=exc,
-                extra={"contents": archive_file.read(256)},
-            )
-            # TODO(jjbayer): cache error and return here
-        else:
-            with archive:
-                try:
-                    fp, headers = get_from_archive(url, archive)
-                except KeyError:
-                    # The manifest mapped the url to an archive, but the file
-                    # is not there.
-                    logger.error(
-                        "Release artifact %r not found in archive %s", url, archive_file.id
-                    )
-                    cache.set(cache_key, -1, 60)
-                    metrics.timing(
-                        "sourcemaps.release_artifact_from_archive", time.monotonic() - start
-                    )
-                    return None
-                except Exception as exc:
-                    logger.error("Failed to read %s from release %s", url, release.id, exc_info=exc)
-                    # TODO(jjbayer): cache error and return here
-                else:
-                    result = fetch_and_cache_artifact(
-                        url,
-                        lambda: fp,
-                        cache_key,
-                        cache_key_meta,
-                        headers,
-                        # Cannot use `compress_file` because `ZipExtFile` does not support chunks
-                        compress_fn=compress,
-                    )
-                    metrics.timing(
-                        "sourcemaps.release_artifact_from_archive", time.monotonic() - start
-                    )
+    archive = None
+    with sentry_sdk.start_span(op="fetch_release_artifact.get_index_entry"):
+        info = get_index_entry(release, dist, url)
+    if info is not None:
+        archive_ident = info["archive_ident"]
+        # Archives that fit into the file cache are memory-mapped, others
+        # are read through the central directory of the ZIP file
+        archive = fetch_release_bundle(release, dist, archive_ident)
+        archive_file = None
+        if archive is None:
+            archive_file = fetch_release_archive(release, dist, archive_ident)
+        if archive_file is not None:
+            try:
+                archive = ReleaseArchive(archive_file)
+            except Exception as exc:
+                archive_file.seek(0)
+                logger.error(
+                    "Failed to initialize archive for release %s",
+                    release.id,
+                    exc_info=exc,
+                    extra={"contents": archive_file.read(256)},
+                )
+                # TODO(jjbayer): cache error and return here
+
+    if archive is not None:
+        with archive:
+            try:
+                fp, headers = get_from_archive(url, archive)
+            except KeyError:
+                # The manifest mapped the url to an archive, but the file
+                # is not there.
+                logger.error("Release artifact %r not found in archive %s", url, archive_ident)
+                cache.set(cache_key, -1, 60)
+                metrics.timing("sourcemaps.release_artifact_from_archive", time.monotonic() - start)
+                return None
+            except Exception as exc:
+                logger.error("Failed to read %s from release %s", url, release.id, exc_info=exc)
+                # TODO(jjbayer): cache error and return here
+            else:
+                result = fetch_and_cache_artifact(
+                    url,
+                    lambda: fp,
+                    cache_key,
+                    cache_key_meta,
+                    headers,
+                    # Cannot use `compress_file` because `ZipExtFile` does not support chunks
+                    compress_fn=compress,
+                )
+                metrics.timing("sourcemaps.release_artifact_from_archive", time.monotonic() - start)
 
-                    return result
+                return result
 
     # Fall back to maintain compatibility with old releases and versions of
     # sentry-cli which upload files individually
@@ -586,7 +656,25 @@ def fetch_release_artifact(url, release, dist):
     return result
 
 
-def fetch_file(url, project=None, release=None, dist=None, allow_scraping=True):
+def get_scraping_options(url, project=None):
+    """
+    Returns the headers and whether to verify SSL when scraping `url` for
+    `project`.
+    """
+    headers = {}
+    verify_ssl = False
+    if project and is_valid_origin(url, project=project):
+        verify_ssl = bool(project.get_option("sentry:verify_ssl", False))
+        token = project.get_option("sentry:token")
+        if token:
+            token_header = project.get_option("sentry:token_header") or "X-Sentry-Token"
+            headers[token_header] = token
+    return headers, verify_ssl
+
+
+def fetch_file(
+    url, project=None, release=None, dist=None, allow_scraping=True, scraping_options=None
+):
     """
     Pull down a URL, returning a UrlResult object.
 
@@ -594,6 +682,9 @@ def fetch_file(url, project=None, release=None, dist=None, allow_scraping=True):
     event), then the internet. Caches the result of each of those two attempts
     separately, whether or not those attempts are successful. Used for both
     source files and source maps.
+
+    `scraping_options` can be the result of `get_scraping_options`, to avoid
+    looking up project options when fetching from another thread.
     """
     # If our url has been truncated, it'd be impossible to fetch
     # so we check for this early and bail
@@ -631,14 +722,9 @@ def fetch_file(url, project=None, release=None, dist=None, allow_scraping=True):
             )
 
     if result is None:
-        headers = {}
-        verify_ssl = False
-        if project and is_valid_origin(url, project=project):
-            verify_ssl = bool(project.get_option("sentry:verify_ssl", False))
-            token = project.get_option("sentry:token")
-            if token:
-                token_header = project.get_option("sentry:token_header") or "X-Sentry-Token"
-                headers[token_header] = token
+        if scraping_options is None:
+            scraping_options = get_scraping_options(url, project)
+        headers, verify_ssl = scraping_options
 
         with metrics.timer("sourcemaps.fetch"):
             result = http.fetch_file(url, headers=headers, verify_ssl=verify_ssl)
@@ -720,7 +806,11 @@ def get_max_age(headers):
     return min(max_age, CACHE_CONTROL_MAX)
 
 
-def fetch_sourcemap(url, project=None, release=None, dist=None, allow_scraping=True):
+def fetch_sourcemap(url, project=None, release=None, dist=None, allow_scraping=True, result=None):
+    """
+    Fetches and parses a source map. If the source map was already fetched,
+    its ``result`` can be passed in.
+    """
     if is_data_uri(url):
         try:
             body = base64.b64decode(
@@ -729,18 +819,28 @@ def fetch_sourcemap(url, project=None, release=None, dist=None, allow_scraping=T
             )
         except TypeError as e:
             raise UnparseableSourcemap({"url": "<base64>", "reason": str(e)})
+        cache_url = "<base64>"
     else:
         # look in the database and, if not found, optionally try to scrape the web
-        result = fetch_file(
-            url,
-            project=project,
+        if result is None:
+            result = fetch_file(
+                url,
+                project=project,
+                release=release,
+                dist=dist,
+                allow_scraping=allow_scraping,
+            )
+        body = result.body
+        cache_url = result.url
+    try:
+        return parsed_view_cache.get_or_parse(
+            "sourcemap",
+            body,
+            SourceMapView.from_json_bytes,
             release=release,
             dist=dist,
-            allow_scraping=allow_scraping,
+            url=cache_url,
         )
-        body = result.body
-    try:
-        return SourceMapView.from_json_bytes(body)
     except Exception as exc:
         # This is in debug because the product shows an error already.
         logger.debug(str(exc), exc_info=True)
@@ -796,6 +896,8 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
     Mutates the input ``data`` with expanded context if available.
     """
 
+    cache_processed_frames = True
+
     def __init__(self, *args, **kwargs):
         StacktraceProcessor.__init__(self, *args, **kwargs)
 
@@ -823,6 +925,7 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
 
         self.release = None
         self.dist = None
+        self._frame_cache_values = None
 
     def get_stacktraces(self, data):
         exceptions = get_path(data, "exception", "values", filter=True, default=())
@@ -856,6 +959,14 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 date = timestamp and datetime.fromtimestamp(timestamp).replace(tzinfo=timezone.utc)
                 self.dist = self.release.add_dist(self.data["dist"], date)
 
+        # Frames that were processed before do not need their sources.
+        cached_frames = {
+            id(processable_frame.frame)
+            for processable_frame in processing_task.iter_processable_frames(self)
+            if processable_frame.cache_value is not None
+        }
+        frames = [frame for frame in frames if id(frame) not in cached_frames]
+
         with sentry_sdk.start_span(
             op="JavaScriptStacktraceProcessor.preprocess_step.populate_source_cache"
         ):
@@ -866,10 +977,53 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
         platform = frame.get("platform") or self.data.get("platform")
         return platform in ("javascript", "node")
 
+    def get_frame_cache_values(self):
+        """
+        Returns the values that all processed frames of this event depend on
+        besides the frames themselves.  Frames of releases are invalidated by
+        the generation of the release, which changes with its files.
+        """
+        if self._frame_cache_values is None:
+            release = self.get_release()
+            release_id = release.id if release else None
+            self._frame_cache_values = [
+                self.project.id,
+                release_id,
+                get_release_generation(release_id) if release_id else None,
+                self.data.get("dist"),
+                self.data.get("platform"),
+                self.allow_scraping,
+            ]
+        return self._frame_cache_values
+
     def preprocess_frame(self, processable_frame):
-        # Stores the resolved token.  This is used to cross refer to other
-        # frames for function name resolution by call site.
-        processable_frame.data = {"token": None}
+        # Stores the name of the resolved token.  This is used to cross refer
+        # to other frames for function name resolution by call site.
+        processable_frame.data = {"token_name": None}
+
+        if not processable_frame.get("abs_path") or not processable_frame.get("lineno"):
+            return
+
+        # The function name of a frame can be resolved from the token of the
+        # previous frame, so that frame is part of the key as well.
+        previous_frame = processable_frame.previous_frame
+        if previous_frame is not None and previous_frame.processor is self:
+            previous_frame = previous_frame.frame
+        else:
+            previous_frame = None
+
+        processable_frame.set_cache_key_from_values(
+            self.get_frame_cache_values()
+            + [
+                md5_text(json.dumps(processable_frame.frame)).hexdigest(),
+                md5_text(json.dumps(previous_frame)).hexdigest(),
+            ]
+        )
+
+    def should_cache_processed_frame(self, processable_frame, result):
+        # Errors are mostly caused by sources that could not be fetched, which
+        # might succeed for the next event.
+        return result is not None and not result[2]
 
     def process_frame(self, processable_frame, processing_task):
         """
@@ -947,7 +1101,7 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 )
 
             # persist the token so that we can find it later
-            processable_frame.data["token"] = token
+            processable_frame.data["token_name"] = token.name if token is not None else None
 
             # Store original data in annotation
             new_frame["data"] = dict(frame.get("data") or {}, sourcemap=sourcemap_label)
@@ -983,17 +1137,15 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 # frame and the location to resolve the original name
                 # through the heuristics in our sourcemap library.
                 if original_function_name is None:
-                    last_token = None
-
                     # Find the previous token for function name handling as a
                     # fallback.
                     if (
                         processable_frame.previous_frame
                         and processable_frame.previous_frame.processor is self
                     ):
-                        last_token = processable_frame.previous_frame.data.get("token")
-                        if last_token:
-                            original_function_name = last_token.name
+                        original_function_name = processable_frame.previous_frame.data.get(
+                            "token_name"
+                        )
 
                 if original_function_name is not None:
                     new_frame["function"] = original_function_name
@@ -1114,11 +1266,72 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
             self.cache_source(filename)
         return self.cache.get(filename)
 
-    def cache_source(self, filename):
+    def prefetch_files(self, urls):
+        """
+        Fetches the given files, returning a mapping of each url to its
+        `UrlResult` or the `BadSource` error raised while fetching it.
+
+        Release artifacts are looked up one after another, all files that
+        have to be scraped from the web are then fetched concurrently with at
+        most ``MAX_CONCURRENT_FETCHES_PER_DOMAIN`` requests per domain.
+        """
+        results = {}
+        to_scrape = []
+
+        for url in urls:
+            try:
+                results[url] = fetch_file(
+                    url,
+                    project=self.project,
+                    release=self.release,
+                    dist=self.dist,
+                    allow_scraping=False,
+                )
+            except http.BadSource as exc:
+                results[url] = exc
+                if (
+                    self.allow_scraping
+                    and exc.data["type"] == EventError.JS_MISSING_SOURCE
+                    and url.startswith(("http:", "https:"))
+                ):
+                    to_scrape.append(url)
+
+        if not to_scrape:
+            return results
+
+        # project options are cached per thread, so look them up here
+        scraping_options = {url: get_scraping_options(url, self.project) for url in to_scrape}
+        domain_locks = defaultdict(
+            lambda: threading.BoundedSemaphore(MAX_CONCURRENT_FETCHES_PER_DOMAIN)
+        )
+        for url in to_scrape:
+            domain_locks[urlsplit(url).netloc]
+
+        def scrape(url):
+            with domain_locks[urlsplit(url).netloc]:
+                try:
+                    return fetch_file(url, scraping_options=scraping_options[url])
+                except http.BadSource as exc:
+                    return exc
+
+        metrics.timing("sourcemaps.prefetch_files.count", len(to_scrape))
+        with metrics.timer("sourcemaps.prefetch_files"):
+            with ThreadPoolExecutor(min(MAX_CONCURRENT_FETCHES, len(to_scrape))) as executor:
+                for url, result in zip(to_scrape, executor.map(scrape, to_scrape)):
+                    results[url] = result
+
+        return results
+
+    def cache_source(self, filename, prefetched=None):
         """
         Look for and (if found) cache a source file and its associated source
         map (if any).
+
+        ``prefetched`` maps urls to the results of `prefetch_files`, files
+        which are not in there are fetched on demand.
         """
+        if prefetched is None:
+            prefetched = {}
 
         sourcemaps = self.sourcemaps
         cache = self.cache
@@ -1137,13 +1350,18 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 op="JavaScriptStacktraceProcessor.cache_source.fetch_file"
             ) as span:
                 span.set_data("filename", filename)
-                result = fetch_file(
-                    filename,
-                    project=self.project,
-                    release=self.release,
-                    dist=self.dist,
-                    allow_scraping=self.allow_scraping,
-                )
+                if filename in prefetched:
+                    result = prefetched[filename]
+                    if isinstance(result, http.BadSource):
+                        raise result
+                else:
+                    result = fetch_file(
+                        filename,
+                        project=self.project,
+                        release=self.release,
+                        dist=self.dist,
+                        allow_scraping=self.allow_scraping,
+                    )
         except http.BadSource as exc:
             # most people don't upload release artifacts for their third-party libraries,
             # so ignore missing node_modules files
@@ -1155,7 +1373,15 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
             # either way, there's no more for us to do here, since we don't have
             # a valid file to cache
             return
-        cache.add(filename, result.body, result.encoding)
+        source_view = parsed_view_cache.get_or_parse(
+            "source",
+            result.body,
+            lambda body: make_source_view(body, result.encoding),
+            release=self.release,
+            dist=self.dist,
+            url=result.url,
+        )
+        cache.add(filename, source_view)
         cache.alias(result.url, filename)
 
         sourcemap_url = discover_sourcemap(result)
@@ -1175,12 +1401,16 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 op="JavaScriptStacktraceProcessor.cache_source.fetch_sourcemap"
             ) as span:
                 span.set_data("sourcemap_url", sourcemap_url)
+                sourcemap_result = prefetched.get(sourcemap_url)
+                if isinstance(sourcemap_result, http.BadSource):
+                    raise sourcemap_result
                 sourcemap_view = fetch_sourcemap(
                     sourcemap_url,
                     project=self.project,
                     release=self.release,
                     dist=self.dist,
                     allow_scraping=self.allow_scraping,
+                    result=sourcemap_result,
                 )
         except http.BadSource as exc:
             # we don't perform the same check here as above, because if someone has
@@ -1221,12 +1451,39 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 continue
             pending_file_list.add(f["abs_path"])
 
-        for idx, filename in enumerate(pending_file_list):
+        pending_file_list = list(pending_file_list)
+
+        # Fetch all files and then their source maps up front, so that remote
+        # files are fetched concurrently.  Files over the fetch limit are not
+        # fetched at all, `cache_source` reports them.
+        with sentry_sdk.start_span(
+            op="JavaScriptStacktraceProcessor.populate_source_cache.prefetch_files"
+        ):
+            fetchable = pending_file_list[: max(self.max_fetches - self.fetch_count, 0)]
+            prefetched = self.prefetch_files(fetchable)
+
+            sourcemap_urls = []
+            for filename in fetchable:
+                result = prefetched[filename]
+                if isinstance(result, http.BadSource):
+                    continue
+                sourcemap_url = discover_sourcemap(result)
+                if (
+                    sourcemap_url
+                    and not is_data_uri(sourcemap_url)
+                    and sourcemap_url not in self.sourcemaps
+                    and sourcemap_url not in prefetched
+                    and sourcemap_url not in sourcemap_urls
+                ):
+                    sourcemap_urls.append(sourcemap_url)
+            prefetched.update(self.prefetch_files(sourcemap_urls))
+
+        for filename in pending_file_list:
             with sentry_sdk.start_span(
                 op="JavaScriptStacktraceProcessor.populate_source_cache.cache_source"
             ) as span:
                 span.set_data("filename", filename)
-                self.cache_source(filename=filename)
+                self.cache_source(filename=filename, prefetched=prefetched)
 
     def close(self):
         StacktraceProcessor.close(self)
@@ -1,11 +1,12 @@
 import logging
 import posixpath
+import threading
 from typing import Set
 
 from symbolic import ParseDebugIdError, normalize_debug_id
 
 from sentry.lang.native.error import SymbolicationFailed, write_error
-from sentry.lang.native.symbolicator import Symbolicator
+from sentry.lang.native.symbolicator import Symbolicator, get_batch_key
 from sentry.lang.native.utils import (
     get_event_attachment,
     get_sdk_from_event,
@@ -337,11 +338,11 @@ def get_frames_for_symbolication(frames, data, modules):
     return rv
 
 
-def process_payload(data):
-    project = Project.objects.get_from_cache(id=data["project"])
-
-    symbolicator = Symbolicator(project=project, event_id=data["event_id"])
-
+def _get_payload(data):
+    """
+    Returns the native stack traces of an event and the symbolication payload
+    built from them, or `None` if there are no frames to symbolicate.
+    """
     stacktrace_infos = [
         stacktrace
         for stacktrace in find_stacktraces_in_data(data)
@@ -361,11 +362,15 @@ def process_payload(data):
     ]
 
     if not any(stacktrace["frames"] for stacktrace in stacktraces):
-        return
+        return None
 
-    signal = signal_from_data(data)
+    payload = {"stacktraces": stacktraces, "modules": modules, "signal": signal_from_data(data)}
+    return stacktrace_infos, payload
 
-    response = symbolicator.process_payload(stacktraces=stacktraces, modules=modules, signal=signal)
+
+def _merge_payload_response(data, stacktrace_infos, payload, response):
+    modules = payload["modules"]
+    stacktraces = payload["stacktraces"]
 
     if not _handle_response_status(data, response):
         return data
@@ -416,6 +421,75 @@ def process_payload(data):
     return data
 
 
+def process_payload(data):
+    project = Project.objects.get_from_cache(id=data["project"])
+
+    symbolicator = Symbolicator(project=project, event_id=data["event_id"])
+
+    rv = _get_payload(data)
+    if rv is None:
+        return
+
+    stacktrace_infos, payload = rv
+    response = symbolicator.process_payload(**payload)
+
+    return _merge_payload_response(data, stacktrace_infos, payload, response)
+
+
+class PayloadBatch:
+    """
+    Symbolicates the native stack traces of several events of one project.
+    Events with the same modules and signal are sent to symbolicator in a
+    single request.
+
+    `process_payload` is a drop-in replacement for the module level function
+    for events in the batch. The first call for an event symbolicates all
+    events sharing its modules, later calls for those events return their
+    result right away. It may be called from several threads.
+    """
+
+    def __init__(self, datas):
+        self._batches = {}
+        self._batch_keys = {}
+        self._locks = {}
+        self._results = {}
+
+        for data in datas:
+            rv = _get_payload(data)
+            if rv is None:
+                self._results[data["event_id"]] = None
+                continue
+
+            batch_key = (data["project"], get_batch_key(rv[1]))
+            self._batches.setdefault(batch_key, []).append((data, *rv))
+            self._batch_keys[data["event_id"]] = batch_key
+            self._locks.setdefault(batch_key, threading.Lock())
+
+    def __contains__(self, event_id):
+        return event_id in self._results or event_id in self._batch_keys
+
+    def _process_batch(self, batch):
+        project = Project.objects.get_from_cache(id=batch[0][0]["project"])
+        symbolicator = Symbolicator.for_batch(
+            project=project, event_ids=[data["event_id"] for data, _, _ in batch]
+        )
+        responses = symbolicator.process_payloads([payload for _, _, payload in batch])
+
+        for (data, stacktrace_infos, payload), response in zip(batch, responses):
+            self._results[data["event_id"]] = _merge_payload_response(
+                data, stacktrace_infos, payload, response
+            )
+
+    def process_payload(self, data):
+        event_id = data["event_id"]
+        if event_id not in self._results:
+            batch_key = self._batch_keys[event_id]
+            with self._locks[batch_key]:
+                if event_id not in self._results:
+                    self._process_batch(self._batches[batch_key])
+        return self._results[event_id]
+
+
 def get_symbolication_function(data):
     if is_minidump_event(data):
         return process_minidump
@@ -20,6 +20,7 @@ from sentry.models import Organization
 from sentry.net.http import Session
 from sentry.tasks.symbolication import RetrySymbolication
 from sentry.utils import json, metrics, safe
+from sentry.utils.hashlib import md5_text
 
 MAX_ATTEMPTS = 3
 REQUEST_CACHE_TIMEOUT = 3600
@@ -131,6 +132,91 @@ def _task_id_cache_key_for_event(project_id, event_id):
     return f"symbolicator:{event_id}:{project_id}"
 
 
+def _task_id_cache_key_for_batch(project_id, event_ids):
+    return "symbolicator:batch:{}:{}".format(project_id, md5_text(*sorted(event_ids)).hexdigest())
+
+
+def get_batch_key(payload):
+    """
+    Returns a key for a symbolication payload, payloads with the same key can
+    be symbolicated in a single batch.
+    """
+    return md5_text(json.dumps(payload["modules"]), payload.get("signal") or "").hexdigest()
+
+
+def _parse_addr(value):
+    if isinstance(value, str):
+        try:
+            return int(value, 16)
+        except ValueError:
+            return None
+    return value
+
+
+def _get_referenced_modules(payload):
+    """
+    Returns the indexes of the modules that the frames of a payload point into.
+    Modules without a known address range count as referenced.
+    """
+    referenced = set()
+    ranges = []
+    for index, module in enumerate(payload["modules"]):
+        image_addr = _parse_addr(module.get("image_addr"))
+        image_size = module.get("image_size")
+        if image_addr is None or not image_size:
+            referenced.add(index)
+        else:
+            ranges.append((index, image_addr, image_addr + image_size))
+
+    for stacktrace in payload["stacktraces"]:
+        for frame in stacktrace.get("frames") or ():
+            addr_mode = frame.get("addr_mode") or ""
+            if addr_mode.startswith("rel:"):
+                try:
+                    referenced.add(int(addr_mode[4:]))
+                except ValueError:
+                    pass
+                continue
+
+            instruction_addr = _parse_addr(frame.get("instruction_addr"))
+            if instruction_addr is None:
+                continue
+            for index, start, end in ranges:
+                if start <= instruction_addr < end:
+                    referenced.add(index)
+
+    return referenced
+
+
+def split_batch_response(response, payloads):
+    """
+    Splits the response to a batch of payloads into one response per payload.
+
+    The status of the modules in the response reflects the frames of all
+    payloads, so modules that none of the frames of a payload point into are
+    marked as unused in its response.
+    """
+    stacktraces = response.get("stacktraces")
+    responses = []
+    offset = 0
+    for payload in payloads:
+        part = deepcopy({key: value for key, value in response.items() if key != "stacktraces"})
+        if stacktraces is not None:
+            count = len(payload["stacktraces"])
+            part["stacktraces"] = stacktraces[offset : offset + count]
+            offset += count
+
+        modules = part.get("modules")
+        if modules is not None and len(payloads) > 1 and len(modules) == len(payload["modules"]):
+            referenced = _get_referenced_modules(payload)
+            for index, module in enumerate(modules):
+                if index not in referenced and module.get("debug_status") is not None:
+                    module["debug_status"] = "unused"
+
+        responses.append(part)
+    return responses
+
+
 class Symbolicator:
     def __init__(self, project, event_id):
         symbolicator_options = options.get("symbolicator.options")
@@ -154,6 +240,16 @@ class Symbolicator:
 
         self.task_id_cache_key = _task_id_cache_key_for_event(project.id, event_id)
 
+    @classmethod
+    def for_batch(cls, project, event_ids):
+        """
+        Returns a symbolicator for a batch of events of one project, see
+        `process_payloads`.
+        """
+        symbolicator = cls(project=project, event_id=event_ids[0])
+        symbolicator.task_id_cache_key = _task_id_cache_key_for_batch(project.id, event_ids)
+        return symbolicator
+
     def _process(self, create_task, task_name):
         task_id = default_cache.get(self.task_id_cache_key)
         json_response = None
@@ -220,6 +316,19 @@ class Symbolicator:
             "symbolicate_stacktraces",
         )
 
+    def process_payloads(self, payloads):
+        """
+        Symbolicates the payloads of several events in a single task and returns
+        one response per payload. All payloads must have the same batch key,
+        see `get_batch_key`.
+        """
+        response = self._process(
+            lambda: self.sess.symbolicate_stacktraces_batch(payloads),
+            "symbolicate_stacktraces_batch",
+        )
+        metrics.timing("events.symbolicator.batch.size", len(payloads))
+        return split_batch_response(response, payloads)
+
 
 class TaskIdNotFound(Exception):
     pass
@@ -644,6 +753,20 @@ class SymbolicatorSession:
 
         return self._create_task("symbolicate", json=json)
 
+    def symbolicate_stacktraces_batch(self, payloads):
+        """
+        Symbolicates the stack traces of several payloads sharing the same
+        modules and signal in one request. Use `split_batch_response` to get the
+        response for every payload.
+        """
+        return self.symbolicate_stacktraces(
+            stacktraces=[
+                stacktrace for payload in payloads for stacktrace in payload["stacktraces"]
+            ],
+            modules=payloads[0]["modules"],
+            signal=payloads[0].get("signal"),
+        )
+
     def upload_minidump(self, minidump):
         return self._create_task(
             path="minidump",
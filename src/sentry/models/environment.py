@@ -94,19 +94,83 @@ class Environment(Model):
 
             return env
 
+    @classmethod
+    def get_or_create_many(cls, projects_and_names):
+        """
+        Bulk version of ``get_or_create``. Takes ``(project, name)`` pairs and
+        returns a mapping of ``(project_id, name)`` to the environment, with
+        one cache round-trip per kind of key and a single query for all
+        environments that are not cached.
+        """
+        with metrics.timer("models.environment.get_or_create_many") as metrics_tags:
+            projects_by_key = {}
+            for project, name in projects_and_names:
+                projects_by_key[(project.id, name)] = project
+
+            cache_keys = {}
+            for (_, name), project in projects_by_key.items():
+                org_key = (project.organization_id, cls.get_name_or_default(name))
+                cache_keys[cls.get_cache_key(*org_key)] = org_key
+
+            envs = {
+                cache_keys[cache_key]: env
+                for cache_key, env in cache.get_many(list(cache_keys)).items()
+                if env is not None
+            }
+            missing = set(cache_keys.values()) - set(envs)
+            metrics_tags["cache_hit"] = "false" if missing else "true"
+
+            if missing:
+                for env in cls.objects.filter(
+                    organization_id__in={organization_id for organization_id, _ in missing},
+                    name__in={name for _, name in missing},
+                ):
+                    if (env.organization_id, env.name) in missing:
+                        envs[(env.organization_id, env.name)] = env
+
+                for organization_id, name in missing - set(envs):
+                    envs[(organization_id, name)] = cls.objects.get_or_create(
+                        name=name, organization_id=organization_id
+                    )[0]
+
+                cache.set_many({cls.get_cache_key(*key): envs[key] for key in missing}, 3600)
+
+            rv = {}
+            for (project_id, name), project in projects_by_key.items():
+                rv[(project_id, name)] = envs[
+                    (project.organization_id, cls.get_name_or_default(name))
+                ]
+
+            project_cache_keys = {
+                f"envproj:c:{env.id}:{project_id}": (project_id, name)
+                for (project_id, name), env in rv.items()
+            }
+            cached = cache.get_many(list(project_cache_keys))
+            for cache_key, key in project_cache_keys.items():
+                if cached.get(cache_key) is None:
+                    rv[key]._add_project(projects_by_key[key])
+
+            return rv
+
     def add_project(self, project, is_hidden=None):
         cache_key = f"envproj:c:{self.id}:{project.id}"
 
         if cache.get(cache_key) is None:
-            try:
-                with transaction.atomic():
-                    EnvironmentProject.objects.create(
-                        project=project, environment=self, is_hidden=is_hidden
-                    )
-                cache.set(cache_key, 1, 3600)
-            except IntegrityError:
-                # We've already created the object, should still cache the action.
-                cache.set(cache_key, 1, 3600)
+            self._add_project(project, is_hidden)
+
+    def _add_project(self, project, is_hidden=None):
+        # Like `add_project`, but for callers that already checked the cache.
+        cache_key = f"envproj:c:{self.id}:{project.id}"
+
+        try:
+            with transaction.atomic():
+                EnvironmentProject.objects.create(
+                    project=project, environment=self, is_hidden=is_hidden
+                )
+            cache.set(cache_key, 1, 3600)
+        except IntegrityError:
+            # We've already created the object, should still cache the action.
+            cache.set(cache_key, 1, 3600)
 
     @staticmethod
     def get_name_from_path_segment(segment):
@@ -1,11 +1,15 @@
 import errno
 import logging
+import mmap
 import os
+import struct
+import time
 import zipfile
+import zlib
 from contextlib import contextmanager
 from hashlib import sha1
 from io import BytesIO
-from tempfile import TemporaryDirectory
+from tempfile import NamedTemporaryFile, TemporaryDirectory
 from typing import IO, Optional, Tuple
 from urllib.parse import urlsplit, urlunsplit
 
@@ -27,6 +31,7 @@ from sentry.models.release import Release
 from sentry.utils import json, metrics
 from sentry.utils.db import atomic_transaction
 from sentry.utils.hashlib import sha1_text
+from sentry.utils.lru import LRUCache
 from sentry.utils.zip import safe_extract_zip
 
 logger = logging.getLogger(__name__)
@@ -35,6 +40,16 @@ logger = logging.getLogger(__name__)
 ARTIFACT_INDEX_FILENAME = "artifact-index.json"
 ARTIFACT_INDEX_TYPE = "release.artifact-index"
 
+#: Suffix of the index file stored next to a release bundle in the file cache
+BUNDLE_INDEX_SUFFIX = ".index"
+#: Number of memory-mapped release bundles kept open per process
+BUNDLE_CACHE_MAX_OPEN = 64
+#: Seconds after which the disk usage of release bundles is scanned again
+BUNDLE_CACHE_SCAN_INTERVAL = 60
+
+# Signature, filename length and extra field length of a ZIP local file header
+_LOCAL_FILE_HEADER = struct.Struct("<4s22xHH")
+
 
 class PublicReleaseFileManager(models.Manager):
     """Manager for all release files that are not internal.
@@ -142,10 +157,25 @@ class ReleaseFile(Model):
 
 
 class ReleaseFileCache:
+    def __init__(self):
+        self._bundles = LRUCache(
+            max_weight=BUNDLE_CACHE_MAX_OPEN, on_evict=lambda path, bundle: bundle.close()
+        )
+        # Disk usage of release bundles as of the last scan, plus the bundles
+        # this process added since. Other workers add bundles too, so the
+        # directory is scanned again every `BUNDLE_CACHE_SCAN_INTERVAL`.
+        self._bundle_disk_usage = 0
+        self._bundle_last_scan = None
+
     @property
     def cache_path(self):
         return options.get("releasefile.cache-path")
 
+    @property
+    def bundle_cache_size(self):
+        """Disk budget in bytes for release bundles and their indexes."""
+        return options.get("releasefile.bundle-cache-size")
+
     def getfile(self, releasefile):
         cutoff = options.get("releasefile.cache-limit")
         file_size = releasefile.file.size
@@ -169,6 +199,89 @@ class ReleaseFileCache:
         metrics.timing("release_file.cache.get.size", file_size, tags={"hit": hit, "cutoff": False})
         return FileObj(open(file_path, "rb"))
 
+    def getbundle(self, releasefile) -> "ReleaseBundle":
+        """Return a memory-mapped view of a release archive.
+
+        The archive is stored in the file cache together with an index of its
+        files, both are reused by all workers on this machine. Bundles are
+        evicted in least recently used order once they exceed
+        ``bundle_cache_size``. Memory-mapped bundles are closed when they
+        drop out of the per-process cache.
+        """
+        file_path = os.path.join(
+            self.cache_path, str(releasefile.organization_id), str(releasefile.file.id)
+        )
+        index_path = file_path + BUNDLE_INDEX_SUFFIX
+
+        bundle = self._bundles.get(file_path)
+        if bundle is not None:
+            metrics.incr("release_file.cache.bundle", tags={"result": "memory"})
+            touch(file_path)
+            return bundle
+
+        try:
+            with open(index_path, "rb") as f:
+                index = json.loads(f.read())
+            touch(file_path)
+            result = "disk"
+        except FileNotFoundError:
+            releasefile.file.save_to(file_path)
+            with open(file_path, "rb") as f:
+                index = build_bundle_index(f)
+            index_bytes = json.dumps(index).encode("utf-8")
+            with NamedTemporaryFile(dir=os.path.dirname(file_path), delete=False) as f:
+                f.write(index_bytes)
+            os.rename(f.name, index_path)
+            self._bundle_disk_usage += releasefile.file.size + len(index_bytes)
+            if (
+                self._bundle_disk_usage > self.bundle_cache_size
+                or self._bundle_last_scan is None
+                or time.monotonic() - self._bundle_last_scan > BUNDLE_CACHE_SCAN_INTERVAL
+            ):
+                self.evict_bundles()
+            result = "miss"
+
+        bundle = ReleaseBundle(file_path, index)
+        self._bundles.set(file_path, bundle)
+        metrics.incr("release_file.cache.bundle", tags={"result": result})
+        return bundle
+
+    def evict_bundles(self):
+        """Remove least recently used bundles until the disk budget is met."""
+        bundles = []
+        total_size = 0
+        for index_path in iter_cached_files(self.cache_path, BUNDLE_INDEX_SUFFIX):
+            file_path = index_path[: -len(BUNDLE_INDEX_SUFFIX)]
+            try:
+                stat = os.stat(file_path)
+                size = stat.st_size + os.path.getsize(index_path)
+            except OSError:
+                continue
+            bundles.append((stat.st_mtime, size, file_path, index_path))
+            total_size += size
+
+        budget = self.bundle_cache_size
+        bundles.sort()
+        evicted = 0
+        for _, size, file_path, index_path in bundles:
+            if total_size <= budget:
+                break
+            for path in (index_path, file_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            bundle = self._bundles.pop(file_path)
+            if bundle is not None:
+                bundle.close()
+            total_size -= size
+            evicted += 1
+
+        self._bundle_disk_usage = total_size
+        self._bundle_last_scan = time.monotonic()
+        if evicted:
+            metrics.incr("release_file.cache.bundle.evicted", amount=evicted)
+
     def clear_old_entries(self):
         clear_cached_files(self.cache_path)
 
@@ -225,6 +338,126 @@ class ReleaseArchive:
         return temp_dir
 
 
+class ReleaseBundle:
+    """Read-only, memory-mapped view of a release archive on disk.
+
+    Unlike :class:`ReleaseArchive`, neither the manifest nor the central
+    directory of the ZIP file are parsed. Files are looked up in an index
+    built by :func:`build_bundle_index` and read straight from the mapping.
+
+    Bundles are shared between lookups, leaving the context does not close
+    the mapping.
+    """
+
+    def __init__(self, path: str, index: dict):
+        self._path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._files = index.get("files", {})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc, value, tb):
+        pass
+
+    def close(self):
+        self._mmap.close()
+
+    def read_by_url(self, url: str) -> Tuple[bytes, dict]:
+        """Return contents and headers.
+
+        May raise ``KeyError``
+        """
+        offset, compress_size, compress_type, headers = self._files[url]
+        if offset is None:
+            # Not indexed, `compress_size` holds the name of the file
+            with zipfile.ZipFile(self._path) as zip_file:
+                return zip_file.read(compress_size), headers
+
+        data = self._mmap[offset : offset + compress_size]
+        if compress_type == zipfile.ZIP_DEFLATED:
+            data = zlib.decompress(data, -zlib.MAX_WBITS)
+        return data, headers
+
+    def get_file_by_url(self, url: str) -> Tuple[IO, dict]:
+        """Return file-like object and headers, see `ReleaseArchive.get_file_by_url`.
+
+        May raise ``KeyError``
+        """
+        data, headers = self.read_by_url(url)
+        return BytesIO(data), headers
+
+
+def build_bundle_index(fileobj: IO) -> dict:
+    """Index the files listed in the manifest of a release archive.
+
+    Maps the URL of every file to the offset and size of its data within the
+    archive, its compression and its headers. Encrypted files and files with
+    compression methods other than stored and deflated are only indexed by
+    name and have to be read through the ZIP file.
+    """
+    files = {}
+    with zipfile.ZipFile(fileobj) as zip_file:
+        manifest = json.loads(zip_file.read("manifest.json").decode("utf-8"))
+        for filename, entry in manifest.get("files", {}).items():
+            try:
+                info = zip_file.getinfo(filename)
+            except KeyError:
+                continue
+            headers = entry.get("headers", {})
+            if info.flag_bits & 0x1 or info.compress_type not in (
+                zipfile.ZIP_STORED,
+                zipfile.ZIP_DEFLATED,
+            ):
+                files[entry["url"]] = [None, filename, None, headers]
+                continue
+
+            # The local file header repeats the filename and has its own
+            # extra field, the data starts right after them.
+            fileobj.seek(info.header_offset)
+            header = fileobj.read(_LOCAL_FILE_HEADER.size)
+            magic, name_length, extra_length = _LOCAL_FILE_HEADER.unpack(header)
+            if magic != b"PK\x03\x04":
+                files[entry["url"]] = [None, filename, None, headers]
+                continue
+            offset = info.header_offset + _LOCAL_FILE_HEADER.size + name_length + extra_length
+
+            files[entry["url"]] = [
+                offset,
+                info.compress_size,
+                info.compress_type,
+                headers,
+            ]
+
+    return {"files": files}
+
+
+def touch(path):
+    """Mark a cached file as recently used, ignoring files that were evicted."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def iter_cached_files(cache_path, suffix):
+    try:
+        cache_folders = os.listdir(cache_path)
+    except OSError:
+        return
+
+    for cache_folder in cache_folders:
+        cache_folder = os.path.join(cache_path, cache_folder)
+        try:
+            items = os.listdir(cache_folder)
+        except OSError:
+            continue
+        for cached_file in items:
+            if cached_file.endswith(suffix):
+                yield os.path.join(cache_folder, cached_file)
+
+
 class _ArtifactIndexData:
     """Holds data of artifact index and keeps track of changes"""
 
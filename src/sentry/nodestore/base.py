@@ -3,8 +3,10 @@ from threading import local
 import sentry_sdk
 from django.core.cache import InvalidCacheBackendError, caches
 
-from sentry.utils import json
+from sentry.nodestore.envelope import EnvelopeCodec, is_envelope, load_dictionary
+from sentry.utils import json, metrics
 from sentry.utils.cache import memoize
+from sentry.utils.lru import LRUCache
 from sentry.utils.services import Service
 
 # Cache an instance of the encoder we want to use
@@ -23,6 +25,16 @@ json_dumps = json.JSONEncoder(
 json_loads = json._default_decoder.decode
 
 
+# The nominal weight of a negative cache entry, roughly an ID plus the overhead
+# of the cache item, so that they are evicted like any other entry.
+NEGATIVE_CACHE_ENTRY_WEIGHT = 128
+
+
+def _weigh_payload(value):
+    # negative cache entries are `None`
+    return len(value) if value is not None else NEGATIVE_CACHE_ENTRY_WEIGHT
+
+
 class NodeStorage(local, Service):
     """
     Nodestore is a key-value store that is used to store event payloads. It comes in two flavors:
@@ -56,6 +68,19 @@ class NodeStorage(local, Service):
 
     This is used in reprocessing to store a snapshot of the event from multiple
     stages of the pipeline.
+
+    With ``binary_encoding`` enabled, values are written as a binary envelope
+    (see `sentry.nodestore.envelope`) where every subkey is compressed
+    separately with zstd, optionally using the trained dictionary at
+    ``compression_dictionary``. Reading a subkey then only decompresses and
+    parses that subkey. Values written in the old format stay readable.
+
+    With ``local_cache_size`` set, default payloads are additionally kept in an
+    LRU cache of that many bytes in front of the ``nodedata`` cache, and IDs
+    that were not found are remembered for ``local_cache_negative_ttl``
+    seconds. Since the payloads handed out are mutated by their consumers (see
+    `NodeData.bind_data`), the cache holds their JSON and parses it on every
+    hit. As nodestore instances are thread-local, so is that cache.
     """
 
     __all__ = (
@@ -70,6 +95,23 @@ class NodeStorage(local, Service):
         "bootstrap",
     )
 
+    binary_encoding = False
+    compression_dictionary = None
+    local_cache_size = 0
+    local_cache_negative_ttl = 5
+
+    def __init__(
+        self,
+        binary_encoding=False,
+        compression_dictionary=None,
+        local_cache_size=0,
+        local_cache_negative_ttl=5,
+    ):
+        self.binary_encoding = binary_encoding
+        self.compression_dictionary = compression_dictionary
+        self.local_cache_size = local_cache_size
+        self.local_cache_negative_ttl = local_cache_negative_ttl
+
     def delete(self, id):
         """
         >>> nodestore.delete('key1')
@@ -92,6 +134,12 @@ class NodeStorage(local, Service):
         if value is None:
             return None
 
+        if is_envelope(value):
+            section = self.envelope_codec.decode(value, subkey=subkey)
+            if section is None:
+                return None
+            return json_loads(section)
+
         lines_iter = iter(value.splitlines())
         try:
             if subkey is not None:
@@ -127,8 +175,15 @@ class NodeStorage(local, Service):
         with sentry_sdk.start_span(op="nodestore.get") as span:
             span.set_tag("node_id", id)
             if subkey is None:
+                local_items, missing_ids = self._get_local_cache_items([id])
+                if local_items or missing_ids:
+                    span.set_tag("origin", "from_local_cache")
+                    span.set_tag("found", bool(local_items))
+                    return local_items.get(id)
+
                 item_from_cache = self._get_cache_item(id)
                 if item_from_cache:
+                    self._set_local_cache_items({id: item_from_cache})
                     span.set_tag("origin", "from_cache")
                     span.set_tag("found", bool(item_from_cache))
                     return item_from_cache
@@ -139,6 +194,8 @@ class NodeStorage(local, Service):
             if subkey is None:
                 # set cache item only after we know decoding did not fail
                 self._set_cache_item(id, rv)
+                if not rv:
+                    self._set_local_cache_items({id: None})
 
             span.set_tag("result", "from_service")
             if bytes_data:
@@ -170,12 +227,19 @@ class NodeStorage(local, Service):
             span.set_tag("num_ids", len(id_list))
 
             if subkey is None:
-                cache_items = self._get_cache_items(id_list)
-                if len(cache_items) == len(id_list):
+                cache_items, missing_ids = self._get_local_cache_items(id_list)
+                shared_cache_items = self._get_cache_items(
+                    [id for id in id_list if id not in cache_items and id not in missing_ids]
+                )
+                self._set_local_cache_items(shared_cache_items)
+                cache_items.update(shared_cache_items)
+                if len(cache_items) + len(missing_ids) == len(id_list):
                     span.set_tag("result", "from_cache")
                     return cache_items
 
-                uncached_ids = [id for id in id_list if id not in cache_items]
+                uncached_ids = [
+                    id for id in id_list if id not in cache_items and id not in missing_ids
+                ]
             else:
                 uncached_ids = id_list
 
@@ -185,6 +249,7 @@ class NodeStorage(local, Service):
             }
             if subkey is None:
                 self._set_cache_items(items)
+                self._set_local_cache_items({id: None for id in uncached_ids if not items.get(id)})
                 items.update(cache_items)
 
             span.set_tag("result", "from_service")
@@ -201,6 +266,12 @@ class NodeStorage(local, Service):
         >>> _encode({"unprocessed": {}, None: {"stacktrace": {}}})
         b'{"stacktrace": {}}\nunprocessed\n{}'
         """
+        if self.binary_encoding:
+            sections = {None: json_dumps(data.pop(None)).encode("utf8")}
+            for key, value in data.items():
+                sections[key] = json_dumps(value).encode("utf8")
+            return self.envelope_codec.encode(sections)
+
         lines = [json_dumps(data.pop(None)).encode("utf8")]
         for key, value in data.items():
             lines.append(key.encode("ascii"))
@@ -252,6 +323,41 @@ class NodeStorage(local, Service):
     def bootstrap(self):
         raise NotImplementedError
 
+    def _get_local_cache_items(self, id_list):
+        """
+        Returns the payloads found in the local cache, and the set of IDs that
+        are remembered as missing.
+        """
+        if not self.local_cache:
+            return {}, set()
+
+        items = {}
+        missing_ids = set()
+        for id, value in self.local_cache.get_many(id_list).items():
+            if value is None:
+                missing_ids.add(id)
+            else:
+                items[id] = json_loads(value)
+
+        for result, amount in (
+            ("hit", len(items)),
+            ("negative_hit", len(missing_ids)),
+            ("miss", len(id_list) - len(items) - len(missing_ids)),
+        ):
+            if amount:
+                metrics.incr("nodestore.local_cache", amount=amount, tags={"result": result})
+        return items, missing_ids
+
+    def _set_local_cache_items(self, items):
+        if not self.local_cache:
+            return
+
+        for id, data in items.items():
+            if data:
+                self.local_cache.set(id, json_dumps(data))
+            else:
+                self.local_cache.set(id, None, ttl=self.local_cache_negative_ttl)
+
     def _get_cache_item(self, id):
         if self.cache:
             return self.cache.get(id)
@@ -262,21 +368,45 @@ class NodeStorage(local, Service):
         return {}
 
     def _set_cache_item(self, id, data):
+        if data:
+            self._set_local_cache_items({id: data})
+        elif self.local_cache:
+            self.local_cache.delete(id)
         if self.cache and data:
             self.cache.set(id, data)
 
     def _set_cache_items(self, items):
+        self._set_local_cache_items({id: data for id, data in items.items() if data})
         if self.cache:
             self.cache.set_many(items)
 
     def _delete_cache_item(self, id):
+        if self.local_cache:
+            self.local_cache.delete(id)
         if self.cache:
             self.cache.delete(id)
 
     def _delete_cache_items(self, id_list):
+        if self.local_cache:
+            self.local_cache.delete_many(id_list)
         if self.cache:
             self.cache.delete_many([id for id in id_list])
 
+    @memoize
+    def envelope_codec(self):
+        # NodeStorage is thread-local, so every thread gets its own (non
+        # thread-safe) zstd contexts.
+        dictionary = None
+        if self.compression_dictionary:
+            dictionary = load_dictionary(self.compression_dictionary)
+        return EnvelopeCodec(dictionary=dictionary)
+
+    @memoize
+    def local_cache(self):
+        if not self.local_cache_size:
+            return None
+        return LRUCache(max_weight=self.local_cache_size, weigher=_weigh_payload)
+
     @memoize
     def cache(self):
         try:
@@ -17,7 +17,12 @@ class BigtableNodeStorage(NodeStorage):
     :param default_ttl: How many days keys should be stored (and considered
         valid for reading + returning)
     :param compression: A boolean whether to enable zlib-compression, or the
-        string "zstd" to use zstd.
+        string "zstd" to use zstd. With ``binary_encoding`` the subkeys are
+        already compressed, so this should usually be disabled.
+    :param binary_encoding: Write values as binary envelopes, see
+        ``NodeStorage``.
+    :param compression_dictionary: Path to a trained zstd dictionary used by
+        ``binary_encoding``.
 
     >>> BigtableNodeStorage(
     ...     project='some-project',
@@ -38,8 +43,14 @@ class BigtableNodeStorage(NodeStorage):
         automatic_expiry=False,
         default_ttl=None,
         compression=False,
+        binary_encoding=False,
+        compression_dictionary=None,
         **client_options,
     ):
+        super().__init__(
+            binary_encoding=binary_encoding, compression_dictionary=compression_dictionary
+        )
+
         if compression is True:
             compression = "zlib"
         elif compression is False:
@@ -0,0 +1,126 @@
+"""
+Binary envelope for nodestore payloads.
+
+An envelope stores the default payload and every subkey in its own section,
+each JSON-encoded and compressed independently, behind a header holding an
+offset table. Reading one subkey only decompresses and parses that section::
+
+    magic (4) | version (1) | compression (1) | dictionary id (4) | count (2)
+    count * [key length (2) | offset (4) | length (4) | key]
+    sections
+
+The default payload (the `None` subkey) is stored under the empty key. Offsets
+are relative to the start of the first section.
+"""
+
+import struct
+
+import zstandard
+
+MAGIC = b"\xffSNE"
+VERSION = 1
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZSTD = 1
+
+header_struct = struct.Struct("<4sBBIH")
+entry_struct = struct.Struct("<HII")
+
+
+class EnvelopeError(ValueError):
+    pass
+
+
+def is_envelope(value):
+    return value[:4] == MAGIC
+
+
+def load_dictionary(path):
+    """
+    Loads a zstd dictionary trained with :func:`train_dictionary`.
+    """
+    with open(path, "rb") as f:
+        return zstandard.ZstdCompressionDict(f.read())
+
+
+def train_dictionary(samples, dict_size=112640):
+    """
+    Trains a zstd dictionary from a sample of encoded node payloads (for
+    instance the JSON of recent events.)
+    """
+    return zstandard.train_dictionary(dict_size, list(samples))
+
+
+class EnvelopeCodec:
+    """
+    Encodes and decodes envelopes. Compressor contexts are not thread-safe, so
+    an instance should not be shared between threads.
+    """
+
+    def __init__(self, compression=COMPRESSION_ZSTD, dictionary=None, level=3):
+        self.compression = compression
+        self.dictionary = dictionary
+        self.dictionary_id = dictionary.dict_id() if dictionary is not None else 0
+        self.compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+        self.decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+        # for reading envelopes that were written without a dictionary
+        self.plain_decompressor = zstandard.ZstdDecompressor()
+
+    def encode(self, sections):
+        """
+        Encodes a mapping of subkey to already JSON-encoded bytes.
+        """
+        entries = []
+        chunks = []
+        offset = 0
+        for key, value in sections.items():
+            key = b"" if key is None else key.encode("ascii")
+            if self.compression == COMPRESSION_ZSTD:
+                value = self.compressor.compress(value)
+            entries.append(entry_struct.pack(len(key), offset, len(value)) + key)
+            chunks.append(value)
+            offset += len(value)
+
+        header = header_struct.pack(
+            MAGIC, VERSION, self.compression, self.dictionary_id, len(entries)
+        )
+        return b"".join([header] + entries + chunks)
+
+    def decode(self, value, subkey=None):
+        """
+        Returns the raw JSON bytes of `subkey`, or `None` if the envelope does
+        not contain it.
+        """
+        try:
+            magic, version, compression, dictionary_id, count = header_struct.unpack_from(value)
+        except struct.error:
+            raise EnvelopeError("truncated envelope header")
+
+        if magic != MAGIC or version != VERSION:
+            raise EnvelopeError(f"unsupported envelope version {version}")
+
+        key = b"" if subkey is None else subkey.encode("ascii")
+        pos = header_struct.size
+        found = None
+        for _ in range(count):
+            key_length, offset, length = entry_struct.unpack_from(value, pos)
+            pos += entry_struct.size
+            if found is None and value[pos : pos + key_length] == key:
+                found = (offset, length)
+            pos += key_length
+
+        if found is None:
+            return None
+
+        offset, length = found
+        data = value[pos + offset : pos + offset + length]
+
+        if compression == COMPRESSION_NONE:
+            return data
+        if compression != COMPRESSION_ZSTD:
+            raise EnvelopeError(f"unsupported envelope compression {compression}")
+        if dictionary_id == 0:
+            return self.plain_decompressor.decompress(data)
+        if dictionary_id != self.dictionary_id:
+            raise EnvelopeError(f"envelope requires unknown zstd dictionary {dictionary_id}")
+        return self.decompressor.decompress(data)
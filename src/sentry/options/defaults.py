@@ -57,6 +57,12 @@ register(
     default=1024 * 1024 * 1024,
     flags=FLAG_PRIORITIZE_DISK,
 )
+register(
+    "releasefile.bundle-cache-size",
+    type=Int,
+    default=10 * 1024 * 1024 * 1024,
+    flags=FLAG_PRIORITIZE_DISK,
+)
 
 
 # Mail
@@ -378,6 +384,9 @@ register("subscriptions-query.sample-rate", default=0.01)
 # This is to allow gradual rollout of metrics collection for symbolication requests and can be
 # removed once it is fully rolled out.
 register("symbolicate-event.low-priority.metrics.submission-rate", default=0.0)
+register("symbolicate-event.async", default=False)
+# Submit the native events of a batch of the ingest consumer to symbolicator together.
+register("symbolicate-event.batch", default=False)
 
 # This is to enable the ingestion of suspect spans by project ids.
 register("performance.suspect-spans-ingestion-projects", default={})
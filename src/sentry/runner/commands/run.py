@@ -388,6 +388,18 @@ def post_process_forwarder(**options):
     type=click.Choice(["earliest", "latest"]),
     help="Force subscriptions to start from a particular offset",
 )
+@click.option(
+    "--max-batch-size",
+    default=None,
+    type=int,
+    help="Consume up to this many messages at once and commit offsets after each batch.",
+)
+@click.option(
+    "--worker-count",
+    default=1,
+    type=int,
+    help="How many threads handle the updates of a batch. Only used with --max-batch-size.",
+)
 @log_options()
 @configuration
 def query_subscription_consumer(**options):
@@ -400,6 +412,8 @@ def query_subscription_consumer(**options):
         commit_batch_timeout_ms=options["commit_batch_timeout_ms"],
         initial_offset_reset=options["initial_offset_reset"],
         force_offset_reset=options["force_offset_reset"],
+        max_batch_size=options["max_batch_size"],
+        worker_count=options["worker_count"],
     )
 
     def handler(signum, frame):
@@ -495,6 +509,18 @@ def batching_kafka_options(group):
     default=None,
     help="Thread pool size (only utilitized for message types that support concurrent processing)",
 )
+@click.option(
+    "--project-concurrency",
+    type=int,
+    default=None,
+    help="Process up to this many projects of each batch concurrently.",
+)
+@click.option(
+    "--project-concurrency-mode",
+    type=click.Choice(["thread", "process"]),
+    default="thread",
+    help="Whether projects are processed concurrently in threads or processes.",
+)
 @configuration
 def ingest_consumer(consumer_types, all_consumer_types, **options):
     """
@@ -518,6 +544,11 @@ def ingest_consumer(consumer_types, all_consumer_types, **options):
         raise click.ClickException("Need to specify --all-consumer-types or --consumer-type")
 
     concurrency = options.pop("concurrency", None)
+    if concurrency is not None and options["project_concurrency"] is not None:
+        raise click.ClickException(
+            "Cannot specify --concurrency and --project-concurrency at the same time"
+        )
+
     if concurrency is not None:
         executor = ThreadPoolExecutor(concurrency)
     else:
@@ -0,0 +1,112 @@
+"""
+Two tier cache for the string indexer.
+
+Strings are looked up in a bounded process-local LRU first and in the shared
+Django cache second. Both tiers are namespaced by organization. Metric names
+and tag keys repeat in almost every batch while tag values can have a very
+high cardinality, so a string is only admitted into the local tier once it has
+been asked for a few times; one-off strings stay in the shared tier.
+"""
+
+from typing import Mapping, MutableMapping, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from sentry.utils import metrics
+from sentry.utils.hashlib import md5_text
+from sentry.utils.lru import LRUCache
+
+OrgString = Tuple[int, str]
+
+_LOCAL_CACHE_HIT_METRIC = "sentry_metrics.indexer.local_cache.hit"
+_LOCAL_CACHE_MISS_METRIC = "sentry_metrics.indexer.local_cache.miss"
+_SHARED_CACHE_FETCH_METRIC = "sentry_metrics.indexer.memcache.fetch"
+_SHARED_CACHE_HIT_METRIC = "sentry_metrics.indexer.memcache.hit"
+_SHARED_CACHE_MISS_METRIC = "sentry_metrics.indexer.memcache.miss"
+
+
+def get_cache_key(org_id: int, string: str) -> str:
+    return f"indexer:org:str:{org_id}:{md5_text(string).hexdigest()}"
+
+
+class StringIndexerCache:
+    def __init__(
+        self,
+        local_size: int,
+        local_ttl: Optional[float] = None,
+        admission_threshold: int = 1,
+        ttl: int = settings.SENTRY_METRICS_INDEXER_CACHE_TTL,
+    ) -> None:
+        self.local_cache: Optional[LRUCache[OrgString, int]] = None
+        self.candidates: Optional[LRUCache[OrgString, int]] = None
+        if local_size > 0:
+            self.local_cache = LRUCache(local_size, ttl=local_ttl)
+            if admission_threshold > 1:
+                # Counts how many times strings that are not in the local tier
+                # were asked for.
+                self.candidates = LRUCache(local_size * 4, ttl=local_ttl)
+        self.admission_threshold = admission_threshold
+        self.ttl = ttl
+
+    def get_many(self, keys: Set[OrgString]) -> MutableMapping[OrgString, int]:
+        """
+        Returns the ids of all ``(org_id, string)`` pairs found in either tier.
+        """
+        rv: MutableMapping[OrgString, int] = {}
+        if self.local_cache is not None:
+            rv.update(self.local_cache.get_many(keys))
+            metrics.incr(_LOCAL_CACHE_HIT_METRIC, amount=len(rv))
+            metrics.incr(_LOCAL_CACHE_MISS_METRIC, amount=len(keys) - len(rv))
+
+        missing = [key for key in keys if key not in rv]
+        metrics.incr(_SHARED_CACHE_FETCH_METRIC, amount=len(missing))
+        if not missing:
+            metrics.incr(_SHARED_CACHE_HIT_METRIC, amount=0)
+            metrics.incr(_SHARED_CACHE_MISS_METRIC, amount=0)
+            return rv
+
+        cache_keys = {get_cache_key(*key): key for key in missing}
+        shared = {
+            cache_keys[cache_key]: id
+            for cache_key, id in cache.get_many(list(cache_keys)).items()
+            if id is not None
+        }
+        metrics.incr(_SHARED_CACHE_HIT_METRIC, amount=len(shared))
+        metrics.incr(_SHARED_CACHE_MISS_METRIC, amount=len(missing) - len(shared))
+
+        self._admit(shared)
+        rv.update(shared)
+        return rv
+
+    def set_many(self, values: Mapping[OrgString, int]) -> None:
+        """
+        Writes back ids that were missing from both tiers.
+        """
+        if not values:
+            return
+        cache.set_many(
+            {get_cache_key(*key): id for key, id in values.items()},
+            self.ttl,
+        )
+        self._admit(values)
+
+    def _admit(self, values: Mapping[OrgString, int]) -> None:
+        if self.local_cache is None:
+            return
+
+        for key, id in values.items():
+            if self.candidates is not None:
+                count = self.candidates.get(key, 0) + 1
+                if count < self.admission_threshold:
+                    self.candidates.set(key, count)
+                    continue
+                self.candidates.delete(key)
+
+            self.local_cache.set(key, id)
+
+    def clear(self) -> None:
+        if self.local_cache is not None:
+            self.local_cache.clear()
+        if self.candidates is not None:
+            self.candidates.clear()
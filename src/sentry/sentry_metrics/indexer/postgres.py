@@ -1,12 +1,17 @@
-from typing import Any, Mapping, MutableMapping, Optional, Sequence, Set
+from typing import Any, Mapping, MutableMapping, Optional, Set
 
+from django.conf import settings
+
+from sentry.sentry_metrics.indexer.cache import StringIndexerCache
 from sentry.sentry_metrics.indexer.models import MetricsKeyIndexer
 from sentry.utils import metrics
 from sentry.utils.services import Service
 
-_INDEXER_CACHE_FETCH_METRIC = "sentry_metrics.indexer.memcache.fetch"
-_INDEXER_CACHE_HIT_METRIC = "sentry_metrics.indexer.memcache.hit"
-_INDEXER_CACHE_MISS_METRIC = "sentry_metrics.indexer.memcache.miss"
+indexer_cache = StringIndexerCache(
+    local_size=settings.SENTRY_METRICS_INDEXER_LOCAL_CACHE_SIZE,
+    local_ttl=settings.SENTRY_METRICS_INDEXER_LOCAL_CACHE_TTL,
+    admission_threshold=settings.SENTRY_METRICS_INDEXER_LOCAL_CACHE_ADMISSION_THRESHOLD,
+)
 
 
 class PGStringIndexer(Service):
@@ -25,44 +30,41 @@ class PGStringIndexer(Service):
         with metrics.timer("sentry_metrics.indexer.pg_bulk_create"):
             MetricsKeyIndexer.objects.bulk_create(records, ignore_conflicts=True)
         # Using `ignore_conflicts=True` prevents the pk from being set on the model
-        # instances.
-        #
-        # Using `get_many_from_cache` will not only re-query the database to fetch the rows
-        # (which should all exist point at this point), but also cache the results
-        return MetricsKeyIndexer.objects.get_many_from_cache(list(unmapped_strings), key="string")
+        # instances, so re-query the database to fetch the rows (which should all
+        # exist at this point.)
+        return MetricsKeyIndexer.objects.filter(string__in=unmapped_strings).values_list(
+            "string", "id"
+        )
 
     def bulk_record(self, org_strings: MutableMapping[int, Set[str]]) -> Mapping[str, int]:
         # XXX(meredith): We are going to be changing the implementation of bulk_record
-        # in a future PR, so for now we don't need to do anything with the org_id, we just
-        # want the signature to be correct for the new implementation
-        strings = set()
-        for _, strs in org_strings.items():
-            strings.update(strs)
-
-        cache_results: Sequence[Any] = MetricsKeyIndexer.objects.get_many_from_cache(
-            list(strings), key="string"
-        )
+        # in a future PR, so for now the org_id only namespaces the cache, the
+        # strings themselves are shared between organizations
+        keys = {(org_id, string) for org_id, strs in org_strings.items() for string in strs}
 
-        mapped_result: MutableMapping[str, int] = {r.string: r.id for r in cache_results}
+        cache_results = indexer_cache.get_many(keys)
+        mapped_result: MutableMapping[str, int] = {
+            string: id for (_, string), id in cache_results.items()
+        }
 
-        metrics.incr(_INDEXER_CACHE_FETCH_METRIC, amount=len(strings))
-        unmapped = set(strings).difference(mapped_result.keys())
+        unmapped = {key for key in keys if key not in cache_results}
         if not unmapped:
-            # This will probably be very rare in practice since for each batch of strings
-            # it's almost certain there would be a value we haven't seen before
-            metrics.incr(_INDEXER_CACHE_HIT_METRIC, amount=len(strings))
-            metrics.incr(_INDEXER_CACHE_MISS_METRIC, amount=0)
             return mapped_result
 
-        mapped = len(strings) - len(unmapped)
-        metrics.incr(_INDEXER_CACHE_HIT_METRIC, amount=mapped)
-        metrics.incr(_INDEXER_CACHE_MISS_METRIC, amount=len(unmapped))
+        # The string might have been cached for a different organization
+        new_cached = {key: mapped_result[key[1]] for key in unmapped if key[1] in mapped_result}
+        unmapped_strings = {string for _, string in unmapped if string not in mapped_result}
+
+        if unmapped_strings:
+            with metrics.timer("sentry_metrics.indexer._bulk_record"):
+                new_mapped = self._bulk_record(unmapped_strings)
 
-        with metrics.timer("sentry_metrics.indexer._bulk_record"):
-            new_mapped = self._bulk_record(unmapped)
+            mapped_result.update(new_mapped)
+            for key in unmapped:
+                if key[1] in mapped_result:
+                    new_cached[key] = mapped_result[key[1]]
 
-        for new in new_mapped:
-            mapped_result[new.string] = new.id
+        indexer_cache.set_many(new_cached)
 
         return mapped_result
 
@@ -3,7 +3,6 @@ import logging
 import time
 from collections import defaultdict, deque
 from concurrent.futures import Future
-from copy import deepcopy
 from dataclasses import dataclass
 from functools import partial
 from typing import (
@@ -384,27 +383,26 @@ def process_messages(
 
     with metrics.timer("process_messages.reconstruct_messages"):
         for message in outer_message.payload:
-            parsed_payload_value = parsed_payloads_by_offset[message.offset]
-            new_payload_value = deepcopy(parsed_payload_value)
-
-            metric_name = parsed_payload_value["name"]
-            tags = parsed_payload_value.get("tags", {})
+            # The parsed payload is not used after this, so it is rewritten in
+            # place rather than copied.
+            new_payload_value = parsed_payloads_by_offset.pop(message.offset)
+            tags = new_payload_value.get("tags", {})
 
             try:
-                new_tags: Mapping[int, int] = {mapping[k]: mapping[v] for k, v in tags.items()}
+                # JSON object keys are strings anyway, stringifying them here
+                # allows the payload to be encoded by rapidjson
+                new_tags: Mapping[str, int] = {str(mapping[k]): mapping[v] for k, v in tags.items()}
             except KeyError:
                 logger.error("process_messages.key_error", extra={"tags": tags}, exc_info=True)
                 continue
 
             new_payload_value["tags"] = new_tags
-            new_payload_value["metric_id"] = mapping[metric_name]
+            new_payload_value["metric_id"] = mapping[new_payload_value.pop("name")]
             new_payload_value["retention_days"] = 90
 
-            del new_payload_value["name"]
-
             new_payload = KafkaPayload(
                 key=message.payload.key,
-                value=json.dumps(new_payload_value).encode(),
+                value=json.dumps(new_payload_value, use_rapid_json=True).encode(),
                 headers=message.payload.headers,
             )
             new_message = Message(
@@ -1,8 +1,22 @@
 import logging
 import re
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from random import random
-from typing import Any, Callable, Dict, Iterable, List, Optional, cast
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
 
 import jsonschema
 import pytz
@@ -11,6 +25,7 @@ from confluent_kafka import OFFSET_INVALID, Consumer, KafkaException, Message, T
 from confluent_kafka.admin import AdminClient
 from dateutil.parser import parse as parse_date
 from django.conf import settings
+from django.db.models import prefetch_related_objects
 
 from sentry import options
 from sentry.snuba.dataset import EntityKey
@@ -24,7 +39,10 @@ logger = logging.getLogger(__name__)
 
 TQuerySubscriptionCallable = Callable[[Dict[str, Any], QuerySubscription], None]
 
+TQuerySubscriptionBatchContext = Callable[[List[QuerySubscription]], ContextManager[Any]]
+
 subscriber_registry: Dict[str, TQuerySubscriptionCallable] = {}
+subscriber_batch_context_registry: Dict[str, TQuerySubscriptionBatchContext] = {}
 
 
 def register_subscriber(
@@ -39,6 +57,24 @@ def register_subscriber(
     return inner
 
 
+def register_subscriber_batch_context(
+    subscriber_key: str,
+) -> Callable[[TQuerySubscriptionBatchContext], TQuerySubscriptionBatchContext]:
+    """
+    Registers a context manager that is entered around the updates of a batch when the
+    consumer runs in batched mode. It receives the subscriptions of the batch that are
+    handled by `subscriber_key`, which lets the subscriber fetch their state up front.
+    """
+
+    def inner(func: TQuerySubscriptionBatchContext) -> TQuerySubscriptionBatchContext:
+        if subscriber_key in subscriber_batch_context_registry:
+            raise Exception("Batch context already registered for %s" % subscriber_key)
+        subscriber_batch_context_registry[subscriber_key] = func
+        return func
+
+    return inner
+
+
 class InvalidMessageError(Exception):
     pass
 
@@ -52,6 +88,11 @@ class QuerySubscriptionConsumer:
     A Kafka consumer that processes query subscription update messages. Each message has
     a related subscription id and the latest values related to the subscribed query.
     These values are passed along to a callback associated with the subscription.
+
+    By default messages are handled one at a time. If `max_batch_size` is set, up to that
+    many messages are consumed at once, their subscriptions are fetched together and the
+    callbacks run on `worker_count` threads. Updates for the same subscription are still
+    handled in order, and offsets are committed once the whole batch has been handled.
     """
 
     topic_to_dataset: Dict[str, QueryDatasets] = {
@@ -69,6 +110,8 @@ class QuerySubscriptionConsumer:
         commit_batch_timeout_ms: int = 5000,
         initial_offset_reset: str = "earliest",
         force_offset_reset: Optional[str] = None,
+        max_batch_size: Optional[int] = None,
+        worker_count: int = 1,
     ):
         self.group_id = group_id
         if not topic:
@@ -78,6 +121,9 @@ class QuerySubscriptionConsumer:
         self.topic = topic
         cluster_name: str = settings.KAFKA_TOPICS[topic]["cluster"]
         self.commit_batch_size = commit_batch_size
+        self.max_batch_size = max_batch_size
+        self.worker_count = worker_count
+        self.__executor: Optional[ThreadPoolExecutor] = None
 
         # Adding time based commit behaviour
         self.commit_batch_timeout_ms: int = commit_batch_timeout_ms
@@ -173,6 +219,10 @@ class QuerySubscriptionConsumer:
 
         i = 0
         while not self.__shutdown_requested:
+            if self.max_batch_size:
+                self.consume_batch()
+                continue
+
             message = self.consumer.poll(0.1)
             if message is None:
                 continue
@@ -219,6 +269,34 @@ class QuerySubscriptionConsumer:
         self.commit_offsets()
         self.consumer.close()
 
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+
+    def consume_batch(self) -> None:
+        messages = self.consumer.consume(num_messages=self.max_batch_size, timeout=0.1)
+        if not messages:
+            return
+
+        for message in messages:
+            error = message.error()
+            if error is not None:
+                raise KafkaException(error)
+
+        metrics.timing("snuba_query_subscriber.batch_size", len(messages))
+        with sentry_sdk.start_transaction(
+            op="handle_batch",
+            name="query_subscription_consumer_process_batch",
+            sampled=random() <= options.get("subscriptions-query.sample-rate"),
+        ), metrics.timer("snuba_query_subscriber.handle_batch"):
+            self.handle_batch(messages)
+
+        for message in messages:
+            self.offsets[message.partition()] = message.offset() + 1
+
+        logger.debug("Committing offsets")
+        self.commit_offsets()
+
     def _reset_batch(self) -> None:
         self.__batch_deadline = None
 
@@ -259,96 +337,191 @@ class QuerySubscriptionConsumer:
             self.__batch_deadline = self.commit_batch_timeout_ms / 1000.0 + time.time()
 
         with sentry_sdk.push_scope() as scope:
-            try:
-                with metrics.timer("snuba_query_subscriber.parse_message_value"):
-                    contents = self.parse_message_value(message.value())
-            except InvalidMessageError:
-                # If the message is in an invalid format, just log the error
-                # and continue
-                logger.exception(
-                    "Subscription update could not be parsed",
-                    extra={
-                        "offset": message.offset(),
-                        "partition": message.partition(),
-                        "value": message.value(),
-                    },
-                )
+            contents = self._parse_message(message)
+            if contents is None:
                 return
             scope.set_tag("query_subscription_id", contents["subscription_id"])
 
+            subscription: Optional[QuerySubscription]
             try:
                 with metrics.timer("snuba_query_subscriber.fetch_subscription"):
-                    subscription: QuerySubscription = QuerySubscription.objects.get_from_cache(
+                    subscription = QuerySubscription.objects.get_from_cache(
                         subscription_id=contents["subscription_id"]
                     )
-                    if subscription.status != QuerySubscription.Status.ACTIVE.value:
-                        metrics.incr("snuba_query_subscriber.subscription_inactive")
-                        return
             except QuerySubscription.DoesNotExist:
-                metrics.incr("snuba_query_subscriber.subscription_doesnt_exist")
-                logger.error(
-                    "Received subscription update, but subscription does not exist",
-                    extra={
-                        "offset": message.offset(),
-                        "partition": message.partition(),
-                        "value": message.value(),
-                    },
-                )
-                try:
-                    if "entity" in contents:
-                        entity_key = contents["entity"]
-                    else:
-                        # XXX(ahmed): Remove this logic. This was kept here as backwards compat
-                        # for subscription updates with schema version `2`. However schema version 3
-                        # sends the "entity" in the payload
-                        entity_regex = r"^(MATCH|match)[ ]*\(([^)]+)\)"
-                        entity_match = re.match(entity_regex, contents["request"]["query"])
-                        if not entity_match:
-                            raise InvalidMessageError(
-                                "Unable to fetch entity from query in message"
-                            )
-                        entity_key = entity_match.group(2)
-                    _delete_from_snuba(
-                        self.topic_to_dataset[message.topic()],
-                        contents["subscription_id"],
-                        EntityKey(entity_key),
-                    )
-                except InvalidMessageError as e:
-                    logger.exception(e)
-                except Exception:
-                    logger.exception("Failed to delete unused subscription from snuba.")
-                return
+                subscription = None
+
+            self._handle_update(message, contents, subscription)
 
-            if subscription.type not in subscriber_registry:
-                metrics.incr("snuba_query_subscriber.subscription_type_not_registered")
-                logger.error(
-                    "Received subscription update, but no subscription handler registered",
-                    extra={
-                        "offset": message.offset(),
-                        "partition": message.partition(),
-                        "value": message.value(),
-                    },
+    def handle_batch(self, messages: Sequence[Message]) -> None:
+        """
+        Handles a batch of messages. The subscriptions of the whole batch are fetched at
+        once, and updates are grouped by subscription so that callbacks for different
+        subscriptions can run concurrently while the updates of a single subscription
+        are handled in the order they were received.
+        """
+        updates: Dict[str, List[Tuple[Message, Dict[str, Any]]]] = defaultdict(list)
+        for message in messages:
+            with sentry_sdk.push_scope():
+                contents = self._parse_message(message)
+            if contents is not None:
+                updates[contents["subscription_id"]].append((message, contents))
+
+        with metrics.timer("snuba_query_subscriber.fetch_subscriptions"):
+            subscriptions = {
+                subscription.subscription_id: subscription
+                for subscription in QuerySubscription.objects.get_many_from_cache(
+                    list(updates.keys()), key="subscription_id"
                 )
-                return
+            }
+            prefetch_related_objects(list(subscriptions.values()), "snuba_query")
+
+        def handle_updates(subscription_id: str) -> None:
+            for message, contents in updates[subscription_id]:
+                with sentry_sdk.push_scope() as scope:
+                    scope.set_tag("query_subscription_id", subscription_id)
+                    try:
+                        self._handle_update(message, contents, subscriptions.get(subscription_id))
+                    except Exception:
+                        # Same failsafe as in `run`, a failing update must neither block
+                        # the consumer nor the other updates of the batch.
+                        logger.exception(
+                            "Unexpected error while handling message in QuerySubscriptionConsumer. Skipping message.",
+                            extra={
+                                "offset": message.offset(),
+                                "partition": message.partition(),
+                                "value": message.value(),
+                            },
+                        )
+
+        with ExitStack() as stack:
+            self._enter_batch_contexts(stack, list(subscriptions.values()))
+            if self.worker_count <= 1:
+                for subscription_id in updates:
+                    handle_updates(subscription_id)
+            else:
+                if self.__executor is None:
+                    self.__executor = ThreadPoolExecutor(max_workers=self.worker_count)
+                for future in [
+                    self.__executor.submit(handle_updates, subscription_id)
+                    for subscription_id in updates
+                ]:
+                    future.result()
+
+    def _enter_batch_contexts(
+        self, stack: ExitStack, subscriptions: List[QuerySubscription]
+    ) -> None:
+        subscriptions_by_type: Dict[str, List[QuerySubscription]] = defaultdict(list)
+        for subscription in subscriptions:
+            if subscription.status == QuerySubscription.Status.ACTIVE.value:
+                subscriptions_by_type[subscription.type].append(subscription)
+
+        for subscription_type, typed_subscriptions in subscriptions_by_type.items():
+            batch_context = subscriber_batch_context_registry.get(subscription_type)
+            if batch_context is None:
+                continue
+            try:
+                stack.enter_context(batch_context(typed_subscriptions))
+            except Exception:
+                # The updates are still handled, just without the batched state
+                logger.exception(
+                    "Failed to set up subscription batch",
+                    extra={"subscription_type": subscription_type},
+                )
+
+    def _parse_message(self, message: Message) -> Optional[Dict[str, Any]]:
+        try:
+            with metrics.timer("snuba_query_subscriber.parse_message_value"):
+                return self.parse_message_value(message.value())
+        except InvalidMessageError:
+            # If the message is in an invalid format, just log the error
+            # and continue
+            logger.exception(
+                "Subscription update could not be parsed",
+                extra={
+                    "offset": message.offset(),
+                    "partition": message.partition(),
+                    "value": message.value(),
+                },
+            )
+            return None
 
-            sentry_sdk.set_tag("project_id", subscription.project_id)
-            sentry_sdk.set_tag("query_subscription_id", contents["subscription_id"])
-
-            callback = subscriber_registry[subscription.type]
-            with sentry_sdk.start_span(op="process_message") as span, metrics.timer(
-                "snuba_query_subscriber.callback.duration", instance=subscription.type
-            ):
-                span.set_data("payload", contents)
-                span.set_data("subscription_dataset", subscription.snuba_query.dataset)
-                span.set_data("subscription_query", subscription.snuba_query.query)
-                span.set_data("subscription_aggregation", subscription.snuba_query.aggregate)
-                span.set_data("subscription_time_window", subscription.snuba_query.time_window)
-                span.set_data("subscription_resolution", subscription.snuba_query.resolution)
-                span.set_data("message_offset", message.offset())
-                span.set_data("message_partition", message.partition())
-                span.set_data("message_value", message.value())
-
-                callback(contents, subscription)
+    def _handle_update(
+        self,
+        message: Message,
+        contents: Dict[str, Any],
+        subscription: Optional[QuerySubscription],
+    ) -> None:
+        if subscription is None:
+            self._handle_missing_subscription(message, contents)
+            return
+
+        if subscription.status != QuerySubscription.Status.ACTIVE.value:
+            metrics.incr("snuba_query_subscriber.subscription_inactive")
+            return
+
+        if subscription.type not in subscriber_registry:
+            metrics.incr("snuba_query_subscriber.subscription_type_not_registered")
+            logger.error(
+                "Received subscription update, but no subscription handler registered",
+                extra={
+                    "offset": message.offset(),
+                    "partition": message.partition(),
+                    "value": message.value(),
+                },
+            )
+            return
+
+        sentry_sdk.set_tag("project_id", subscription.project_id)
+        sentry_sdk.set_tag("query_subscription_id", contents["subscription_id"])
+
+        callback = subscriber_registry[subscription.type]
+        with sentry_sdk.start_span(op="process_message") as span, metrics.timer(
+            "snuba_query_subscriber.callback.duration", instance=subscription.type
+        ):
+            span.set_data("payload", contents)
+            span.set_data("subscription_dataset", subscription.snuba_query.dataset)
+            span.set_data("subscription_query", subscription.snuba_query.query)
+            span.set_data("subscription_aggregation", subscription.snuba_query.aggregate)
+            span.set_data("subscription_time_window", subscription.snuba_query.time_window)
+            span.set_data("subscription_resolution", subscription.snuba_query.resolution)
+            span.set_data("message_offset", message.offset())
+            span.set_data("message_partition", message.partition())
+            span.set_data("message_value", message.value())
+
+            callback(contents, subscription)
+
+    def _handle_missing_subscription(self, message: Message, contents: Dict[str, Any]) -> None:
+        metrics.incr("snuba_query_subscriber.subscription_doesnt_exist")
+        logger.error(
+            "Received subscription update, but subscription does not exist",
+            extra={
+                "offset": message.offset(),
+                "partition": message.partition(),
+                "value": message.value(),
+            },
+        )
+        try:
+            if "entity" in contents:
+                entity_key = contents["entity"]
+            else:
+                # XXX(ahmed): Remove this logic. This was kept here as backwards compat
+                # for subscription updates with schema version `2`. However schema version 3
+                # sends the "entity" in the payload
+                entity_regex = r"^(MATCH|match)[ ]*\(([^)]+)\)"
+                entity_match = re.match(entity_regex, contents["request"]["query"])
+                if not entity_match:
+                    raise InvalidMessageError("Unable to fetch entity from query in message")
+                entity_key = entity_match.group(2)
+            _delete_from_snuba(
+                self.topic_to_dataset[message.topic()],
+                contents["subscription_id"],
+                EntityKey(entity_key),
+            )
+        except InvalidMessageError as e:
+            logger.exception(e)
+        except Exception:
+            logger.exception("Failed to delete unused subscription from snuba.")
 
     def parse_message_value(self, value: str) -> Dict[str, Any]:
         """
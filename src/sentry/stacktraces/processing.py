@@ -1,18 +1,34 @@
 import logging
 from collections import OrderedDict, namedtuple
+from copy import deepcopy
 from datetime import datetime
 
 import sentry_sdk
+from django.conf import settings
 from django.utils import timezone
 
 from sentry.models import Project, Release
 from sentry.stacktraces.functions import set_in_app, trim_function_name
+from sentry.utils import metrics
 from sentry.utils.cache import cache
 from sentry.utils.hashlib import hash_values
+from sentry.utils.lru import LRUCache
 from sentry.utils.safe import get_path, safe_execute
 
 logger = logging.getLogger(__name__)
 
+# How long frame cache values are kept in the shared cache.
+FRAME_CACHE_TTL = 3600
+
+# Process-local cache in front of the shared cache, so that workers looking up
+# the same frames over and over do not have to go to the network every time.
+local_frame_cache = None
+if settings.SENTRY_PROCESSED_FRAME_CACHE_SIZE > 0:
+    local_frame_cache = LRUCache(
+        max_weight=settings.SENTRY_PROCESSED_FRAME_CACHE_SIZE,
+        ttl=settings.SENTRY_PROCESSED_FRAME_CACHE_LOCAL_TTL,
+    )
+
 StacktraceInfo = namedtuple(
     "StacktraceInfo", ["stacktrace", "container", "platforms", "is_exception"]
 )
@@ -64,7 +80,9 @@ class ProcessableFrame:
 
     def set_cache_value(self, value):
         if self.cache_key is not None:
-            cache.set(self.cache_key, value, 3600)
+            cache.set(self.cache_key, value, FRAME_CACHE_TTL)
+            if local_frame_cache is not None:
+                local_frame_cache.set(self.cache_key, value)
             return True
         return False
 
@@ -101,6 +119,12 @@ class StacktraceProcessingTask:
 
 
 class StacktraceProcessor:
+    #: If enabled, the results of `process_frame` are stored in the frame
+    #: cache under the cache key set in `preprocess_frame` and reused for
+    #: identical frames of later events instead of processing them again.
+    #: The cache key must then cover everything the result depends on.
+    cache_processed_frames = False
+
     def __init__(self, data, stacktrace_infos, project=None):
         self.data = data
         self.stacktrace_infos = stacktrace_infos
@@ -156,6 +180,13 @@ class StacktraceProcessor:
         the original input frame is assumed.
         """
 
+    def should_cache_processed_frame(self, processable_frame, result):
+        """Returns true if the result of `process_frame` for this frame can
+        be stored in the frame cache.  This is only invoked for processors
+        that enable `cache_processed_frames`.
+        """
+        return result is not None
+
     def preprocess_step(self, processing_task):
         """After frames are preprocessed but before frame processing kicks in
         the preprocessing step is run.  This already has access to the cache
@@ -370,10 +401,7 @@ def process_single_stacktrace(processing_task, stacktrace_info, processable_fram
         if idx in processable_frames:
             processable_frame = processable_frames[idx]
             assert processable_frame.frame is bare_frame
-            try:
-                rv = processable_frame.processor.process_frame(processable_frame, processing_task)
-            except Exception:
-                logger.exception("Failed to process frame")
+            rv = process_frame(processing_task, processable_frame)
 
         expand_processed, expand_raw, errors = rv or (None, None, None)
 
@@ -400,6 +428,43 @@ def process_single_stacktrace(processing_task, stacktrace_info, processable_fram
     )
 
 
+def process_frame(processing_task, processable_frame):
+    """Processes a single frame, reusing the processed frame from the frame
+    cache if the processor opted into caching its results.
+    """
+    processor = processable_frame.processor
+    use_cache = processor.cache_processed_frames and processable_frame.cache_key is not None
+
+    if use_cache and processable_frame.cache_value is not None:
+        metrics.incr(
+            "stacktraces.processing.frame_cache",
+            tags={"processor": processor.__class__.__name__, "result": "hit"},
+        )
+        # cached values are shared between events, so never hand them out
+        # directly as the frames get modified further down the pipeline.
+        cache_value = deepcopy(processable_frame.cache_value)
+        processable_frame.data = cache_value["data"]
+        return cache_value["result"]
+
+    try:
+        rv = processor.process_frame(processable_frame, processing_task)
+    except Exception:
+        logger.exception("Failed to process frame")
+        return None
+
+    if use_cache:
+        metrics.incr(
+            "stacktraces.processing.frame_cache",
+            tags={"processor": processor.__class__.__name__, "result": "miss"},
+        )
+        if processor.should_cache_processed_frame(processable_frame, rv):
+            processable_frame.set_cache_value(
+                deepcopy({"data": processable_frame.data, "result": rv})
+            )
+
+    return rv
+
+
 def get_crash_frame_from_event_data(data, frame_filter=None):
     """
     Return the highest (closest to the crash) in-app frame in the top stacktrace
@@ -442,8 +507,17 @@ def get_crash_frame_from_event_data(data, frame_filter=None):
 
 def lookup_frame_cache(keys):
     rv = {}
-    for key in keys:
-        rv[key] = cache.get(key)
+    if local_frame_cache is not None:
+        rv.update(local_frame_cache.get_many(keys))
+
+    missing = [key for key in keys if key not in rv]
+    if missing:
+        found = cache.get_many(missing)
+        for key in missing:
+            value = found.get(key)
+            if value is not None and local_frame_cache is not None:
+                local_frame_cache.set(key, value)
+            rv[key] = value
     return rv
 
 
@@ -1,10 +1,25 @@
+import asyncio
 import logging
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from time import sleep, time
-from typing import Any, Callable, Optional
+from typing import (
+    Any,
+    Callable,
+    Generator,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 import sentry_sdk
 from django.conf import settings
+from django.db import connections
 
 from sentry import options
 from sentry.eventstore import processing
@@ -29,6 +44,23 @@ SYMBOLICATOR_MAX_RETRY_AFTER: int = settings.SYMBOLICATOR_MAX_RETRY_AFTER
 # and low priority queues
 SYMBOLICATOR_MAX_QUEUE_SWITCHES = 3
 
+# The maximum number of events symbolicated by one `symbolicate_events` task,
+# with and without the `symbolicate-event.async` option
+SYMBOLICATOR_MAX_BATCH_SIZE = 16
+SYMBOLICATOR_MAX_ASYNC_BATCH_SIZE = 256
+
+# Events of a `symbolicate_events` batch are only started within this many seconds
+# of the task starting, the others are submitted again on their own. Since every
+# event takes at most the hard timeout plus processing, this bounds the whole batch
+# independently of its size.
+SYMBOLICATOR_BATCH_START_TIMEOUT = settings.SYMBOLICATOR_PROCESS_EVENT_HARD_TIMEOUT
+SYMBOLICATOR_BATCH_HARD_TIMEOUT = (
+    SYMBOLICATOR_BATCH_START_TIMEOUT + settings.SYMBOLICATOR_PROCESS_EVENT_HARD_TIMEOUT
+)
+
+# The events collected by `symbolicate_batch` on this thread
+_batch_local = threading.local()
+
 
 # The names of tasks and metrics in this file point to tasks.store instead of tasks.symbolicator
 # for legacy reasons, namely to prevent celery from dropping older tasks and needing to
@@ -101,6 +133,19 @@ def submit_symbolicate(
     else:
         task = symbolicate_event_from_reprocessing if from_reprocessing else symbolicate_event
 
+    batch = getattr(_batch_local, "events", None)
+    if batch is not None and task is symbolicate_event:
+        batch.append(
+            {
+                "cache_key": cache_key,
+                "start_time": start_time,
+                "event_id": event_id,
+                "data": data,
+                "queue_switches": queue_switches,
+            }
+        )
+        return
+
     task.delay(
         cache_key=cache_key,
         start_time=start_time,
@@ -110,6 +155,63 @@ def submit_symbolicate(
     )
 
 
+def submit_symbolicate_batch(events: Sequence[Mapping[str, Any]]) -> None:
+    """
+    Submits events for symbolication in batches, so that native events of one
+    project sharing the same modules are sent to symbolicator together.
+
+    Every event is a mapping of the arguments of `symbolicate_event`.
+    """
+    if options.get("symbolicate-event.async"):
+        batch_size = SYMBOLICATOR_MAX_ASYNC_BATCH_SIZE
+    else:
+        batch_size = SYMBOLICATOR_MAX_BATCH_SIZE
+
+    for i in range(0, len(events), batch_size):
+        symbolicate_events.delay(events=list(events[i : i + batch_size]))
+
+
+@contextmanager
+def symbolicate_batch() -> Generator[None, None, None]:
+    """
+    Collects the events submitted to the normal symbolication queue on this thread
+    within the block, and submits them with `submit_symbolicate_batch` when the block
+    is left. Does nothing unless the `symbolicate-event.batch` option is set.
+    """
+    if (
+        not options.get("symbolicate-event.batch")
+        or getattr(_batch_local, "events", None) is not None
+    ):
+        yield
+        return
+
+    events: List[Mapping[str, Any]] = []
+    _batch_local.events = events
+    try:
+        yield
+    finally:
+        _batch_local.events = None
+        if events:
+            submit_symbolicate_batch(events)
+
+
+def _resubmit_events(
+    events: Sequence[Mapping[str, Any]],
+    symbolicate_task: Callable[[Optional[str], Optional[int], Optional[str]], None],
+) -> None:
+    metrics.incr("tasks.symbolication.batch.resubmitted", amount=len(events))
+    for event in events:
+        submit_symbolicate(
+            is_low_priority=symbolicate_task is symbolicate_event_low_priority,
+            from_reprocessing=False,
+            cache_key=event["cache_key"],
+            event_id=event.get("event_id"),
+            start_time=event.get("start_time"),
+            data=event.get("data"),
+            queue_switches=event.get("queue_switches", 0),
+        )
+
+
 def _do_symbolicate_event(
     cache_key: str,
     start_time: Optional[int],
@@ -117,7 +219,34 @@ def _do_symbolicate_event(
     symbolicate_task: Callable[[Optional[str], Optional[int], Optional[str]], None],
     data: Optional[Event] = None,
     queue_switches: int = 0,
+    symbolication_function: Optional[Callable[[Any], Any]] = None,
 ) -> None:
+    for retry_after in _symbolicate_event_steps(
+        cache_key=cache_key,
+        start_time=start_time,
+        event_id=event_id,
+        symbolicate_task=symbolicate_task,
+        data=data,
+        queue_switches=queue_switches,
+        symbolication_function=symbolication_function,
+    ):
+        sleep(retry_after)
+
+
+def _symbolicate_event_steps(
+    cache_key: str,
+    start_time: Optional[int],
+    event_id: Optional[str],
+    symbolicate_task: Callable[[Optional[str], Optional[int], Optional[str]], None],
+    data: Optional[Event] = None,
+    queue_switches: int = 0,
+    symbolication_function: Optional[Callable[[Any], Any]] = None,
+) -> Iterator[float]:
+    """
+    Symbolicates an event and continues to process it. Whenever symbolicator
+    asks to retry later, this yields the number of seconds to wait before
+    resuming the iterator.
+    """
     from sentry.lang.native.processing import get_symbolication_function
 
     if data is None:
@@ -180,7 +309,8 @@ def _do_symbolicate_event(
             from_symbolicate=True,
         )
 
-    symbolication_function = get_symbolication_function(data)
+    if symbolication_function is None:
+        symbolication_function = get_symbolication_function(data)
     symbolication_function_name = getattr(symbolication_function, "__name__", "none")
 
     if killswitch_matches_context(
@@ -267,7 +397,7 @@ def _do_symbolicate_event(
                             if e.retry_after is None
                             else min(e.retry_after, SYMBOLICATOR_MAX_RETRY_AFTER)
                         )
-                        sleep(sleep_time)
+                        yield sleep_time
                         continue
                 except Exception:
                     metrics.incr(
@@ -421,3 +551,152 @@ def symbolicate_event_from_reprocessing_low_priority(
         data=data,
         queue_switches=queue_switches,
     )
+
+
+def _do_symbolicate_events(
+    events: Sequence[Mapping[str, Any]],
+    symbolicate_task: Callable[[Optional[str], Optional[int], Optional[str]], None],
+) -> None:
+    from sentry.lang.native.processing import (
+        PayloadBatch,
+        get_symbolication_function,
+        process_payload,
+    )
+
+    datas = [
+        event.get("data") or processing.event_processing_store.get(event["cache_key"])
+        for event in events
+    ]
+
+    batch = PayloadBatch(
+        [
+            data
+            for data in datas
+            if data is not None and get_symbolication_function(data) is process_payload
+        ]
+    )
+
+    steps = [
+        _symbolicate_event_steps(
+            cache_key=event["cache_key"],
+            start_time=event.get("start_time"),
+            event_id=event.get("event_id"),
+            symbolicate_task=symbolicate_task,
+            data=data,
+            queue_switches=event.get("queue_switches", 0),
+            symbolication_function=(
+                batch.process_payload if data is not None and data["event_id"] in batch else None
+            ),
+        )
+        for event, data in zip(events, datas)
+    ]
+
+    deadline = time() + SYMBOLICATOR_BATCH_START_TIMEOUT
+    if options.get("symbolicate-event.async"):
+        project_ids = [data["project"] if data is not None else None for data in datas]
+        expired, failed = _run_symbolication_steps_async(steps, project_ids, deadline)
+        resubmit = sorted(expired + failed)
+        if resubmit:
+            _resubmit_events([events[i] for i in resubmit], symbolicate_task)
+    else:
+        for i, event_steps in enumerate(steps):
+            if time() > deadline:
+                _resubmit_events(events[i:], symbolicate_task)
+                break
+            for retry_after in event_steps:
+                sleep(retry_after)
+
+
+def _run_symbolication_steps_async(
+    steps: Sequence[Iterator[float]], project_ids: Sequence[Optional[int]], deadline: float
+) -> Tuple[Sequence[int], Sequence[int]]:
+    """
+    Runs the symbolication of several events on an event loop. Instead of
+    blocking the worker while symbolicator asks to retry later, other events
+    make progress in the meantime.
+
+    Events that could not be started before `deadline` are skipped, events
+    whose steps raised are aborted. The indexes of both are returned so they
+    can be submitted again.
+
+    Each step runs on a thread pool with its own hub, since steps call
+    symbolicator and the database synchronously. The number of events in flight
+    per project is limited, projects that should be demoted to the low priority
+    queue get a lower limit.
+    """
+    done = object()
+    limits = {}
+    expired: List[int] = []
+    failed: List[int] = []
+
+    def get_limit(project_id: Optional[int]) -> asyncio.Semaphore:
+        if project_id not in limits:
+            if project_id is not None and should_demote_symbolication(project_id):
+                limit = settings.SYMBOLICATOR_ASYNC_LOW_PRIORITY_PROJECT_CONCURRENCY
+            else:
+                limit = settings.SYMBOLICATOR_ASYNC_PROJECT_CONCURRENCY
+            limits[project_id] = asyncio.Semaphore(limit)
+        return limits[project_id]
+
+    def step(event_steps: Iterator[float], hub: sentry_sdk.Hub) -> Any:
+        with hub:
+            rv = next(event_steps, done)
+        if rv is done:
+            # Threads of the pool do not outlive this task
+            connections.close_all()
+        return rv
+
+    async def run(index: int, event_steps: Iterator[float], project_id: Optional[int]) -> None:
+        loop = asyncio.get_event_loop()
+        hub = sentry_sdk.Hub(sentry_sdk.Hub.current)
+        async with get_limit(project_id):
+            if time() > deadline:
+                expired.append(index)
+                return
+            while True:
+                retry_after = await loop.run_in_executor(executor, step, event_steps, hub)
+                if retry_after is done:
+                    return
+                await asyncio.sleep(retry_after)
+
+    async def run_all() -> None:
+        results = await asyncio.gather(
+            *(
+                run(index, event_steps, project_id)
+                for index, (event_steps, project_id) in enumerate(zip(steps, project_ids))
+            ),
+            return_exceptions=True,
+        )
+        for index, result in enumerate(results):
+            if isinstance(result, Exception):
+                error_logger.error("symbolicate.async.failed", exc_info=result)
+                failed.append(index)
+
+    metrics.timing("tasks.symbolication.async.batch_size", len(steps))
+    with ThreadPoolExecutor(settings.SYMBOLICATOR_ASYNC_MAX_REQUESTS) as executor:
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(run_all())
+        finally:
+            loop.close()
+
+    return expired, failed
+
+
+@instrumented_task(  # type: ignore
+    name="sentry.tasks.symbolication.symbolicate_events",
+    queue="events.symbolicate_event",
+    time_limit=SYMBOLICATOR_BATCH_HARD_TIMEOUT + 30,
+    soft_time_limit=SYMBOLICATOR_BATCH_HARD_TIMEOUT + 20,
+    acks_late=True,
+)
+def symbolicate_events(events: Sequence[Mapping[str, Any]], **kwargs: Any) -> None:
+    """
+    Handles the symbolication of several events like `symbolicate_event`.
+
+    Native stack traces of events of the same project that share their modules
+    are symbolicated in a single symbolicator request.
+
+    :param list events: the arguments of `symbolicate_event` for every event
+    """
+    return _do_symbolicate_events(events=events, symbolicate_task=symbolicate_event)
@@ -41,6 +41,7 @@ def Feature(names):
         names = {k: True for k in names}
 
     default_features = sentry.features.has
+    default_features_for_objects = sentry.features.has_for_objects
 
     def features_override(name, *args, **kwargs):
         if name in names:
@@ -64,11 +65,20 @@ def Feature(names):
             feature_names = {name: True for name in names if name.startswith("organization")}
             return {f"organization:{organization.id}": feature_names}
 
+    def features_for_objects_override(feature_names, objects, *args, **kwargs):
+        overridden = {name: names[name] for name in feature_names if name in names}
+        result = default_features_for_objects(
+            [name for name in feature_names if name not in names], objects, *args, **kwargs
+        )
+        return {obj: {**flags, **overridden} for obj, flags in result.items()}
+
     with patch("sentry.features.has") as features_has:
         features_has.side_effect = features_override
         with patch("sentry.features.batch_has") as features_batch_has:
             features_batch_has.side_effect = batch_features_override
-            yield
+            with patch("sentry.features.has_for_objects") as features_has_for_objects:
+                features_has_for_objects.side_effect = features_for_objects_override
+                yield
 
 
 def with_feature(feature):
@@ -122,6 +122,7 @@ class BaseTSDB(Service):
             "merge_distinct_counts",
             "delete_distinct_counts",
             "record_frequency_multi",
+            "record_batch",
             "merge_frequencies",
             "delete_frequencies",
             "flush",
@@ -406,6 +407,32 @@ class BaseTSDB(Service):
         for model, key, values in items:
             self.record(model, key, values, timestamp, environment_id=environment_id)
 
+    def record_batch(self, incrs=(), records=(), frequencies=()):
+        """
+        Perform the writes of many ``incr_multi``, ``record_multi`` and
+        ``record_frequency_multi`` calls at once, for instance for all events
+        of a batch. Backends may merge and pipeline these writes.
+
+        Each argument is a sequence of ``(items, timestamp, environment_id)``
+        tuples, where ``items`` is what the corresponding method accepts:
+
+        >>> record_batch(
+        ...     incrs=[([(TimeSeriesModel.project, 1)], timestamp, environment_id)],
+        ...     records=[([(TimeSeriesModel.users_affected_by_project, 1, ("foo",))], timestamp, environment_id)],
+        ...     frequencies=[([(TimeSeriesModel.frequent_environments_by_group, {5: {1: 1}})], timestamp, None)],
+        ... )
+        """
+        for items, timestamp, environment_id in incrs:
+            self.incr_multi(items, timestamp=timestamp, environment_id=environment_id)
+
+        for items, timestamp, environment_id in records:
+            self.record_multi(items, timestamp=timestamp, environment_id=environment_id)
+
+        for requests, timestamp, environment_id in frequencies:
+            self.record_frequency_multi(
+                requests, timestamp=timestamp, environment_id=environment_id
+            )
+
     def get_distinct_counts_series(
         self, model, keys, start, end=None, rollup=None, environment_id=None
     ):
@@ -12,6 +12,7 @@ from django.utils.encoding import force_bytes
 from pkg_resources import resource_string
 
 from sentry.tsdb.base import BaseTSDB
+from sentry.utils import metrics
 from sentry.utils.compat import crc32, map, zip
 from sentry.utils.dates import to_datetime, to_timestamp
 from sentry.utils.redis import SentryScript, check_cluster_versions, get_cluster_from_options
@@ -50,6 +51,26 @@ class SuppressionWrapper:
         return True
 
 
+class _BatchOperations:
+    """
+    Writes collected by ``RedisTSDB.record_batch`` for a single cluster.
+    """
+
+    def __init__(self):
+        # (hash_key, hash_field) -> count
+        self.counters = defaultdict(int)
+        # hash_key -> "max expiration encountered"
+        self.counter_expiries = defaultdict(float)
+        # distinct counter key -> routing (TSDB) key
+        self.distinct_keys = {}
+        # distinct counter key -> values
+        self.distinct_values = defaultdict(set)
+        # distinct counter key -> "max expiration encountered"
+        self.distinct_expiries = defaultdict(float)
+        # (model, key, ts, environment_ids) -> (timestamp, {member: score})
+        self.frequencies = {}
+
+
 class RedisTSDB(BaseTSDB):
     """
     A time series storage backend for Redis.
@@ -232,33 +253,45 @@ class RedisTSDB(BaseTSDB):
                 # (hash_key) -> "max expiration encountered"
                 key_expiries = defaultdict(lambda: 0.0)
 
-                for rollup, max_values in self.rollups.items():
-                    for item in items:
-                        if len(item) == 2:
-                            model, key = item
-                            options = {}
-                        else:
-                            model, key, options = item
+                self._add_counter_operations(
+                    key_operations,
+                    key_expiries,
+                    items,
+                    default_timestamp,
+                    default_count,
+                    environment_ids,
+                )
 
-                        count = options.get("count", default_count)
-                        timestamp = options.get("timestamp", default_timestamp)
+                for (hash_key, hash_field), count in key_operations.items():
+                    client.hincrby(hash_key, hash_field, count)
+                    if key_expiries.get(hash_key):
+                        client.expireat(hash_key, key_expiries.pop(hash_key))
 
-                        expiry = self.calculate_expiry(rollup, max_values, timestamp)
+    def _add_counter_operations(
+        self, key_operations, key_expiries, items, default_timestamp, default_count, environment_ids
+    ):
+        for rollup, max_values in self.rollups.items():
+            for item in items:
+                if len(item) == 2:
+                    model, key = item
+                    options = {}
+                else:
+                    model, key, options = item
 
-                        for environment_id in environment_ids:
-                            hash_key, hash_field = self.make_counter_key(
-                                model, rollup, timestamp, key, environment_id
-                            )
+                count = options.get("count", default_count)
+                timestamp = options.get("timestamp", default_timestamp)
 
-                            if key_expiries[hash_key] < expiry:
-                                key_expiries[hash_key] = expiry
+                expiry = self.calculate_expiry(rollup, max_values, timestamp)
 
-                            key_operations[(hash_key, hash_field)] += count
+                for environment_id in environment_ids:
+                    hash_key, hash_field = self.make_counter_key(
+                        model, rollup, timestamp, key, environment_id
+                    )
 
-                for (hash_key, hash_field), count in key_operations.items():
-                    client.hincrby(hash_key, hash_field, count)
-                    if key_expiries.get(hash_key):
-                        client.expireat(hash_key, key_expiries.pop(hash_key))
+                    if key_expiries[hash_key] < expiry:
+                        key_expiries[hash_key] = expiry
+
+                    key_operations[(hash_key, hash_field)] += count
 
     def get_range(
         self, model, keys, start, end, rollup=None, environment_ids=None, use_cache=False
@@ -662,39 +695,148 @@ class RedisTSDB(BaseTSDB):
 
             for model, request in requests:
                 for key, items in request.items():
-                    keys = []
-                    expirations = {}
+                    # Since we're essentially merging dictionaries, we need to
+                    # append this to any value that already exists at the key.
+                    commands.setdefault(key, []).extend(
+                        self._make_frequency_commands(
+                            model, key, items, ts, timestamp, environment_ids
+                        )
+                    )
 
-                    # Figure out all of the keys we need to be incrementing, as
-                    # well as their expiration policies.
-                    for rollup, max_values in self.rollups.items():
-                        for environment_id in environment_ids:
-                            chunk = self.make_frequency_table_keys(
-                                model, rollup, ts, key, environment_id
-                            )
-                            keys.extend(chunk)
+            try:
+                cluster.execute_commands(commands)
+            except Exception:
+                if durable:
+                    raise
+
+    def record_batch(self, incrs=(), records=(), frequencies=()):
+        """
+        Pipelined implementation of ``BaseTSDB.record_batch``.
+
+        Counter increments of the same hash field, distinct counter values of
+        the same key and frequency table scores of the same key are merged
+        locally. The resulting commands are then sent with a single pipeline
+        per Redis host of each cluster, instead of one round trip per host for
+        every ``incr_multi``, ``record_multi`` and ``record_frequency_multi``
+        call.
+        """
+        # (cluster, durable) -> _BatchOperations
+        batches = defaultdict(_BatchOperations)
+
+        for items, timestamp, environment_id in incrs:
+            self.validate_arguments([item[0] for item in items], [environment_id])
+            if timestamp is None:
+                timestamp = timezone.now()
+
+            for cluster_key, environment_ids in self.get_cluster_groups({None, environment_id}):
+                batch = batches[cluster_key]
+                self._add_counter_operations(
+                    batch.counters, batch.counter_expiries, items, timestamp, 1, environment_ids
+                )
 
+        for items, timestamp, environment_id in records:
+            self.validate_arguments([model for model, key, values in items], [environment_id])
+            if timestamp is None:
+                timestamp = timezone.now()
+
+            ts = int(to_timestamp(timestamp))  # ``timestamp`` is not actually a timestamp :(
+
+            for cluster_key, environment_ids in self.get_cluster_groups({None, environment_id}):
+                batch = batches[cluster_key]
+                for model, key, values in items:
+                    for rollup, max_values in self.rollups.items():
                         expiry = self.calculate_expiry(rollup, max_values, timestamp)
-                        for k in chunk:
-                            expirations[k] = expiry
+                        for environment_id in environment_ids:
+                            k = self.make_key(model, rollup, ts, key, environment_id)
+                            # distinct counters are routed by their (TSDB) key,
+                            # see ``record_multi``
+                            batch.distinct_keys[k] = key
+                            batch.distinct_values[k].update(values)
+                            if batch.distinct_expiries[k] < expiry:
+                                batch.distinct_expiries[k] = expiry
+
+        for requests, timestamp, environment_id in frequencies:
+            self.validate_arguments([model for model, request in requests], [environment_id])
+            if not self.enable_frequency_sketches:
+                continue
+            if timestamp is None:
+                timestamp = timezone.now()
+
+            ts = int(to_timestamp(timestamp))  # ``timestamp`` is not actually a timestamp :(
+
+            for cluster_key, environment_ids in self.get_cluster_groups({None, environment_id}):
+                batch = batches[cluster_key]
+                for model, request in requests:
+                    for key, items in request.items():
+                        table = (model, key, ts, tuple(environment_ids))
+                        if table not in batch.frequencies:
+                            batch.frequencies[table] = (timestamp, defaultdict(float))
+                        scores = batch.frequencies[table][1]
+                        for member, score in items.items():
+                            scores[member] += score
+
+        for (cluster, durable), batch in batches.items():
+            commands = defaultdict(list)
+
+            for (hash_key, hash_field), count in batch.counters.items():
+                commands[hash_key].append(("HINCRBY", hash_key, hash_field, count))
+            for hash_key, expiry in batch.counter_expiries.items():
+                commands[hash_key].append(("EXPIREAT", hash_key, expiry))
+
+            for k, key in batch.distinct_keys.items():
+                commands[key].append(("PFADD", k, *batch.distinct_values[k]))
+                commands[key].append(("EXPIREAT", k, batch.distinct_expiries[k]))
+
+            for (model, key, ts, environment_ids), (timestamp, scores) in batch.frequencies.items():
+                commands[key].extend(
+                    self._make_frequency_commands(
+                        model, key, scores, ts, timestamp, environment_ids
+                    )
+                )
 
-                    arguments = ["INCR"] + list(self.DEFAULT_SKETCH_PARAMETERS)
-                    for member, score in items.items():
-                        arguments.extend((score, member))
+            if not commands:
+                continue
 
-                    # Since we're essentially merging dictionaries, we need to
-                    # append this to any value that already exists at the key.
-                    cmds = commands.setdefault(key, [])
-                    cmds.append((CountMinScript, keys, arguments))
-                    for k, t in expirations.items():
-                        cmds.append(("EXPIREAT", k, t))
+            router = cluster.get_router()
+            commands_per_host = defaultdict(int)
+            for key, cmds in commands.items():
+                commands_per_host[router.get_host_for_key(key)] += len(cmds)
+            for host_id, count in commands_per_host.items():
+                metrics.timing("tsdb.record_batch.commands", count, tags={"host_id": host_id})
 
             try:
-                cluster.execute_commands(commands)
+                with metrics.timer(
+                    "tsdb.record_batch.execute", tags={"hosts": len(commands_per_host)}
+                ):
+                    cluster.execute_commands(commands)
             except Exception:
                 if durable:
                     raise
 
+    def _make_frequency_commands(self, model, key, items, ts, timestamp, environment_ids):
+        keys = []
+        expirations = {}
+
+        # Figure out all of the keys we need to be incrementing, as
+        # well as their expiration policies.
+        for rollup, max_values in self.rollups.items():
+            for environment_id in environment_ids:
+                chunk = self.make_frequency_table_keys(model, rollup, ts, key, environment_id)
+                keys.extend(chunk)
+
+            expiry = self.calculate_expiry(rollup, max_values, timestamp)
+            for k in chunk:
+                expirations[k] = expiry
+
+        arguments = ["INCR"] + list(self.DEFAULT_SKETCH_PARAMETERS)
+        for member, score in items.items():
+            arguments.extend((score, member))
+
+        cmds = [(CountMinScript, keys, arguments)]
+        for k, t in expirations.items():
+            cmds.append(("EXPIREAT", k, t))
+        return cmds
+
     def get_most_frequent(
         self, model, keys, start, end=None, rollup=None, limit=None, environment_id=None
     ):
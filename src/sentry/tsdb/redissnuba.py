@@ -1,5 +1,6 @@
 import inspect
 import time
+from collections import defaultdict
 
 from sentry.tsdb.base import BaseTSDB
 from sentry.tsdb.dummy import DummyTSDB
@@ -18,6 +19,15 @@ def multiple_model_argument(callargs):
     return set(callargs["models"])
 
 
+def batch_models_argument(callargs):
+    return {
+        item[0]
+        for key in ("incrs", "records", "frequencies")
+        for items, timestamp, environment_id in callargs.get(key, ())
+        for item in items
+    }
+
+
 def dont_do_this(callargs):
     raise NotImplementedError("do not run this please")
 
@@ -45,6 +55,7 @@ method_specifications = {
         WRITE,
         lambda callargs: {model for model, data in callargs["requests"]},
     ),
+    "record_batch": (WRITE, batch_models_argument),
     "merge_frequencies": (WRITE, single_model_argument),
     "delete_frequencies": (WRITE, multiple_model_argument),
     "flush": (WRITE, dont_do_this),
@@ -89,10 +100,12 @@ def make_method(key):
 # a metaclass since we can't simply overload `__getattr__` due to
 # the fact that the subclass BaseTSDB already defines all the methods.
 # So we need to actually apply methods on top to override them.
+# Methods defined on RedisSnubaTSDB itself are left as they are.
 class RedisSnubaTSDBMeta(type):
     def __new__(cls, name, bases, attrs):
         for key in method_specifications.keys():
-            attrs[key] = make_method(key)
+            if key not in attrs:
+                attrs[key] = make_method(key)
         return type.__new__(cls, name, bases, attrs)
 
 
@@ -121,3 +134,27 @@ class RedisSnubaTSDB(BaseTSDB, metaclass=RedisSnubaTSDBMeta):
             "snuba": SnubaTSDB(**options.pop("snuba", {})),
         }
         super().__init__(**options)
+
+    def record_batch(self, incrs=(), records=(), frequencies=()):
+        """
+        A batch usually spans models of several backends, so instead of routing
+        it as a whole its writes are split up and every backend receives a
+        single batch with the writes for its models.
+        """
+        batches = defaultdict(lambda: {"incrs": [], "records": [], "frequencies": []})
+        for key, writes in (("incrs", incrs), ("records", records), ("frequencies", frequencies)):
+            for items, timestamp, environment_id in writes:
+                items_by_backend = defaultdict(list)
+                for item in items:
+                    backend = selector_func(
+                        "record_batch",
+                        {key: [([item], timestamp, environment_id)]},
+                        self.switchover_timestamp,
+                    )
+                    items_by_backend[backend].append(item)
+
+                for backend, backend_items in items_by_backend.items():
+                    batches[backend][key].append((backend_items, timestamp, environment_id))
+
+        for backend, batch in batches.items():
+            self.backends[backend].record_batch(**batch)
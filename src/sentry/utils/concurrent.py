@@ -275,3 +275,143 @@ class FutureSet:
 
         if remaining == 0:
             self.__execute_callback(callback)
+
+
+class KeyedThreadedExecutor(Executor):
+    """\
+    This executor runs callables in a threaded worker pool like
+    ``ThreadedExecutor``, but every callable is submitted under a key (for
+    instance the referrer of a query.)
+
+    At most ``key_limit(key)`` callables of the same key run at the same time,
+    and workers take turns between all keys that have callables waiting, so
+    that a key submitting many callables at once cannot starve the others. The
+    limit must be at least 1, otherwise callables of that key never run.
+
+    All threads are daemon threads and will remain alive until the main thread
+    exits. Any items remaining in the queue at this point may not be executed!
+    """
+
+    def __init__(self, worker_count=1, key_limit=None):
+        self.__worker_count = worker_count
+        self.__key_limit = key_limit or (lambda key: worker_count)
+        self.__workers = set()
+        self.__started = False
+        self.__lock = threading.Lock()
+        self.__condition = threading.Condition()
+        # keys with waiting callables, in the order they get their next turn
+        self.__queues = collections.OrderedDict()
+        self.__running = collections.Counter()
+
+    def __next_task(self):
+        for key in list(self.__queues):
+            if self.__running[key] >= self.__key_limit(key):
+                continue
+            queue = self.__queues.pop(key)
+            task = queue.popleft()
+            if queue:
+                # move the key to the back of the line
+                self.__queues[key] = queue
+            self.__running[key] += 1
+            return key, task
+
+    def __worker(self):
+        while True:
+            with self.__condition:
+                item = self.__next_task()
+                while item is None:
+                    self.__condition.wait()
+                    item = self.__next_task()
+
+            key, (function, future) = item
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        result = function()
+                    except Exception as e:
+                        future.set_exception(e)
+                    else:
+                        future.set_result(result)
+            finally:
+                with self.__condition:
+                    self.__running[key] -= 1
+                    if not self.__running[key]:
+                        del self.__running[key]
+                    self.__condition.notify_all()
+
+    def start(self):
+        with self.__lock:
+            if self.__started:
+                return
+
+            for i in range(self.__worker_count):
+                t = threading.Thread(target=self.__worker)
+                t.daemon = True
+                t.start()
+                self.__workers.add(t)
+
+            self.__started = True
+
+    def submit(self, callable, key=None):
+        """\
+        Enqueue a task to be executed under ``key``, returning a
+        ``TimedFuture``.
+
+        If the worker pool has not already been started, calling this method
+        will cause all of the worker threads to start running.
+
+        Raises ``ValueError`` if the limit of ``key`` is below 1.
+        """
+        limit = self.__key_limit(key)
+        if limit < 1:
+            raise ValueError(f"Invalid limit {limit!r} for key {key!r}, must be at least 1")
+
+        if not self.__started:
+            self.start()
+
+        future = self.Future()
+        with self.__condition:
+            self.__queues.setdefault(key, collections.deque()).append((callable, future))
+            self.__condition.notify()
+        return future
+
+
+class SingleFlight:
+    """\
+    Deduplicates concurrent calls: while a call for a key is in flight, other
+    callers with the same key wait for and share its outcome instead of
+    making the same call again.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__calls = {}
+
+    def call(self, key, function):
+        """\
+        Returns a tuple ``(result, shared)`` of the result of ``function``
+        and whether it was shared with another caller. Exceptions raised by
+        ``function`` are raised to all callers.
+        """
+        with self.__lock:
+            future = self.__calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.__calls[key] = Future()
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = function()
+        except BaseException as e:
+            # also hand out interruptions, waiters would block forever otherwise
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+
+        return result, False
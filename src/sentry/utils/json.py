@@ -95,10 +95,17 @@ def dump(value: JSONData, fp, **kwargs):
         fp.write(chunk)
 
 
-def dumps(value: JSONData, escape: bool = False, **kwargs) -> str:
+def dumps(value: JSONData, escape: bool = False, use_rapid_json: bool = False, **kwargs) -> str:
     # Legacy use. Do not use. Use dumps_htmlsafe
     if escape:
         return _default_escaped_encoder.encode(value)
+    if use_rapid_json is True:
+        try:
+            return rapidjson.dumps(value)
+        except (TypeError, ValueError):
+            # rapidjson neither serializes NaN nor non-string keys nor types
+            # handled by `better_default_encoder`
+            pass
     return _default_encoder.encode(value)
 
 
@@ -0,0 +1,134 @@
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Callable, Generic, Hashable, Iterable, MutableMapping, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A thread-safe, process-local LRU cache bounded by the total weight of its
+    values rather than by the number of items.
+
+    ``weigher`` returns the weight of a value (for instance its size in bytes),
+    by default every value weighs 1. Values heavier than ``max_weight`` are
+    never stored. Items can optionally expire after ``ttl`` seconds.
+    ``on_evict`` is called with the key and value of every item that is
+    evicted to make room for others, for instance to close it.
+
+    >>> cache = LRUCache(max_weight=1024 * 1024, weigher=len)
+    >>> cache.set("key", b"value")
+    >>> cache.get("key")
+    b'value'
+    """
+
+    def __init__(
+        self,
+        max_weight: int,
+        weigher: Optional[Callable[[V], int]] = None,
+        ttl: Optional[float] = None,
+        on_evict: Optional[Callable[[K, V], None]] = None,
+    ) -> None:
+        assert max_weight > 0
+        self.max_weight = max_weight
+        self.weigher = weigher or (lambda value: 1)
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.weight = 0
+        self._lock = threading.Lock()
+        # key -> (value, weight, expires)
+        self._items: MutableMapping[K, Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: K) -> bool:
+        return self._get(key) is not None
+
+    def _get(self, key: K) -> Any:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        if item[2] is not None and item[2] <= monotonic():
+            self._pop(key)
+            return None
+        self._items.move_to_end(key)
+        return item
+
+    def _pop(self, key: K) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.weight -= item[1]
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        with self._lock:
+            item = self._get(key)
+        return default if item is None else item[0]
+
+    def get_many(self, keys: Iterable[K]) -> MutableMapping[K, V]:
+        """
+        Returns a mapping containing only the keys that are cached.
+        """
+        rv = {}
+        with self._lock:
+            for key in keys:
+                item = self._get(key)
+                if item is not None:
+                    rv[key] = item[0]
+        return rv
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        weight = self.weigher(value)
+        ttl = self.ttl if ttl is None else ttl
+        expires = monotonic() + ttl if ttl is not None else None
+        evicted = []
+        with self._lock:
+            self._pop(key)
+            if weight > self.max_weight:
+                return
+            self._items[key] = (value, weight, expires)
+            self.weight += weight
+            while self.weight > self.max_weight:
+                evicted_key, (evicted_value, evicted_weight, _) = self._items.popitem(last=False)
+                self.weight -= evicted_weight
+                evicted.append((evicted_key, evicted_value))
+
+        if self.on_evict is not None:
+            for evicted_key, evicted_value in evicted:
+                self.on_evict(evicted_key, evicted_value)
+
+    def delete(self, key: K) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def pop(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """
+        Removes ``key`` and returns its value, or ``default`` if it is not cached.
+        """
+        with self._lock:
+            item = self._get(key)
+            self._pop(key)
+        return default if item is None else item[0]
+
+    def delete_many(self, keys: Iterable[K]) -> None:
+        with self._lock:
+            for key in keys:
+                self._pop(key)
+
+    def delete_where(self, predicate: Callable[[K], bool]) -> int:
+        """
+        Removes all keys matching ``predicate`` and returns how many were
+        removed.
+        """
+        with self._lock:
+            keys = [key for key in self._items if predicate(key)]
+            for key in keys:
+                self._pop(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.weight = 0
@@ -100,6 +100,9 @@ def pytest_configure(config):
     settings.CELERY_ALWAYS_EAGER = False
     settings.CELERY_EAGER_PROPAGATES_EXCEPTIONS = True
 
+    # Queries made from other threads can't see the data of the test transaction
+    settings.SENTRY_GROUP_SERIALIZER_THREADS = 0
+
     settings.DEBUG_VIEWS = True
     settings.SERVE_UPLOADED_FILES = True
 
@@ -259,6 +262,15 @@ def pytest_runtest_teardown(item):
     for model in (OrganizationOption, ProjectOption, UserOption):
         model.objects.clear_local_cache()
 
+    from sentry.stacktraces.processing import local_frame_cache
+
+    if local_frame_cache is not None:
+        local_frame_cache.clear()
+
+    from sentry.sentry_metrics.indexer.postgres import indexer_cache
+
+    indexer_cache.clear()
+
     Hub.main.bind_client(None)
 
 
@@ -33,6 +33,19 @@ def request_cache(func):
     return wrapped
 
 
+def get_request_cache(name):
+    """
+    Returns a dict, private to ``name``, that is cleared when the current
+    request finishes, or None if there is no request.
+    """
+    if app.env.request is None:
+        return None
+
+    if not hasattr(_cache, "items"):
+        _cache.items = {}
+    return _cache.items.setdefault(name, {})
+
+
 def clear_cache(**kwargs):
     _cache.items = {}
 
@@ -3,9 +3,10 @@ import logging
 import os
 import random
 import re
+import threading
 import time
+import zlib
 from collections import OrderedDict, namedtuple
-from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from copy import deepcopy
 from datetime import datetime, timedelta
@@ -41,7 +42,10 @@ from sentry.snuba.dataset import Dataset
 from sentry.snuba.events import Columns
 from sentry.utils import json, metrics
 from sentry.utils.compat import map
+from sentry.utils.concurrent import KeyedThreadedExecutor, SingleFlight
 from sentry.utils.dates import outside_retention_with_modified_start, to_timestamp
+from sentry.utils.locking import UnableToAcquireLock
+from sentry.utils.locking.lock import Lock
 
 logger = logging.getLogger(__name__)
 
@@ -339,9 +343,21 @@ _snuba_pool = connection_from_url(
         method_whitelist={"GET", "POST", "DELETE"},
     ),
     timeout=settings.SENTRY_SNUBA_TIMEOUT,
-    maxsize=10,
+    maxsize=settings.SENTRY_SNUBA_CONNECTION_POOL_SIZE,
 )
-_query_thread_pool = ThreadPoolExecutor(max_workers=10)
+
+
+def _get_referrer_concurrency(referrer):
+    return settings.SENTRY_SNUBA_REFERRER_CONCURRENCY.get(
+        referrer,
+        settings.SENTRY_SNUBA_DEFAULT_REFERRER_CONCURRENCY or settings.SENTRY_SNUBA_QUERY_THREADS,
+    )
+
+
+_query_thread_pool = KeyedThreadedExecutor(
+    worker_count=settings.SENTRY_SNUBA_QUERY_THREADS, key_limit=_get_referrer_concurrency
+)
+_inflight_queries = SingleFlight()
 
 
 epoch_naive = datetime(1970, 1, 1, tzinfo=None)
@@ -737,36 +753,203 @@ def _apply_cache_and_build_results(
     query_param_list = list(enumerate(snuba_param_list))
 
     results = []
+    # queries whose result another caller is putting into the cache
+    to_wait: List[Tuple[int, SnubaQueryBody, str]] = []
 
-    if use_cache:
+    if use_cache or referrer in settings.SENTRY_SNUBA_CACHE_REFERRERS:
         cache_keys = [get_cache_key(query_params[0]) for _, query_params in query_param_list]
         cache_data = cache.get_many(cache_keys)
-        to_query: List[Tuple[int, SnubaQueryBody, Optional[str]]] = []
+        to_query: List[Tuple[int, SnubaQueryBody, Optional[str], Optional[Lock]]] = []
         for (query_pos, query_params), cache_key in zip(query_param_list, cache_keys):
-            cached_result = cache_data.get(cache_key)
+            cached_result = _decode_cached_result(cache_data.get(cache_key))
             metric_tags = {"referrer": referrer} if referrer else None
-            if cached_result is None:
-                metrics.incr("snuba.query_cache.miss", tags=metric_tags)
-                to_query.append((query_pos, query_params, cache_key))
-            else:
+            if cached_result is not None and cached_result[1]:
                 metrics.incr("snuba.query_cache.hit", tags=metric_tags)
-                results.append((query_pos, json.loads(cached_result)))
+                results.append((query_pos, cached_result[0]))
+                continue
+
+            lock = _start_cache_fill(cache_key)
+            if lock is not None:
+                metrics.incr(
+                    "snuba.query_cache.miss"
+                    if cached_result is None
+                    else "snuba.query_cache.refresh",
+                    tags=metric_tags,
+                )
+                to_query.append((query_pos, query_params, cache_key, lock))
+            elif cached_result is not None:
+                # somebody else is refreshing it already
+                metrics.incr("snuba.query_cache.stale", tags=metric_tags)
+                results.append((query_pos, cached_result[0]))
+            else:
+                metrics.incr("snuba.query_cache.miss", tags=metric_tags)
+                to_wait.append((query_pos, query_params, cache_key))
     else:
-        to_query = [(query_pos, query_params, None) for query_pos, query_params in query_param_list]
+        to_query = [
+            (query_pos, query_params, None, None) for query_pos, query_params in query_param_list
+        ]
 
     if to_query:
-        query_results = _bulk_snuba_query(map(itemgetter(1), to_query), headers)
-        for result, (query_pos, _, cache_key) in zip(query_results, to_query):
-            if cache_key:
-                cache.set(cache_key, json.dumps(result), settings.SENTRY_SNUBA_CACHE_TTL_SECONDS)
-            results.append((query_pos, result))
+        results.extend(_query_and_fill_cache(to_query, headers))
+
+    if to_wait:
+        to_retry = []
+        for query_pos, query_params, cache_key in to_wait:
+            result = _wait_for_cache_fill(cache_key)
+            if result is None:
+                to_retry.append((query_pos, query_params, cache_key, None))
+            else:
+                results.append((query_pos, result))
+
+        metric_tags = {"referrer": referrer} if referrer else None
+        metrics.incr(
+            "snuba.query_cache.coalesced", amount=len(to_wait) - len(to_retry), tags=metric_tags
+        )
+        if to_retry:
+            metrics.incr("snuba.query_cache.wait_timeout", amount=len(to_retry), tags=metric_tags)
+            results.extend(_query_and_fill_cache(to_retry, headers))
 
     # Sort so that we get the results back in the original param list order
-    results.sort()
+    results.sort(key=itemgetter(0))
     # Drop the sort order val
     return map(itemgetter(1), results)
 
 
+def _query_and_fill_cache(to_query, headers):
+    """
+    Runs the queries and caches the results of queries with a cache key.
+    Releases the cache fill locks in any case.
+    """
+    try:
+        query_results = _bulk_snuba_query(map(itemgetter(1), to_query), headers)
+        results = []
+        for result, (query_pos, _, cache_key, _) in zip(query_results, to_query):
+            if cache_key:
+                cache.set(
+                    cache_key,
+                    _encode_cached_result(result),
+                    settings.SENTRY_SNUBA_CACHE_TTL_SECONDS
+                    + settings.SENTRY_SNUBA_CACHE_STALE_SECONDS,
+                )
+            results.append((query_pos, result))
+        return results
+    finally:
+        for _, _, cache_key, lock in to_query:
+            if lock is not None:
+                _finish_cache_fill(cache_key, lock)
+
+
+def _encode_cached_result(result):
+    return zlib.compress(
+        json.dumps(
+            {"result": result, "fresh_until": time.time() + settings.SENTRY_SNUBA_CACHE_TTL_SECONDS}
+        ).encode("utf-8")
+    )
+
+
+def _decode_cached_result(value):
+    """
+    Returns a tuple of the cached result and whether it is still fresh, or
+    `None` if nothing is cached.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        # cached before results were compressed
+        return json.loads(value), True
+    data = json.loads(zlib.decompress(value))
+    return data["result"], data["fresh_until"] > time.time()
+
+
+# Cache fills running in this process. Callers waiting for one of these are
+# woken up directly, callers in other processes poll the cache instead.
+_cache_fills: MutableMapping[str, threading.Event] = {}
+_cache_fills_lock = threading.Lock()
+CACHE_FILL_POLL_INTERVAL = 0.05
+
+
+def _start_cache_fill(cache_key):
+    """
+    Tries to become the only caller running the query of ``cache_key`` and
+    putting its result into the cache. Returns the lock to hand to
+    ``_finish_cache_fill`` afterwards, or ``None`` if another caller of this or
+    another process is doing it already.
+
+    If the locks backend fails, the caller runs the query itself rather than
+    waiting for a fill that nobody might be doing.
+    """
+    with _cache_fills_lock:
+        if cache_key in _cache_fills:
+            return None
+        _cache_fills[cache_key] = threading.Event()
+
+    lock = _get_cache_fill_lock(cache_key)
+    try:
+        lock.acquire()
+    except UnableToAcquireLock:
+        if _is_cache_fill_locked(lock):
+            _finish_cache_fill(cache_key, None)
+            return None
+        metrics.incr("snuba.query_cache.lock_failed")
+    return lock
+
+
+def _get_cache_fill_lock(cache_key):
+    from sentry.app import locks
+
+    return locks.get(f"{cache_key}:fill", duration=settings.SENTRY_SNUBA_CACHE_FILL_TIMEOUT)
+
+
+def _is_cache_fill_locked(lock):
+    """
+    Whether another caller holds the fill lock, backend errors count as not
+    held.
+    """
+    try:
+        return lock.locked()
+    except Exception:
+        logger.warning("Failed to check %r", lock, exc_info=True)
+        return False
+
+
+def _finish_cache_fill(cache_key, lock):
+    if lock is not None:
+        lock.release()
+    with _cache_fills_lock:
+        event = _cache_fills.pop(cache_key)
+    event.set()
+
+
+def _wait_for_cache_fill(cache_key):
+    """
+    Waits for the caller filling ``cache_key`` and returns the cached result,
+    or ``None`` if the result did not show up in time or the caller filling it
+    gave up.
+    """
+    deadline = time.monotonic() + settings.SENTRY_SNUBA_CACHE_FILL_TIMEOUT
+    with _cache_fills_lock:
+        event = _cache_fills.get(cache_key)
+    lock = _get_cache_fill_lock(cache_key)
+
+    while True:
+        if event is not None:
+            event.wait(max(deadline - time.monotonic(), 0))
+        else:
+            time.sleep(CACHE_FILL_POLL_INTERVAL)
+
+        cached_result = _decode_cached_result(cache.get(cache_key))
+        if cached_result is not None and cached_result[1]:
+            return cached_result[0]
+        if event is not None or time.monotonic() >= deadline:
+            return None
+        if not _is_cache_fill_locked(lock):
+            # The caller in another process is done, it might have given up
+            cached_result = _decode_cached_result(cache.get(cache_key))
+            if cached_result is not None and cached_result[1]:
+                return cached_result[0]
+            return None
+
+
 def _bulk_snuba_query(
     snuba_param_list: Sequence[SnubaQueryBody],
     headers: Mapping[str, str],
@@ -811,11 +994,10 @@ def _bulk_snuba_query(
                     )
 
         if len(snuba_param_list) > 1:
-            query_results = list(
-                _query_thread_pool.map(
-                    query_fn,
-                    [(params, Hub(Hub.current), headers) for params in snuba_param_list],
-                )
+            query_results = _run_in_query_pool(
+                query_fn,
+                [(params, Hub(Hub.current), headers) for params in snuba_param_list],
+                query_referrer,
             )
         else:
             # No need to submit to the thread pool if we're just performing a single query
@@ -863,6 +1045,26 @@ def _bulk_snuba_query(
     return results
 
 
+def _run_in_query_pool(query_fn, params_list, referrer):
+    """
+    Runs the queries on the shared query thread pool, limited by the
+    concurrency budget of the referrer.
+    """
+    submitted = time.time()
+    futures = [
+        _query_thread_pool.submit(functools.partial(query_fn, params), key=referrer)
+        for params in params_list
+    ]
+    results = [future.result() for future in futures]
+
+    for future in futures:
+        started, finished = future.get_timing()
+        metrics.timing("snuba.client.queue_wait", started - submitted, tags={"referrer": referrer})
+        metrics.timing("snuba.client.execution", finished - started, tags={"referrer": referrer})
+
+    return results
+
+
 RawResult = Tuple[urllib3.response.HTTPResponse, Callable[[Any], Any], Callable[[Any], Any]]
 
 
@@ -922,7 +1124,19 @@ def _raw_snql_query(
 
         with thread_hub.start_span(op="snuba_snql.run", description=str(query)) as span:
             span.set_tag("snuba.referrer", referrer)
-            return _snuba_pool.urlopen("POST", f"/{query.dataset}/snql", body=body, headers=headers)
+
+            def run():
+                return _snuba_pool.urlopen(
+                    "POST", f"/{query.dataset}/snql", body=body, headers=headers
+                )
+
+            if not settings.SENTRY_SNUBA_DEDUPLICATE_QUERIES:
+                return run()
+
+            response, shared = _inflight_queries.call((query.dataset, referrer, body), run)
+            if shared:
+                metrics.incr("snuba.client.deduplicated", tags={"referrer": referrer})
+            return response
 
 
 def query(
@@ -1,11 +1,16 @@
+import threading
 from datetime import timedelta
 from unittest import mock
 from unittest.mock import patch
 
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.signals import request_finished
+from django.http import HttpRequest
 from django.utils import timezone
 
+from sentry import app
 from sentry.api.serializers import serialize
-from sentry.api.serializers.models.group import StreamGroupSerializer
+from sentry.api.serializers.models.group import GroupAttrsStages, StreamGroupSerializer
 from sentry.models import (
     Environment,
     Group,
@@ -18,8 +23,9 @@ from sentry.models import (
     UserOption,
 )
 from sentry.notifications.types import NotificationSettingOptionValues, NotificationSettingTypes
-from sentry.testutils import TestCase
+from sentry.testutils import TestCase, TransactionTestCase
 from sentry.types.integrations import ExternalProviders
+from sentry.utils.concurrent import ThreadedExecutor
 
 
 class GroupSerializerTest(TestCase):
@@ -373,3 +379,75 @@ class StreamGroupSerializerTestCase(TestCase):
                 ),
             )
             assert make_series.call_count == 1
+
+
+class GroupAttrsStagesTest(TestCase):
+    def test_requires(self):
+        stages = GroupAttrsStages()
+        stages.submit("a", lambda: 1)
+        stages.submit("b", lambda: 2)
+        stages.submit("c", lambda a, b: a + b, requires=("a", "b"))
+        assert stages.result("c") == 3
+
+    def test_failed_dependency(self):
+        def fail():
+            raise ValueError("failed")
+
+        stages = GroupAttrsStages()
+        stages.submit("a", fail)
+        function = mock.Mock()
+        stages.submit("b", function, requires=("a",))
+        with self.assertRaises(ValueError):
+            stages.result("b")
+        assert not function.called
+
+    def test_threads(self):
+        with self.settings(SENTRY_GROUP_SERIALIZER_THREADS=2):
+            stages = GroupAttrsStages()
+            assert stages.executor is not None
+            stages.submit("a", lambda: 1)
+            stages.submit("b", lambda a: a + 1, requires=("a",))
+            stages.submit("c", lambda a, b: a + b, requires=("a", "b"))
+            assert stages.result("c") == 3
+
+    def test_saturated(self):
+        executor = ThreadedExecutor(worker_count=1, maxsize=1)
+        unblock = threading.Event()
+        try:
+            executor.submit(unblock.wait)
+            executor.submit(unblock.wait)
+
+            stages = GroupAttrsStages()
+            stages.executor = executor
+            stages.submit("a", threading.current_thread)
+            assert stages.result("a") is threading.current_thread()
+        finally:
+            unblock.set()
+
+    def test_memoized(self):
+        function = mock.Mock(return_value=1)
+        app.env.request = HttpRequest()
+        try:
+            for _ in range(2):
+                stages = GroupAttrsStages()
+                stages.submit("a", function, memo_key=(1, 2))
+                assert stages.result("a") == 1
+            assert function.call_count == 1
+
+            stages.submit("a", function, memo_key=(1, 3))
+            assert stages.result("a") == 1
+            assert function.call_count == 2
+        finally:
+            app.env.request = None
+            request_finished.send(sender=WSGIHandler)
+
+
+class GroupSerializerThreadsTest(TransactionTestCase):
+    def test_threads(self):
+        user = self.create_user()
+        group = self.create_group()
+        serializer = StreamGroupSerializer(stats_period="24h")
+
+        expected = serialize(group, user, serializer)
+        with self.settings(SENTRY_GROUP_SERIALIZER_THREADS=2):
+            assert serialize(group, user, serializer) == expected
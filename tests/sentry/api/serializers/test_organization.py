@@ -58,7 +58,7 @@ class OrganizationSerializerTest(TestCase):
             "team-insights",
         }
 
-    @mock.patch("sentry.features.batch_has")
+    @mock.patch("sentry.features.default_manager.batch_has")
     def test_organization_batch_has(self, mock_batch):
         user = self.create_user()
         organization = self.create_organization(owner=user)
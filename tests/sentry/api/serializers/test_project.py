@@ -128,7 +128,7 @@ class ProjectSerializerTest(TestCase):
         assert result["hasAccess"] is True
         assert result["isMember"] is True
 
-    @mock.patch("sentry.features.batch_has")
+    @mock.patch("sentry.features.default_manager.batch_has")
     def test_project_batch_has(self, mock_batch):
         mock_batch.return_value = {
             f"project:{self.project.id}": {
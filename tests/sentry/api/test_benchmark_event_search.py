@@ -0,0 +1,72 @@
+import pytest
+
+from sentry.api.event_search import (
+    _parse_cache,
+    _parse_search_query,
+    default_config,
+    parse_search_query,
+)
+from sentry.api.issue_search import issue_search_config
+
+# Saved searches as they show up in the issue stream, discover and alerts.
+SAVED_SEARCHES = [
+    ("is:unresolved", issue_search_config),
+    ("is:unresolved is:for_review", issue_search_config),
+    ("is:unresolved assigned_or_suggested:[me, none]", issue_search_config),
+    ("is:unresolved assigned:me", issue_search_config),
+    ("is:unresolved is:unassigned", issue_search_config),
+    ("is:ignored", issue_search_config),
+    ("is:resolved", issue_search_config),
+    ("is:unresolved level:error", issue_search_config),
+    ("is:unresolved firstSeen:-24h", issue_search_config),
+    ("is:unresolved timesSeen:>100", issue_search_config),
+    ("is:unresolved !has:assigned environment:production", issue_search_config),
+    ("is:unresolved release:latest", issue_search_config),
+    ('is:unresolved message:"ConnectionError"', issue_search_config),
+    ("event.type:error", default_config),
+    ("event.type:transaction", default_config),
+    ("event.type:transaction transaction.duration:>300ms", default_config),
+    ("event.type:transaction !transaction:/healthcheck/", default_config),
+    ("event.type:error level:fatal environment:production", default_config),
+    ("transaction.op:pageload measurements.lcp:>2500", default_config),
+    ("count():>100 p95():>1s", default_config),
+    ("has:user.email !user.email:*@example.com", default_config),
+    ("http.method:POST (http.status_code:500 OR http.status_code:502)", default_config),
+    ("browser.name:Chrome os.name:[Windows, macOS]", default_config),
+    ('error.type:TypeError error.value:"undefined is not a function"', default_config),
+]
+
+
+def benchmark_available():
+    try:
+        import pytest_benchmark  # NOQA
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+def parse_with_grammar():
+    for query, config in SAVED_SEARCHES:
+        _parse_search_query(query, config)
+
+
+def parse():
+    for query, config in SAVED_SEARCHES:
+        parse_search_query(query, config=config)
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+def test_benchmark_parse_search_query_grammar(benchmark):
+    benchmark(parse_with_grammar)
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+def test_benchmark_parse_search_query_cold(benchmark):
+    benchmark.pedantic(parse, setup=_parse_cache.clear, rounds=50)
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+def test_benchmark_parse_search_query_warm(benchmark):
+    parse()
+    benchmark(parse)
@@ -1,6 +1,7 @@
 import datetime
 import os
 from datetime import timedelta
+from unittest import mock
 
 import pytest
 from django.test import SimpleTestCase
@@ -14,8 +15,13 @@ from sentry.api.event_search import (
     SearchFilter,
     SearchKey,
     SearchValue,
+    _parse_cache,
+    _parse_search_query,
+    default_config,
     parse_search_query,
+    parse_simple_search_query,
 )
+from sentry.api.issue_search import issue_search_config
 from sentry.constants import MODULE_ROOT
 from sentry.exceptions import InvalidSearchQuery
 from sentry.search.utils import parse_datetime_string, parse_duration, parse_numeric_value
@@ -457,6 +463,105 @@ class ParseSearchQueryBackendTest(SimpleTestCase):
         assert search_filter.value.value == 'a"b'
 
 
+@pytest.mark.parametrize(
+    "query,config",
+    [
+        ("is:unresolved", issue_search_config),
+        ("!is:unresolved is:for_review", issue_search_config),
+        ("is:unresolved firstRelease:1.0", issue_search_config),
+        ("level:error", default_config),
+        ("!level:error environment:production", default_config),
+        ("  release:1.0.0-beta   user.email:foo@example.com ", default_config),
+        ("url:https://example.com/*", default_config),
+        ("transaction:/api/0/issues/", default_config),
+        ("message:foo:bar", default_config),
+        ("device.family:1", default_config),
+        ("browser:true", default_config),
+        ("os:5m", default_config),
+        ("release:2021-01-01", default_config),
+        ("release:-24h", default_config),
+        ("title:*foo\\*", default_config),
+    ],
+)
+def test_simple_search_query(query, config):
+    rv = parse_simple_search_query(query, config)
+    assert rv is not None
+    assert rv == _parse_search_query(query, config)[0]
+
+
+@pytest.mark.parametrize(
+    "query,config",
+    [
+        ("", default_config),
+        ("foo", default_config),
+        ("is:unresolved", default_config),
+        ("is:unknown", issue_search_config),
+        ("has:release", default_config),
+        ("project.id:1", default_config),
+        ("times_seen:10", issue_search_config),
+        ("age:-24h", issue_search_config),
+        ("transaction.duration:>1s", default_config),
+        ("measurements.lcp:1", default_config),
+        ("level:>error", default_config),
+        ('message:"foo bar"', default_config),
+        ("tags[foo]:bar", default_config),
+        ("release:[1.0, 2.0]", default_config),
+        ("count():>1", default_config),
+        ("level:error OR level:fatal", default_config),
+        ("(level:error)", default_config),
+        ("level:\terror", default_config),
+        ("release:", default_config),
+    ],
+)
+def test_not_simple_search_query(query, config):
+    assert parse_simple_search_query(query, config) is None
+
+
+class ParseSearchQueryCacheTest(SimpleTestCase):
+    def setUp(self):
+        _parse_cache.clear()
+
+    def test_reuses_parsed_query(self):
+        query = 'message:"foo bar" transaction.duration:>1s'
+        with mock.patch(
+            "sentry.api.event_search._parse_search_query", wraps=_parse_search_query
+        ) as parse:
+            first = parse_search_query(query)
+            second = parse_search_query(query)
+
+        assert parse.call_count == 1
+        assert first == second
+        assert first is not second
+
+        # results can be changed without affecting the cache
+        first.append(SearchFilter(SearchKey("foo"), "=", SearchValue("bar")))
+        assert parse_search_query(query) == second
+
+    def test_cache_depends_on_config(self):
+        query = 'message:"foo bar" foo:1'
+        config = SearchConfig.create_from(default_config, numeric_keys={"foo"})
+
+        assert parse_search_query(query)[1].value.raw_value == "1"
+        assert parse_search_query(query, config=config)[1].value.raw_value == 1
+
+    @freeze_time("2021-01-01T12:00:00")
+    def test_relative_dates_are_not_cached(self):
+        query = 'message:"foo bar" timestamp:-24h'
+        with mock.patch(
+            "sentry.api.event_search._parse_search_query", wraps=_parse_search_query
+        ) as parse:
+            parse_search_query(query)
+            parse_search_query(query)
+
+        assert parse.call_count == 2
+
+    def test_simple_queries_skip_grammar(self):
+        with mock.patch("sentry.api.event_search.event_search_grammar") as grammar:
+            assert parse_search_query("is:unresolved level:error", config=issue_search_config)
+
+        assert not grammar.parse.called
+
+
 @pytest.mark.parametrize(
     "raw,result",
     [
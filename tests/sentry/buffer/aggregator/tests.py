@@ -0,0 +1,75 @@
+import gc
+import weakref
+from datetime import datetime
+from unittest import mock
+
+from sentry.buffer.aggregator import LocalAggregator, flush_all
+from sentry.models import Group
+
+
+def test_add_merges_increments():
+    flush_func = mock.Mock()
+    aggregator = LocalAggregator(flush_func, max_keys=10, max_age=60)
+    first = datetime(2017, 5, 3, 6, 6, 6)
+    last = datetime(2017, 5, 3, 6, 6, 7)
+    aggregator.add("a", Group, {"times_seen": 1}, {"id": 1}, {"last_seen": first})
+    aggregator.add("a", Group, {"times_seen": 2}, {"id": 1}, {"last_seen": last})
+    aggregator.add("b", Group, {"times_seen": 1}, {"id": 2})
+    assert len(aggregator) == 2
+    assert aggregator.get("a", "times_seen") == 3
+    assert flush_func.call_count == 0
+
+    aggregator.flush()
+    assert len(aggregator) == 0
+    assert aggregator.get("a", "times_seen") == 0
+    assert flush_func.mock_calls == [
+        mock.call(Group, {"times_seen": 3}, {"id": 1}, extra={"last_seen": last}, signal_only=None),
+        mock.call(Group, {"times_seen": 1}, {"id": 2}, extra=None, signal_only=None),
+    ]
+
+
+def test_signal_only_is_sticky():
+    flush_func = mock.Mock()
+    aggregator = LocalAggregator(flush_func, max_keys=10, max_age=60)
+    aggregator.add("a", Group, {"times_seen": 1}, {"id": 1}, signal_only=True)
+    aggregator.add("a", Group, {"times_seen": 1}, {"id": 1})
+    aggregator.flush()
+    flush_func.assert_called_once_with(
+        Group, {"times_seen": 2}, {"id": 1}, extra=None, signal_only=True
+    )
+
+
+def test_flushes_when_full():
+    flush_func = mock.Mock()
+    aggregator = LocalAggregator(flush_func, max_keys=2, max_age=60)
+    aggregator.add("a", Group, {"times_seen": 1}, {"id": 1})
+    aggregator.add("a", Group, {"times_seen": 1}, {"id": 1})
+    assert flush_func.call_count == 0
+    aggregator.add("b", Group, {"times_seen": 1}, {"id": 2})
+    assert flush_func.call_count == 2
+    assert len(aggregator) == 0
+
+
+def test_flush_failure_does_not_stop_flush():
+    flush_func = mock.Mock(side_effect=[Exception("boom"), None])
+    aggregator = LocalAggregator(flush_func, max_keys=10, max_age=60)
+    aggregator.add("a", Group, {"times_seen": 1}, {"id": 1})
+    aggregator.add("b", Group, {"times_seen": 1}, {"id": 2})
+    aggregator.flush()
+    assert flush_func.call_count == 2
+    assert len(aggregator) == 0
+
+
+def test_flush_all():
+    flush_func = mock.Mock()
+    aggregator = LocalAggregator(flush_func, max_keys=10, max_age=60)
+    aggregator.add("a", Group, {"times_seen": 1}, {"id": 1})
+    flush_all()
+    assert flush_func.call_count == 1
+    assert len(aggregator) == 0
+
+    # Neither the shutdown hooks nor the flusher thread keep it alive
+    ref = weakref.ref(aggregator)
+    del aggregator
+    gc.collect()
+    assert ref() is None
@@ -1,10 +1,19 @@
 from datetime import timedelta
 from unittest import mock
 
+from django.db import DatabaseError, connections, router
 from django.utils import timezone
 
-from sentry.buffer.base import Buffer
-from sentry.models import Group, Organization, Project, Release, ReleaseProject, Team
+from sentry.buffer.base import Buffer, get_cast_type
+from sentry.models import (
+    Group,
+    GroupRelease,
+    Organization,
+    Project,
+    Release,
+    ReleaseProject,
+    Team,
+)
 from sentry.testutils import TestCase
 
 
@@ -73,3 +82,56 @@ class BufferTest(TestCase):
         self.buf.process(Group, columns, filters, {"last_seen": the_date}, signal_only=True)
         group.refresh_from_db()
         assert group.times_seen == prev_times_seen
+
+    @mock.patch("sentry.buffer.base.buffer_incr_complete")
+    def test_process_batch_coalesces_updates(self, buffer_incr_complete):
+        project = self.create_project()
+        group_a = Group.objects.create(project=project)
+        group_b = Group.objects.create(project=project)
+        the_date = timezone.now() + timedelta(days=5)
+        rows = [
+            ({"times_seen": 2}, {"id": group_a.id}, {"last_seen": the_date, "message": "a"}),
+            ({"times_seen": 3}, {"id": group_b.id}, {"last_seen": the_date, "message": "b"}),
+        ]
+        self.buf.process_batch(Group, rows)
+
+        group_a_ = Group.objects.get(id=group_a.id)
+        group_b_ = Group.objects.get(id=group_b.id)
+        assert group_a_.times_seen == group_a.times_seen + 2
+        assert group_b_.times_seen == group_b.times_seen + 3
+        assert group_a_.last_seen == group_b_.last_seen == the_date
+        assert group_a_.message == "a"
+        assert group_b_.message == "b"
+        assert group_a_.score != group_a.score
+        assert len(buffer_incr_complete.send_robust.mock_calls) == 2
+        buffer_incr_complete.send_robust.assert_any_call(
+            model=Group,
+            columns={"times_seen": 2},
+            filters={"id": group_a.id},
+            extra={"last_seen": the_date, "message": "a"},
+            created=False,
+            sender=Group,
+        )
+
+    def test_cast_type(self):
+        connection = connections[router.db_for_write(Group)]
+        assert "serial" not in get_cast_type(Group._meta.pk, connection)
+        assert get_cast_type(Group._meta.pk, connection) == get_cast_type(
+            GroupRelease._meta.get_field("group_id"), connection
+        )
+
+    def test_process_batch_falls_back_on_database_error(self):
+        group = Group.objects.create(project=Project(id=1))
+        with mock.patch.object(Buffer, "_coalesced_update", side_effect=DatabaseError("failed")):
+            self.buf.process_batch(Group, [({"times_seen": 2}, {"id": group.id}, None)])
+        assert Group.objects.get(id=group.id).times_seen == group.times_seen + 2
+
+    def test_process_batch_falls_back_without_existing_row(self):
+        group = Group.objects.create(project=Project(id=1))
+        rows = [
+            ({"times_seen": 1}, {"message": "foo bar", "project_id": 1}, None),
+            ({"times_seen": 1}, {"message": group.message, "project_id": 1}, None),
+        ]
+        self.buf.process_batch(Group, rows)
+        assert Group.objects.get(message="foo bar").times_seen == 2
+        assert Group.objects.get(id=group.id).times_seen == group.times_seen + 1
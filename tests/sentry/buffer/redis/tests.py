@@ -98,6 +98,28 @@ class RedisBufferTest(TestCase):
         self.buf.incr(model, {"times_seen": 5}, filters)
         assert self.buf.get(model, columns, filters=filters) == {"times_seen": 6}
 
+    def test_incr_aggregates_locally(self):
+        buf = RedisBuffer(aggregate_max_keys=2, aggregate_max_age=60)
+        client = buf.cluster.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        columns = ["times_seen"]
+        key = buf._make_key(model, {"pk": 1})
+
+        buf.incr(model, {"times_seen": 1}, {"pk": 1})
+        buf.incr(model, {"times_seen": 5}, {"pk": 1})
+        assert client.hgetall(key) == {}
+        assert client.zrange("b:p", 0, -1) == []
+        # pending increments are still visible to `get`
+        assert buf.get(model, columns, filters={"pk": 1}) == {"times_seen": 6}
+
+        # a second key fills the aggregator and flushes both
+        buf.incr(model, {"times_seen": 1}, {"pk": 2})
+        assert client.hget(key, "i+times_seen") == b"6"
+        assert buf.get(model, columns, filters={"pk": 1}) == {"times_seen": 6}
+        assert buf.get(model, columns, filters={"pk": 2}) == {"times_seen": 1}
+        assert len(client.zrange("b:p", 0, -1)) == 2
+
     def test_incr_saves_to_redis(self):
         now = datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
         client = self.buf.cluster.get_routing_client()
@@ -194,6 +216,49 @@ class RedisBufferTest(TestCase):
         self.buf.process("foo")
         process.assert_called_once_with(mock.Mock, {"times_seen": 1}, {"pk": 1}, {}, True)
 
+    @mock.patch("sentry.buffer.base.Buffer.process_batch")
+    def test_process_coalesces_batch(self, process_batch):
+        self.buf.coalesce_batches = True
+        project = self.create_project()
+        group_a = self.create_group(project=project)
+        group_b = self.create_group(project=project)
+        self.buf.incr(Group, {"times_seen": 1}, {"id": group_a.id})
+        self.buf.incr(Group, {"times_seen": 1}, {"id": group_a.id})
+        self.buf.incr(Group, {"times_seen": 1}, {"id": group_b.id})
+        keys = [
+            self.buf._make_key(Group, {"id": group_a.id}),
+            self.buf._make_key(Group, {"id": group_b.id}),
+        ]
+        self.buf.process(batch_keys=keys)
+        process_batch.assert_called_once_with(
+            Group,
+            [
+                ({"times_seen": 2}, {"id": group_a.id}, {}),
+                ({"times_seen": 1}, {"id": group_b.id}, {}),
+            ],
+        )
+
+        client = self.buf.cluster.get_routing_client()
+        assert client.zrange("b:p", 0, -1) == []
+        assert client.hgetall(keys[0]) == {}
+        assert client.hgetall(keys[1]) == {}
+
+    def test_process_coalesced_batch_saves_data(self):
+        self.buf.coalesce_batches = True
+        project = self.create_project()
+        group_a = self.create_group(project=project)
+        group_b = self.create_group(project=project)
+        self.buf.incr(Group, {"times_seen": 2}, {"id": group_a.id})
+        self.buf.incr(Group, {"times_seen": 3}, {"id": group_b.id})
+        self.buf.process(
+            batch_keys=[
+                self.buf._make_key(Group, {"id": group_a.id}),
+                self.buf._make_key(Group, {"id": group_b.id}),
+            ]
+        )
+        assert Group.objects.get(id=group_a.id).times_seen == group_a.times_seen + 2
+        assert Group.objects.get(id=group_b.id).times_seen == group_b.times_seen + 3
+
 
 #    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
 #    def test_incr_uses_signal_only(self):
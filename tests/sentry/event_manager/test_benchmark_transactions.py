@@ -0,0 +1,65 @@
+import time
+import uuid
+from copy import deepcopy
+from datetime import datetime, timedelta
+
+import pytest
+
+from sentry.event_manager import EventManager, save_transaction_events
+
+
+def benchmark_available():
+    try:
+        import pytest_benchmark  # NOQA
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+def make_transaction(project, index):
+    now = datetime.utcnow()
+    manager = EventManager(
+        {
+            "event_id": uuid.uuid4().hex,
+            "type": "transaction",
+            "transaction": f"/api/{index % 10}/",
+            "timestamp": now.isoformat(),
+            "start_timestamp": (now - timedelta(seconds=1)).isoformat(),
+            "release": f"1.{index % 3}",
+            "environment": ("production", "staging")[index % 2],
+            "user": {"id": str(index % 50)},
+            "tags": {"index": str(index)},
+            "spans": [],
+            "contexts": {
+                "trace": {
+                    "trace_id": "a7d67cf796774551a95be6543cacd459",
+                    "span_id": "babaae0d4b7512d9",
+                    "op": "http.server",
+                    "status": "ok",
+                }
+            },
+        },
+        project=project,
+    )
+    manager.normalize()
+    data = dict(manager.get_data())
+    data["project"] = project.id
+    return data
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("batch_size", [1, 100, 1000])
+def test_benchmark_save_transaction_events(default_project, batch_size, benchmark):
+    projects = {default_project.id: default_project}
+    events = [make_transaction(default_project, index) for index in range(batch_size)]
+
+    def setup():
+        jobs = [{"data": deepcopy(data), "start_time": time.time()} for data in events]
+        return (jobs, projects), {}
+
+    benchmark.pedantic(save_transaction_events, setup=setup, rounds=5)
+
+    # pytest-benchmark runs on a single core, so this is events per second per core
+    benchmark.extra_info["events_per_second"] = batch_size / benchmark.stats.stats.mean
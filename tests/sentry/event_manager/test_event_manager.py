@@ -16,6 +16,7 @@ from sentry.event_manager import (
     EventManager,
     EventUser,
     HashDiscarded,
+    _get_event_users,
     has_pending_commit_resolution,
 )
 from sentry.eventstore.models import Event
@@ -1111,6 +1112,45 @@ class EventManagerTest(TestCase):
         euser = EventUser.objects.get(project_id=self.project.id)
         assert euser.username == "foô"
 
+    def test_event_users_batch(self):
+        project2 = self.create_project(organization=self.project.organization)
+        existing = EventUser.objects.create(project_id=self.project.id, ident="1", name="old")
+
+        with mock.patch("sentry.utils.metrics.timing") as mock_timing:
+            users = _get_event_users(
+                [
+                    (self.project, {"user": {"id": "1", "name": "new"}}),
+                    (self.project, {}),
+                    (self.project, {"user": {"id": "2"}}),
+                    (project2, {"user": {"id": "1"}}),
+                    (self.project, {"user": {"id": "1", "name": "new"}}),
+                ]
+            )
+
+        assert users[0].id == existing.id
+        assert users[1] is None
+        assert users[2].ident == "2"
+        assert users[3].project_id == project2.id
+        assert users[4].id == existing.id
+        assert EventUser.objects.get(id=existing.id).name == "new"
+        assert EventUser.objects.count() == 3
+
+        event_user_tags = [
+            {
+                key: call.kwargs["tags"].get(key)
+                for key in ("event_has_user", "cache_hit", "created")
+            }
+            for call in mock_timing.mock_calls
+            if call.args[0] == "event_manager.get_event_user"
+        ]
+        assert event_user_tags == [
+            {"event_has_user": "true", "cache_hit": "false", "created": "false"},
+            {"event_has_user": "false", "cache_hit": None, "created": None},
+            {"event_has_user": "true", "cache_hit": "false", "created": "true"},
+            {"event_has_user": "true", "cache_hit": "false", "created": "true"},
+            {"event_has_user": "true", "cache_hit": "false", "created": "false"},
+        ]
+
     def test_environment(self):
         manager = EventManager(make_event(**{"environment": "beta"}))
         manager.normalize()
@@ -2,8 +2,11 @@ from typing import Any, Mapping, Optional, Union
 from unittest import mock
 
 from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.signals import request_finished
+from django.http import HttpRequest
 
-from sentry import features
+from sentry import app, features
 from sentry.features import Feature
 from sentry.models import User
 from sentry.testutils import TestCase
@@ -209,3 +212,112 @@ class FeatureManagerTest(TestCase):
         assert manager.has("organizations:feature", actor=self.user, organization=self.organization)
         assert manager.has("projects:feature", actor=self.user, project=self.project)
         assert manager.has("auth:register", actor=self.user)
+
+    def test_has_for_objects(self):
+        test_user = self.create_user()
+        org1 = self.create_organization()
+        org2 = self.create_organization()
+        p1 = self.create_project(organization=org1)
+        p2 = self.create_project(organization=org1)
+        p3 = self.create_project(organization=org2)
+
+        class EntityHandler(features.FeatureHandler):
+            def __init__(self):
+                self.calls = []
+
+            def batch_has(self, feature_names, actor, projects=None, organization=None):
+                assert actor == test_user
+                self.calls.append((organization, projects))
+                return {
+                    f"project:{project.id}": {"projects:entity": project != p2}
+                    for project in projects
+                }
+
+        class OrganizationHandler(features.BatchFeatureHandler):
+            features = frozenset(["projects:registered"])
+
+            def __init__(self):
+                self.calls = []
+
+            def _check_for_batch(self, feature_name, organization, actor):
+                self.calls.append(organization)
+                return organization == org1
+
+        entity_handler = EntityHandler()
+        org_handler = OrganizationHandler()
+        manager = features.FeatureManager()
+        for flag in ("projects:entity", "projects:registered", "projects:default"):
+            manager.add(flag, features.ProjectFeature)
+        manager.add_handler(org_handler)
+        manager.add_entity_handler(entity_handler)
+
+        with self.settings(SENTRY_FEATURES={"projects:default": True}):
+            result = manager.has_for_objects(
+                ["projects:entity", "projects:registered", "projects:default"],
+                [p1, p2, p3],
+                actor=test_user,
+            )
+
+        assert result == {
+            p1: {"projects:entity": True, "projects:registered": True, "projects:default": True},
+            p2: {"projects:entity": False, "projects:registered": True, "projects:default": True},
+            p3: {"projects:entity": True, "projects:registered": False, "projects:default": True},
+        }
+        # one call per organization, regardless of the number of projects and features
+        assert sorted(org.id for org, _ in entity_handler.calls) == sorted([org1.id, org2.id])
+        assert sorted(org.id for org in org_handler.calls) == sorted([org1.id, org2.id])
+
+    def test_has_for_objects_organizations(self):
+        org1 = self.create_organization()
+        org2 = self.create_organization()
+
+        manager = features.FeatureManager()
+        manager.add("organizations:feature", features.OrganizationFeature)
+        manager.add("organizations:other", features.OrganizationFeature)
+        manager.add_entity_handler(MockBatchHandler())
+
+        with mock.patch.object(
+            MockBatchHandler,
+            "batch_has",
+            side_effect=lambda feature_names, actor, projects=None, organization=None: {
+                f"organization:{organization.id}": {"organizations:feature": organization == org1}
+            },
+        ) as batch_has:
+            result = manager.has_for_objects(
+                ["organizations:feature", "organizations:other"], [org1, org2], actor=self.user
+            )
+
+        assert result == {
+            org1: {"organizations:feature": True, "organizations:other": False},
+            org2: {"organizations:feature": False, "organizations:other": False},
+        }
+        assert batch_has.call_count == 2
+        assert batch_has.call_args[1]["projects"] is None
+
+    def test_has_for_objects_memoized_for_request(self):
+        handler = mock.Mock()
+        handler.features = ["projects:feature"]
+        handler.has_for_batch.side_effect = lambda batch: {obj: True for obj in batch.objects}
+        manager = features.FeatureManager()
+        manager.add("projects:feature", features.ProjectFeature)
+        manager.add_handler(handler)
+
+        app.env.request = HttpRequest()
+        try:
+            for _ in range(2):
+                assert manager.has_for_objects(
+                    ["projects:feature"], [self.project], actor=self.user
+                ) == {self.project: {"projects:feature": True}}
+            assert handler.has_for_batch.call_count == 1
+
+            # a different actor is evaluated separately
+            assert manager.has_for_objects(
+                ["projects:feature"], [self.project], actor=self.create_user()
+            ) == {self.project: {"projects:feature": True}}
+            assert handler.has_for_batch.call_count == 2
+        finally:
+            app.env.request = None
+            request_finished.send(sender=WSGIHandler)
+
+        manager.has_for_objects(["projects:feature"], [self.project], actor=self.user)
+        assert handler.has_for_batch.call_count == 3
@@ -30,6 +30,24 @@ def test_benchmark_grouping(config_name, benchmark):
     benchmark.pedantic(run_configuration, setup=setup, rounds=len(grouping_inputs))
 
 
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("hash_only", [False, True], ids=["full", "hash_only"])
+@pytest.mark.parametrize(
+    "config_name", sorted(CONFIGURATIONS.keys()), ids=lambda x: x.replace("-", "_")
+)
+def test_benchmark_grouping_variants(config_name, hash_only, benchmark):
+    config = CONFIGS[config_name]
+    events = [grouping_input.create_event(config) for grouping_input in grouping_inputs]
+    for event in events:
+        event.project = None
+    event_iter = iter(events)
+
+    def setup():
+        return (next(event_iter), hash_only), {}
+
+    benchmark.pedantic(run_grouping_variants, setup=setup, rounds=len(events))
+
+
 def run_configuration(grouping_input, config):
     event = grouping_input.create_event(config)
 
@@ -37,3 +55,7 @@ def run_configuration(grouping_input, config):
     event.project = None
 
     event.get_hashes()
+
+
+def run_grouping_variants(event, hash_only):
+    event.get_grouping_variants(hash_only=hash_only)
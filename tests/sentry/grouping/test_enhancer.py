@@ -418,3 +418,42 @@ def test_sentinel_and_prefix(action, type):
     actions[0][1].update_frame_components_contributions([component], frames, 0)
     expected = True if action == "+" else False
     assert getattr(component, f"is_{type}_frame") is expected
+
+
+def test_modifications_are_visible_to_later_rules():
+    enhancement = Enhancements.from_config_string(
+        """
+        function:foo                 category=bar
+        category:bar                 -app
+        function:foo app:no          category=baz
+    """
+    )
+
+    frames = [{"function": "foo", "in_app": True}, {"function": "other", "in_app": True}]
+    enhancement.apply_modifications_to_frame(frames, "native", {})
+
+    assert frames[0]["in_app"] is False
+    assert frames[0]["data"]["category"] == "baz"
+    assert frames[1]["in_app"] is True
+    assert "data" not in frames[1]
+
+
+def test_shared_matchers_and_caller_callee():
+    enhancement = Enhancements.from_config_string(
+        """
+        [ function:foo ] | function:bar      +prefix
+        function:bar | [ function:foo ]      +sentinel
+        family:javascript function:bar       -group
+    """
+    )
+    caller_rule, callee_rule, js_rule = enhancement.rules
+
+    frames = [{"function": "foo"}, {"function": "bar"}, {"function": "foo"}, {"function": "bar"}]
+    assert [idx for idx, _ in _get_matching_frame_actions(caller_rule, frames, "native")] == [1, 3]
+    assert [idx for idx, _ in _get_matching_frame_actions(callee_rule, frames, "native")] == [1]
+    assert not _get_matching_frame_actions(js_rule, frames, "native")
+
+
+def test_loads_is_cached():
+    dumped = Enhancements.from_config_string("function:foo -app").dumps()
+    assert Enhancements.loads(dumped) is Enhancements.loads(dumped)
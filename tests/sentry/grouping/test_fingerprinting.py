@@ -121,6 +121,36 @@ logger:test2 -> logger-, {{ logger }}, -, {{ level }}
     }
 
 
+def test_indexed_rules_keep_order():
+    rules = FingerprintingRules.from_config_string(
+        """
+type:DatabaseUnavailable module:foo             -> first
+message:"*timeout*"                             -> second
+type:DatabaseUnavailable                        -> third
+type:Database*                                  -> fourth
+tags.server_name:"web 1"                        -> fifth
+"""
+    )
+    assert [rule.anchor for rule in rules.rules] == [
+        ("exceptions", "type", "DatabaseUnavailable"),
+        None,
+        ("exceptions", "type", "DatabaseUnavailable"),
+        None,
+        ("tags", "tags.server_name", "web 1"),
+    ]
+
+    def get_fingerprint(event):
+        rv = rules.get_fingerprint_values_for_event(event)
+        return rv[1] if rv is not None else None
+
+    exception = {"type": "DatabaseUnavailable", "value": "connection timeout"}
+    assert get_fingerprint({"exception": {"values": [exception]}}) == ["second"]
+    assert get_fingerprint({"exception": {"values": [dict(exception, value="down")]}}) == ["third"]
+    assert get_fingerprint({"exception": {"values": [{"type": "DatabaseError"}]}}) == ["fourth"]
+    assert get_fingerprint({"tags": [["server_name", "web 1"]]}) == ["fifth"]
+    assert get_fingerprint({"tags": [["server_name", "web 2"]]}) is None
+
+
 def test_discover_field_parsing(insta_snapshot):
     rules = FingerprintingRules.from_config_string(
         """
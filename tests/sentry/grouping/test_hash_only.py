@@ -0,0 +1,35 @@
+import pytest
+
+from sentry.grouping.api import detect_synthetic_exception, get_default_grouping_config_dict
+from sentry.grouping.strategies.configurations import CONFIGURATIONS
+from tests.sentry.grouping import with_grouping_input
+
+
+def get_hashes_and_tree_labels(variants):
+    return {
+        key: (variant.get_hash(), getattr(getattr(variant, "component", None), "tree_label", None))
+        for key, variant in variants.items()
+    }
+
+
+@with_grouping_input("grouping_input")
+@pytest.mark.parametrize("config_name", CONFIGURATIONS.keys(), ids=lambda x: x.replace("-", "_"))
+def test_hash_only_parity(config_name, grouping_input):
+    grouping_config = get_default_grouping_config_dict(config_name)
+    evt = grouping_input.create_event(grouping_config)
+    evt.project = None
+    detect_synthetic_exception(evt.data, grouping_config)
+
+    full = evt.get_grouping_variants()
+    hash_only = evt.get_grouping_variants(hash_only=True)
+
+    assert get_hashes_and_tree_labels(hash_only) == get_hashes_and_tree_labels(full)
+    assert {
+        key: [c.contributes for c in variant.component.iter_subcomponents("frame", True)]
+        for key, variant in full.items()
+        if hasattr(variant, "component")
+    } == {
+        key: [c.contributes for c in variant.component.iter_subcomponents("frame", True)]
+        for key, variant in hash_only.items()
+        if hasattr(variant, "component")
+    }
@@ -78,6 +78,49 @@ class IncidentGetForSubscriptionTest(TestCase):
         assert AlertRule.objects.get_for_subscription(subscription) == alert_rule
 
 
+class AlertRuleGetForSubscriptionsTest(TestCase):
+    def test(self):
+        alert_rule = self.create_alert_rule(projects=[self.project, self.create_project()])
+        subscriptions = list(alert_rule.snuba_query.subscriptions.all())
+        other_subscription = self.create_alert_rule().snuba_query.subscriptions.get()
+        # Only one of the subscriptions is cached
+        AlertRule.objects.get_for_subscription(subscriptions[0])
+
+        expected = {subscription.id: alert_rule for subscription in subscriptions}
+        expected[other_subscription.id] = AlertRule.objects.get(
+            snuba_query_id=other_subscription.snuba_query_id
+        )
+        assert AlertRule.objects.get_for_subscriptions(subscriptions + [other_subscription]) == (
+            expected
+        )
+        for subscription in subscriptions + [other_subscription]:
+            assert cache.get(AlertRule.objects.CACHE_SUBSCRIPTION_KEY % subscription.id) == (
+                expected[subscription.id]
+            )
+
+    def test_no_alert_rule(self):
+        alert_rule = self.create_alert_rule()
+        subscription = alert_rule.snuba_query.subscriptions.get()
+        alert_rule.delete()
+        assert AlertRule.objects.get_for_subscriptions([subscription]) == {}
+
+
+class AlertRuleTriggerGetForAlertRulesTest(TestCase):
+    def test(self):
+        alert_rule = self.create_alert_rule()
+        trigger = self.create_alert_rule_trigger(alert_rule)
+        other_alert_rule = self.create_alert_rule()
+        AlertRuleTrigger.objects.get_for_alert_rule(alert_rule)
+
+        assert AlertRuleTrigger.objects.get_for_alert_rules([alert_rule, other_alert_rule]) == {
+            alert_rule.id: [trigger],
+            other_alert_rule.id: [],
+        }
+        assert (
+            cache.get(AlertRuleTrigger.objects._build_trigger_cache_key(other_alert_rule.id)) == []
+        )
+
+
 class IncidentClearSubscriptionCacheTest(TestCase):
     def setUp(self):
         self.alert_rule = self.create_alert_rule()
@@ -233,6 +276,34 @@ class ActiveIncidentClearCacheTest(TestCase):
         )
 
 
+class GetActiveIncidentsTest(TestCase):
+    def test(self):
+        alert_rule = self.create_alert_rule()
+        other_alert_rule = self.create_alert_rule()
+        other_project = self.create_project()
+        incident = self.create_incident(alert_rule=alert_rule, projects=[self.project])
+        # Cache the negative lookup of one of the pairs
+        Incident.objects.get_active_incident(other_alert_rule, self.project)
+
+        assert Incident.objects.get_active_incidents(
+            [
+                (alert_rule, self.project),
+                (alert_rule, other_project),
+                (other_alert_rule, self.project),
+            ]
+        ) == {
+            (alert_rule.id, self.project.id): incident,
+            (alert_rule.id, other_project.id): None,
+            (other_alert_rule.id, self.project.id): None,
+        }
+        assert (
+            cache.get(
+                Incident.objects._build_active_incident_cache_key(alert_rule.id, self.project.id)
+            )
+            == incident
+        )
+
+
 class IncidentTriggerClearCacheTest(TestCase):
     def setUp(self):
         self.alert_rule = self.create_alert_rule()
@@ -36,6 +36,7 @@ from sentry.incidents.subscription_processor import (
     get_alert_rule_stats,
     get_redis_client,
     partition,
+    subscription_batch,
     update_alert_rule_stats,
 )
 from sentry.models import Integration
@@ -342,6 +343,56 @@ class ProcessUpdateTest(ProcessUpdateBaseClass):
             incident, [self.action], [(trigger.alert_threshold + 1, IncidentStatus.CRITICAL)]
         )
 
+    def test_batch_alert(self):
+        rule = self.rule
+        trigger = self.trigger
+        with subscription_batch([self.sub, self.other_sub]) as batch, patch.object(
+            AlertRule.objects, "get_for_subscription"
+        ) as get_for_subscription, patch.object(
+            AlertRuleTrigger.objects, "get_for_alert_rule"
+        ) as get_for_alert_rule:
+            processor = self.send_update(rule, trigger.alert_threshold + 1)
+            assert processor.batch is batch
+            other_processor = self.send_update(
+                rule, trigger.alert_threshold + 1, subscription=self.other_sub
+            )
+            # The alert rule and triggers of the batch are not fetched again per update
+            assert get_for_subscription.call_count == 0
+            assert get_for_alert_rule.call_count == 0
+            # Stats are only written once the batch is done
+            assert get_alert_rule_stats(rule, self.sub, [trigger])[0] != processor.last_update
+
+        assert get_alert_rule_stats(rule, self.sub, [trigger])[0] == processor.last_update
+        assert (
+            get_alert_rule_stats(rule, self.other_sub, [trigger])[0] == other_processor.last_update
+        )
+        incident = self.assert_active_incident(rule)
+        self.assert_trigger_exists_with_status(incident, trigger, TriggerStatus.ACTIVE)
+        self.assert_active_incident(rule, self.other_sub)
+
+    def test_batch_resolve(self):
+        rule = self.rule
+        trigger = self.trigger
+        with subscription_batch([self.sub]):
+            self.send_update(rule, trigger.alert_threshold + 1, timedelta(minutes=-2))
+            incident = self.assert_active_incident(rule)
+            # The incident created by the first update is resolved by the second one
+            # without being fetched again
+            processor = self.send_update(rule, rule.resolve_threshold - 1, timedelta(minutes=-1))
+            assert processor.active_incident is None
+
+        self.assert_no_active_incident(rule)
+        self.assert_trigger_exists_with_status(incident, trigger, TriggerStatus.RESOLVED)
+
+    def test_batch_skip_already_processed_update(self):
+        self.send_update(self.rule, self.trigger.alert_threshold)
+        with subscription_batch([self.sub]):
+            self.metrics.incr.reset_mock()
+            self.send_update(self.rule, self.trigger.alert_threshold)
+            self.metrics.incr.assert_called_once_with(
+                "incidents.alert_rules.skipping_already_processed_update"
+            )
+
     def test_alert_dedupe(self):
         # Verify that an alert rule that only expects a single update to be over the
         # alert threshold triggers correctly
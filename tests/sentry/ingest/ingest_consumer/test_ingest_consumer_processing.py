@@ -1,12 +1,14 @@
 import datetime
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock
 
 import pytest
 
 from sentry.event_manager import EventManager
 from sentry.ingest.ingest_consumer import (
+    IngestConsumerWorker,
     process_attachment_chunk,
     process_event,
     process_individual_attachment,
@@ -370,3 +372,68 @@ def test_individual_attachments_missing_chunks(default_project, factories, monke
     attachments = list(EventAttachment.objects.filter(project_id=project_id, event_id=event_id))
 
     assert not attachments
+
+
+@pytest.mark.django_db
+def test_flush_batch_by_project(default_project, factories, monkeypatch):
+    other_project = factories.create_project(organization=default_project.organization)
+    calls = []
+
+    def record(name):
+        def inner(message, projects):
+            assert set(projects) == {message["project_id"]}
+            calls.append((name, message["project_id"], message["id"]))
+
+        return inner
+
+    monkeypatch.setattr("sentry.ingest.ingest_consumer.process_event", record("event"))
+    monkeypatch.setattr(
+        "sentry.ingest.ingest_consumer.process_attachment_chunk", record("attachment_chunk")
+    )
+    monkeypatch.setattr("sentry.ingest.ingest_consumer.process_userreport", record("user_report"))
+
+    batch = [
+        {"type": "event", "project_id": default_project.id, "id": 1},
+        {"type": "event", "project_id": other_project.id, "id": 2},
+        {"type": "attachment_chunk", "project_id": default_project.id, "id": 3},
+        {"type": "user_report", "project_id": default_project.id, "id": 4},
+        {"type": "event", "project_id": default_project.id, "id": 5},
+    ]
+
+    worker = IngestConsumerWorker(project_executor=ThreadPoolExecutor(2))
+    try:
+        worker.flush_batch(batch)
+    finally:
+        worker.shutdown()
+
+    assert [call for call in calls if call[1] == default_project.id] == [
+        ("attachment_chunk", default_project.id, 3),
+        ("event", default_project.id, 1),
+        ("user_report", default_project.id, 4),
+        ("event", default_project.id, 5),
+    ]
+    assert [call for call in calls if call[1] == other_project.id] == [
+        ("event", other_project.id, 2)
+    ]
+
+
+@pytest.mark.django_db
+def test_flush_batch_by_project_fails_batch(default_project, monkeypatch):
+    def process_event(message, projects):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr("sentry.ingest.ingest_consumer.process_event", process_event)
+
+    worker = IngestConsumerWorker(project_executor=ThreadPoolExecutor(2))
+    try:
+        with pytest.raises(RuntimeError):
+            worker.flush_batch([{"type": "event", "project_id": default_project.id}])
+    finally:
+        worker.shutdown()
+
+
+def test_flush_batch_by_project_rejects_event_executor():
+    with pytest.raises(ValueError):
+        IngestConsumerWorker(
+            process_event_executor=ThreadPoolExecutor(1), project_executor=ThreadPoolExecutor(2)
+        )
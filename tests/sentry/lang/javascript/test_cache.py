@@ -1,6 +1,7 @@
+from types import SimpleNamespace
 from unittest import TestCase
 
-from sentry.lang.javascript.cache import SourceCache
+from sentry.lang.javascript.cache import ParsedViewCache, SourceCache, make_source_view
 
 
 class BasicCacheTest(TestCase):
@@ -37,3 +38,56 @@ class BasicCacheTest(TestCase):
         # fall back to utf-8
         cache.add(url, "foobar".encode("utf-32"), encoding="utf-32")
         assert cache.get(url)[0] == "foobar"
+
+
+class ParsedViewCacheTest(TestCase):
+    def test_get_or_parse(self):
+        cache = ParsedViewCache(max_size=1024)
+        release = SimpleNamespace(id=1)
+        other_release = SimpleNamespace(id=2)
+        parsed = []
+
+        def parse(body):
+            parsed.append(body)
+            return make_source_view(body)
+
+        url = "http://example.com/foo.js"
+        view = cache.get_or_parse("source", b"foo", parse, release=release, url=url)
+        assert cache.get_or_parse("source", b"foo", parse, release=release, url=url) is view
+        assert parsed == [b"foo"]
+
+        # changed contents, other releases and other urls are cached separately
+        assert cache.get_or_parse("source", b"bar", parse, release=release, url=url)[0] == "bar"
+        cache.get_or_parse("source", b"foo", parse, release=other_release, url=url)
+        cache.get_or_parse("source", b"foo", parse, release=release, url=url + "x")
+        assert parsed == [b"foo", b"bar", b"foo", b"foo"]
+
+        cache.invalidate_release(release.id)
+        cache.get_or_parse("source", b"foo", parse, release=other_release, url=url)
+        cache.get_or_parse("source", b"foo", parse, release=release, url=url)
+        assert parsed == [b"foo", b"bar", b"foo", b"foo", b"foo"]
+
+    def test_evicts_by_size(self):
+        cache = ParsedViewCache(max_size=10)
+        parsed = []
+
+        def parse(body):
+            parsed.append(body)
+            return make_source_view(body)
+
+        cache.get_or_parse("source", b"a" * 6, parse)
+        cache.get_or_parse("source", b"b" * 6, parse)
+        cache.get_or_parse("source", b"a" * 6, parse)
+        assert parsed == [b"a" * 6, b"b" * 6, b"a" * 6]
+
+    def test_disabled(self):
+        cache = ParsedViewCache(max_size=0)
+        parsed = []
+
+        def parse(body):
+            parsed.append(body)
+            return make_source_view(body)
+
+        cache.get_or_parse("source", b"foo", parse)
+        cache.get_or_parse("source", b"foo", parse)
+        assert parsed == [b"foo", b"foo"]
@@ -33,6 +33,7 @@ from sentry.lang.javascript.processor import (
 )
 from sentry.models import EventError, File, Release, ReleaseFile
 from sentry.models.releasefile import ARTIFACT_INDEX_FILENAME, update_artifact_index
+from sentry.stacktraces.processing import ProcessableFrame, process_stacktraces
 from sentry.testutils import TestCase
 from sentry.testutils.helpers.options import override_options
 from sentry.utils import json
@@ -1372,3 +1373,145 @@ class CacheSourceTest(TestCase):
         # now we have an error
         assert len(processor.cache.get_errors(abs_path)) == 1
         assert processor.cache.get_errors(abs_path)[0] == {"url": map_url, "type": "js_no_source"}
+
+
+class PopulateSourceCacheTest(TestCase):
+    @responses.activate
+    def test_fetches_sources_and_sourcemaps(self):
+        for i in range(3):
+            responses.add(
+                responses.GET,
+                f"http://example.com/file{i}.js",
+                body=f"console.log({i})\n//# sourceMappingURL=file{i}.js.map",
+            )
+            responses.add(
+                responses.GET,
+                f"http://example.com/file{i}.js.map",
+                body=json.dumps(
+                    {"version": 3, "sources": [f"file{i}.ts"], "names": [], "mappings": "AAAA"}
+                ),
+            )
+
+        processor = JavaScriptStacktraceProcessor(
+            data={}, stacktrace_infos=None, project=self.project
+        )
+        frames = [{"abs_path": f"http://example.com/file{i}.js"} for i in range(3)]
+        processor.populate_source_cache(frames)
+
+        assert len(responses.calls) == 6
+        assert processor.fetch_count == 3
+        for i in range(3):
+            assert processor.cache.get(f"http://example.com/file{i}.js")
+            assert processor.cache.get_errors(f"http://example.com/file{i}.js") == []
+            assert f"http://example.com/file{i}.js.map" in processor.sourcemaps
+
+    @responses.activate
+    def test_respects_max_fetches(self):
+        for i in range(3):
+            responses.add(responses.GET, f"http://example.com/file{i}.js", body="console.log()")
+
+        processor = JavaScriptStacktraceProcessor(
+            data={}, stacktrace_infos=None, project=self.project
+        )
+        processor.max_fetches = 2
+        frames = [{"abs_path": f"http://example.com/file{i}.js"} for i in range(3)]
+        processor.populate_source_cache(frames)
+
+        assert len(responses.calls) == 2
+        errors = [processor.cache.get_errors(frame["abs_path"]) for frame in frames]
+        assert errors.count([{"type": EventError.JS_TOO_MANY_REMOTE_SOURCES}]) == 1
+
+    @responses.activate
+    def test_records_fetch_errors(self):
+        responses.add(responses.GET, "http://example.com/file.js", status=404)
+
+        processor = JavaScriptStacktraceProcessor(
+            data={}, stacktrace_infos=None, project=self.project
+        )
+        processor.populate_source_cache([{"abs_path": "http://example.com/file.js"}])
+
+        errors = processor.cache.get_errors("http://example.com/file.js")
+        assert len(errors) == 1
+        assert errors[0]["type"] == EventError.FETCH_INVALID_HTTP_CODE
+
+
+class ProcessedFrameCacheTest(TestCase):
+    def make_data(self, **kwargs):
+        return dict(
+            {
+                "event_id": "a" * 32,
+                "project": self.project.id,
+                "platform": "javascript",
+                "stacktrace": {
+                    "frames": [{"abs_path": "http://example.com/file.js", "lineno": 1, "colno": 1}]
+                },
+            },
+            **kwargs,
+        )
+
+    def make_processors(self, data, infos):
+        return [JavaScriptStacktraceProcessor(data, infos, self.project)]
+
+    @responses.activate
+    def test_reuses_processed_frames(self):
+        responses.add(
+            responses.GET,
+            "http://example.com/file.js",
+            body="console.log(1)\n//# sourceMappingURL=file.js.map",
+        )
+        responses.add(
+            responses.GET,
+            "http://example.com/file.js.map",
+            body=json.dumps(
+                {
+                    "version": 3,
+                    "sources": ["file.ts"],
+                    "sourcesContent": ["log(1)"],
+                    "names": [],
+                    "mappings": "AAAA",
+                }
+            ),
+        )
+
+        first = process_stacktraces(self.make_data(), make_processors=self.make_processors)
+        frame = first["stacktrace"]["frames"][0]
+        assert frame["abs_path"] == "http://example.com/file.ts"
+        assert frame["context_line"] == "log(1)"
+
+        with patch("sentry.lang.javascript.processor.fetch_file") as fetch_file, patch.object(
+            JavaScriptStacktraceProcessor, "process_frame"
+        ) as process_frame:
+            second = process_stacktraces(self.make_data(), make_processors=self.make_processors)
+
+        assert not fetch_file.called
+        assert not process_frame.called
+        assert second["stacktrace"] == first["stacktrace"]
+
+    def test_cache_key_changes_with_release_files(self):
+        release = self.create_release(version="abc")
+        data = self.make_data(release="abc")
+
+        def get_cache_key():
+            processor = JavaScriptStacktraceProcessor(data, None, self.project)
+            processable_frame = ProcessableFrame(
+                data["stacktrace"]["frames"][0], 0, processor, None, []
+            )
+            processor.preprocess_frame(processable_frame)
+            return processable_frame.cache_key
+
+        cache_key = get_cache_key()
+        assert cache_key is not None
+        assert get_cache_key() == cache_key
+
+        self.create_release_file(release_id=release.id, name="http://example.com/file.js")
+        assert get_cache_key() != cache_key
+
+    def test_no_cache_key_without_location(self):
+        data = self.make_data()
+        processor = JavaScriptStacktraceProcessor(data, None, self.project)
+        processable_frame = ProcessableFrame(
+            {"abs_path": "http://example.com/file.js"}, 0, processor, None, []
+        )
+        processor.preprocess_frame(processable_frame)
+        assert processable_frame.cache_key is None
+        assert processable_frame.data == {"token_name": None}
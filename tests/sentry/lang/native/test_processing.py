@@ -8,7 +8,7 @@ from unittest import mock
 
 import pytest
 
-from sentry.lang.native.processing import _merge_image, process_payload
+from sentry.lang.native.processing import PayloadBatch, _merge_image, process_payload
 from sentry.models.eventerror import EventError
 from sentry.utils.safe import get_path
 
@@ -152,3 +152,60 @@ def test_cocoa_function_name(mock_symbolicator, default_project):
 
     function_name = get_path(data, "exception", "values", 0, "stacktrace", "frames", 0, "function")
     assert function_name == "thunk for closure"
+
+
+@pytest.mark.django_db
+@mock.patch("sentry.lang.native.processing.Symbolicator")
+def test_payload_batch(mock_symbolicator, default_project):
+    def make_event(event_id, signal=None):
+        return {
+            "platform": "native",
+            "project": default_project.id,
+            "event_id": event_id,
+            "exception": {
+                "values": [
+                    {
+                        "stacktrace": {"frames": [{"instruction_addr": 0}]},
+                        "mechanism": {"type": "generic", "meta": {"signal": {"number": signal}}},
+                    }
+                ]
+            },
+        }
+
+    def process_payloads(payloads):
+        return [
+            {
+                "status": "completed",
+                "stacktraces": [
+                    {"frames": [{"original_index": 0, "function": f"function_{i}"}]}
+                    for _ in payload["stacktraces"]
+                ],
+                "modules": [],
+            }
+            for i, payload in enumerate(payloads)
+        ]
+
+    mock_symbolicator.for_batch.return_value = mock_symbolicator
+    mock_symbolicator.process_payloads.side_effect = process_payloads
+
+    events = [make_event("1"), make_event("2"), make_event("3", signal=11)]
+    batch = PayloadBatch(events)
+
+    for event in events:
+        assert event["event_id"] in batch
+    assert "4" not in batch
+
+    # The first two events share modules and signal and are symbolicated together
+    first = batch.process_payload(events[0])
+    assert mock_symbolicator.process_payloads.call_count == 1
+    second = batch.process_payload(events[1])
+    assert mock_symbolicator.process_payloads.call_count == 1
+    third = batch.process_payload(events[2])
+    assert mock_symbolicator.process_payloads.call_count == 2
+
+    def function_name(data):
+        return get_path(data, "exception", "values", 0, "stacktrace", "frames", 0, "function")
+
+    assert function_name(first) == "function_0"
+    assert function_name(second) == "function_1"
+    assert function_name(third) == "function_0"
@@ -1,10 +1,19 @@
 import copy
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
 
 import pytest
 
 from sentry.lang.native import symbolicator
-from sentry.lang.native.symbolicator import get_sources_for_project, redact_internal_sources
+from sentry.lang.native.symbolicator import (
+    SymbolicatorSession,
+    get_batch_key,
+    get_sources_for_project,
+    redact_internal_sources,
+    split_batch_response,
+)
 from sentry.testutils.helpers import Feature
+from sentry.utils import json
 
 CUSTOM_SOURCE_CONFIG = """
 [{
@@ -264,3 +273,100 @@ class TestAliasReversion:
         reverse_aliases = symbolicator.reverse_aliases_map(builtin_sources)
         expected = {"sentry:ios-source": "sentry:ios", "sentry:tvos-source": "sentry:ios"}
         assert reverse_aliases == expected
+
+
+@pytest.fixture
+def stub_symbolicator():
+    """A local HTTP server answering symbolication requests like symbolicator."""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            requests.append(body)
+            response = json.dumps(
+                {
+                    "status": "completed",
+                    "stacktraces": [
+                        {"frames": [{"original_index": 0, "function": frame["function"]}]}
+                        for frame in (stacktrace["frames"][0] for stacktrace in body["stacktraces"])
+                    ],
+                    "modules": body["modules"],
+                }
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield "http://127.0.0.1:%s/" % server.server_port, requests
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.django_db
+def test_symbolicate_stacktraces_batch(stub_symbolicator):
+    url, requests = stub_symbolicator
+    modules = [{"type": "macho", "debug_id": "a", "image_addr": "0x1000"}]
+    payloads = [
+        {
+            "stacktraces": [{"frames": [{"function": f"{name}-{i}"}]} for i in range(count)],
+            "modules": modules,
+            "signal": None,
+        }
+        for name, count in (("first", 2), ("second", 1))
+    ]
+    assert get_batch_key(payloads[0]) == get_batch_key(payloads[1])
+
+    with SymbolicatorSession(url=url, project_id="1", event_id="abc", timeout=5) as sess:
+        response = sess.symbolicate_stacktraces_batch(payloads)
+
+    assert len(requests) == 1
+    assert len(requests[0]["stacktraces"]) == 3
+
+    first, second = split_batch_response(response, payloads)
+    assert [st["frames"][0]["function"] for st in first["stacktraces"]] == ["first-0", "first-1"]
+    assert [st["frames"][0]["function"] for st in second["stacktraces"]] == ["second-0"]
+    assert first["modules"] == second["modules"] == modules
+    assert first["modules"] is not second["modules"]
+
+
+def test_batch_key():
+    payload = {"stacktraces": [], "modules": [{"debug_id": "a"}], "signal": None}
+    assert get_batch_key(payload) != get_batch_key(dict(payload, signal=11))
+    assert get_batch_key(payload) != get_batch_key(dict(payload, modules=[{"debug_id": "b"}]))
+
+
+def test_split_batch_response_module_status():
+    modules = [
+        {"type": "macho", "debug_id": "a", "image_addr": "0x1000", "image_size": 0x1000},
+        {"type": "macho", "debug_id": "b", "image_addr": "0x2000", "image_size": 0x1000},
+    ]
+    payloads = [
+        {"stacktraces": [{"frames": [{"instruction_addr": "0x1100"}]}], "modules": modules},
+        {"stacktraces": [{"frames": [{"instruction_addr": "0x2100"}]}], "modules": modules},
+    ]
+    response = {
+        "status": "completed",
+        "stacktraces": [{"frames": []}, {"frames": []}],
+        "modules": [dict(module, debug_status="missing") for module in modules],
+    }
+
+    first, second = split_batch_response(response, payloads)
+    assert [module["debug_status"] for module in first["modules"]] == ["missing", "unused"]
+    assert [module["debug_status"] for module in second["modules"]] == ["unused", "missing"]
+
+
+def test_split_failed_batch_response():
+    payloads = [{"stacktraces": [{}], "modules": []}, {"stacktraces": [{}], "modules": []}]
+    response = {"status": "failed", "message": "internal server error"}
+    assert split_batch_response(response, payloads) == [response, response]
@@ -23,6 +23,27 @@ class GetOrCreateTest(TestCase):
         with self.assertNumQueries(0):
             assert Environment.get_for_organization_id(project.organization_id, "prod").id == env.id
 
+    def test_many(self):
+        project = self.create_project()
+        project2 = self.create_project(organization=project.organization)
+        existing = Environment.get_or_create(project=project, name="prod")
+
+        envs = Environment.get_or_create_many(
+            [(project, "prod"), (project2, "prod"), (project, "staging"), (project, None)]
+        )
+
+        assert envs[(project.id, "prod")].id == existing.id
+        assert envs[(project2.id, "prod")].id == existing.id
+        assert envs[(project.id, "staging")].name == "staging"
+        assert envs[(project.id, None)].name == ""
+        assert set(existing.projects.all()) == {project, project2}
+        assert list(envs[(project.id, "staging")].projects.all()) == [project]
+
+        with self.assertNumQueries(0):
+            assert Environment.get_or_create_many([(project2, "prod")]) == {
+                (project2.id, "prod"): existing
+            }
+
 
 @pytest.mark.parametrize(
     "val,expected",
@@ -1292,3 +1292,41 @@ class ClearCommitsTestCase(TestCase):
         assert Commit.objects.filter(
             id=commit2.id, organization_id=org.id, repository_id=repo.id
         ).exists()
+
+
+class GetOrCreateManyTest(TestCase):
+    def test_many(self):
+        project = self.create_project()
+        project2 = self.create_project(organization=project.organization)
+        existing = Release.get_or_create(project=project, version="1.0")
+        date_added = timezone.now()
+
+        releases = Release.get_or_create_many(
+            {(project, "1.0"): date_added, (project2, "2.0"): date_added}
+        )
+
+        assert releases[(project.id, "1.0")] == existing
+        new_release = releases[(project2.id, "2.0")]
+        assert new_release.version == "2.0"
+        assert new_release.date_added == date_added
+        assert list(new_release.projects.all()) == [project2]
+
+        with self.assertNumQueries(0):
+            assert Release.get_or_create_many({(project2, "2.0"): date_added}) == {
+                (project2.id, "2.0"): new_release
+            }
+
+    def test_many_uncached(self):
+        project = self.create_project()
+        project2 = self.create_project(organization=project.organization)
+        release = self.create_release(project=project, version="1.0")
+        project_release = self.create_release(project=project2, version=f"{project2.slug}-1.0")
+        date_added = timezone.now()
+
+        with patch("sentry.models.release.cache.get_many", return_value={}):
+            with self.assertNumQueries(1):
+                releases = Release.get_or_create_many(
+                    {(project, "1.0"): date_added, (project2, "1.0"): date_added}
+                )
+
+        assert releases == {(project.id, "1.0"): release, (project2.id, "1.0"): project_release}
@@ -4,7 +4,8 @@ from datetime import datetime, timezone
 from io import BytesIO
 from threading import Thread
 from time import sleep
-from zipfile import ZipFile
+from unittest.mock import patch
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
 
 import pytest
 
@@ -14,12 +15,14 @@ from sentry.models.distribution import Distribution
 from sentry.models.file import File
 from sentry.models.releasefile import (
     ARTIFACT_INDEX_FILENAME,
+    BUNDLE_INDEX_SUFFIX,
     _ArtifactIndexGuard,
     delete_from_artifact_index,
     read_artifact_index,
     update_artifact_index,
 )
 from sentry.testutils import TestCase, TransactionTestCase
+from sentry.testutils.helpers.options import override_options
 from sentry.utils import json
 
 
@@ -113,6 +116,72 @@ class ReleaseFileCacheTest(TestCase):
         else:
             assert False, "file should not exist"
 
+    def create_bundle(self, contents=b"foo"):
+        buffer = BytesIO()
+        with ZipFile(buffer, mode="w") as zf:
+            zf.writestr(
+                "manifest.json",
+                json.dumps(
+                    {
+                        "files": {
+                            "foo.js": {"url": "~/foo.js", "headers": {"x-foo": "bar"}},
+                            "bar.js": {"url": "~/bar.js"},
+                        }
+                    }
+                ),
+            )
+            zf.writestr("foo.js", contents, compress_type=ZIP_DEFLATED)
+            zf.writestr("bar.js", b"bar", compress_type=ZIP_STORED)
+
+        file = self.create_file(name="bundle.zip")
+        file.putfile(BytesIO(buffer.getvalue()))
+        return self.create_release_file(file=file)
+
+    def test_getbundle(self):
+        release_file = self.create_bundle(contents=b"foo" * 1000)
+        expected_path = os.path.join(
+            options.get("releasefile.cache-path"),
+            str(self.organization.id),
+            str(release_file.file.id),
+        )
+
+        bundle = ReleaseFile.cache.getbundle(release_file)
+        assert bundle.read_by_url("~/foo.js") == (b"foo" * 1000, {"x-foo": "bar"})
+        assert bundle.read_by_url("~/bar.js") == (b"bar", {})
+        with pytest.raises(KeyError):
+            bundle.read_by_url("~/baz.js")
+
+        os.stat(expected_path)
+        os.stat(expected_path + BUNDLE_INDEX_SUFFIX)
+
+        # Open bundles are reused
+        assert ReleaseFile.cache.getbundle(release_file) is bundle
+
+    def test_evict_bundles(self):
+        first = self.create_bundle(b"first")
+        second = self.create_bundle(b"second")
+
+        first_bundle = ReleaseFile.cache.getbundle(first)
+        first_path = os.path.join(
+            options.get("releasefile.cache-path"), str(self.organization.id), str(first.file.id)
+        )
+        os.utime(first_path, (0, 0))
+
+        # Only leave room for one bundle, the least recently used one goes
+        with override_options({"releasefile.bundle-cache-size": first.file.size * 2}):
+            bundle = ReleaseFile.cache.getbundle(second)
+
+        assert bundle.read_by_url("~/foo.js") == (b"second", {"x-foo": "bar"})
+        assert not os.path.exists(first_path)
+        assert not os.path.exists(first_path + BUNDLE_INDEX_SUFFIX)
+        assert first_bundle._mmap.closed
+
+    def test_evict_bundles_not_scanned_within_budget(self):
+        ReleaseFile.cache.evict_bundles()
+        with patch.object(ReleaseFile.cache, "evict_bundles") as evict_bundles:
+            ReleaseFile.cache.getbundle(self.create_bundle(b"first"))
+        assert evict_bundles.call_count == 0
+
 
 class ReleaseArchiveTestCase(TestCase):
     def create_archive(self, fields, files, dist=None):
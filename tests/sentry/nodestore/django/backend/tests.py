@@ -5,7 +5,7 @@ from unittest import mock
 import pytest
 from django.utils import timezone
 
-from sentry.nodestore.base import json_dumps
+from sentry.nodestore.base import NEGATIVE_CACHE_ENTRY_WEIGHT, json_dumps
 from sentry.nodestore.django.backend import DjangoNodeStorage
 from sentry.nodestore.django.models import Node
 from sentry.utils.strings import compress
@@ -132,3 +132,59 @@ class TestDjangoNodeStorage:
             self.ns.get("node_4")
             self.ns.get("node_4")
             assert mock_get.call_count == 2
+
+    def test_local_cache(self):
+        ns = DjangoNodeStorage(local_cache_size=1024 * 1024)
+        node_1 = ("a" * 32, {"foo": "a"})
+        node_2 = ("b" * 32, {"foo": "b"})
+
+        for node_id, data in [node_1, node_2]:
+            Node.objects.create(id=node_id, data=compress(json_dumps(data).encode("utf8")))
+
+        with mock.patch.object(ns, "_get_cache_item", return_value=None), mock.patch.object(
+            ns, "_get_cache_items", return_value={}
+        ):
+            assert ns.get(node_1[0]) == node_1[1]
+            assert ns.get_multi([node_1[0], node_2[0]]) == {
+                node_1[0]: node_1[1],
+                node_2[0]: node_2[1],
+            }
+
+            # Payloads are copies that can be mutated by the caller
+            ns.get(node_1[0])["foo"] = "mutated"
+
+            with mock.patch.object(Node.objects, "get") as mock_get, mock.patch.object(
+                Node.objects, "filter"
+            ) as mock_filter:
+                assert ns.get(node_1[0]) == node_1[1]
+                assert ns.get_multi([node_1[0], node_2[0]]) == {
+                    node_1[0]: node_1[1],
+                    node_2[0]: node_2[1],
+                }
+                assert mock_get.call_count == 0
+                assert mock_filter.call_count == 0
+
+            # Deletion and setting invalidate the local cache
+            ns.delete(node_1[0])
+            assert ns.get(node_1[0]) is None
+            new_value = {"event_id": "d" * 32}
+            ns.set(node_1[0], new_value)
+            assert ns.get(node_1[0]) == new_value
+
+            # Missing rows are remembered for a while
+            assert ns.get("node_3") is None
+            assert ns.get_multi(["node_3", node_2[0]]) == {node_2[0]: node_2[1]}
+            with mock.patch.object(Node.objects, "get") as mock_get:
+                assert ns.get("node_3") is None
+                assert mock_get.call_count == 0
+
+    def test_local_cache_evicts_negative_entries(self):
+        ns = DjangoNodeStorage(local_cache_size=2 * NEGATIVE_CACHE_ENTRY_WEIGHT)
+
+        with mock.patch.object(ns, "_get_cache_item", return_value=None):
+            for i in range(3):
+                assert ns.get(f"node_{i}") is None
+
+        assert len(ns.local_cache) == 2
+        assert "node_0" not in ns.local_cache
+        assert ns.local_cache.weight == 2 * NEGATIVE_CACHE_ENTRY_WEIGHT
@@ -20,14 +20,24 @@ def nullcontext(returning):
 
 
 @pytest.fixture(
-    params=["bigtable-mocked", "bigtable-real", pytest.param("django", marks=pytest.mark.django_db)]
+    params=[
+        "bigtable-mocked",
+        "bigtable-mocked-binary",
+        "bigtable-real",
+        pytest.param("django", marks=pytest.mark.django_db),
+        pytest.param("django-binary", marks=pytest.mark.django_db),
+    ]
 )
 def ns(request):
     # backends are returned from context managers to support teardown when required
     backends = {
         "bigtable-mocked": lambda: nullcontext(MockedBigtableNodeStorage(project="test")),
+        "bigtable-mocked-binary": lambda: nullcontext(
+            MockedBigtableNodeStorage(project="test", binary_encoding=True)
+        ),
         "bigtable-real": lambda: get_temporary_bigtable_nodestorage(),
         "django": lambda: nullcontext(DjangoNodeStorage()),
+        "django-binary": lambda: nullcontext(DjangoNodeStorage(binary_encoding=True)),
     }
 
     ctx = backends[request.param]()
@@ -97,3 +107,15 @@ def test_set_subkeys(ns):
     ns.delete("node_1")
     assert ns.get("node_1") is None
     assert ns.get("node_1", subkey="other") is None
+
+
+def test_binary_encoding_reads_legacy_values(ns):
+    ns.set_subkeys("node_1", {None: {"foo": "a"}, "other": {"foo": "b"}})
+
+    binary_encoding = ns.binary_encoding
+    ns.binary_encoding = not binary_encoding
+    try:
+        assert ns.get("node_1") == {"foo": "a"}
+        assert ns.get("node_1", subkey="other") == {"foo": "b"}
+    finally:
+        ns.binary_encoding = binary_encoding
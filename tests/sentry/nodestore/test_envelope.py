@@ -0,0 +1,45 @@
+import pytest
+import zstandard
+
+from sentry.nodestore.envelope import (
+    COMPRESSION_NONE,
+    EnvelopeCodec,
+    EnvelopeError,
+    is_envelope,
+)
+
+
+def test_roundtrip():
+    codec = EnvelopeCodec()
+    value = codec.encode({None: b'{"foo":"a"}', "unprocessed": b'{"foo":"b"}'})
+
+    assert is_envelope(value)
+    assert not is_envelope(b'{"foo":"a"}')
+    assert codec.decode(value) == b'{"foo":"a"}'
+    assert codec.decode(value, subkey="unprocessed") == b'{"foo":"b"}'
+    assert codec.decode(value, subkey="missing") is None
+
+
+def test_uncompressed():
+    value = EnvelopeCodec(compression=COMPRESSION_NONE).encode({None: b'{"foo":"a"}'})
+    assert b'{"foo":"a"}' in value
+    assert EnvelopeCodec().decode(value) == b'{"foo":"a"}'
+
+
+def test_dictionary():
+    samples = [b'{"event_id":"%032d","platform":"python","level":"error"}' % i for i in range(1000)]
+    dictionary = zstandard.train_dictionary(1024, samples)
+    codec = EnvelopeCodec(dictionary=dictionary)
+    value = codec.encode({None: samples[0]})
+    assert codec.decode(value) == samples[0]
+
+    # envelopes written without a dictionary stay readable
+    assert codec.decode(EnvelopeCodec().encode({None: samples[1]})) == samples[1]
+
+    with pytest.raises(EnvelopeError):
+        EnvelopeCodec().decode(value)
+
+
+def test_truncated():
+    with pytest.raises(EnvelopeError):
+        EnvelopeCodec().decode(b"\xffSNE")
@@ -0,0 +1,68 @@
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from arroyo.backends.kafka import KafkaPayload
+from arroyo.types import Message, Partition, Topic
+
+from sentry.sentry_metrics.indexer.mock import SimpleIndexer
+from sentry.sentry_metrics.multiprocess import process_messages
+from sentry.utils import json
+
+BATCH_SIZE = 1000
+
+
+def benchmark_available():
+    try:
+        import pytest_benchmark  # NOQA
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+def make_batch(size=BATCH_SIZE):
+    """
+    A batch of synthetic metrics with few metric names and tag keys, and tag
+    values of varying cardinality.
+    """
+    ts = int(time.time())
+    messages = []
+    for i in range(size):
+        payload = {
+            "name": f"sentry.transactions.measurement_{i % 20}",
+            "tags": {
+                "environment": ("production", "staging")[i % 2],
+                "release": f"backend@{i % 50}",
+                "transaction": f"/api/0/endpoint/{i % 500}/",
+                "transaction.status": "ok",
+            },
+            "timestamp": ts,
+            "type": "d",
+            "value": [i * 1.5, i * 2.5],
+            "org_id": i % 10,
+            "project_id": i % 100,
+        }
+        messages.append(
+            Message(
+                Partition(Topic("topic"), 0),
+                i + 1,
+                KafkaPayload(None, json.dumps(payload).encode("utf-8"), []),
+                datetime.now(),
+            )
+        )
+
+    last = messages[-1]
+    return Message(last.partition, last.offset, messages, last.timestamp)
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@patch("sentry.sentry_metrics.multiprocess.get_indexer", return_value=SimpleIndexer())
+def test_benchmark_process_messages(mock_indexer, benchmark):
+    outer_message = make_batch()
+    assert len(process_messages(outer_message)) == BATCH_SIZE
+
+    benchmark(process_messages, outer_message)
+    # a single batch is processed by a single core
+    benchmark.extra_info["messages_per_second"] = BATCH_SIZE / benchmark.stats.stats.mean
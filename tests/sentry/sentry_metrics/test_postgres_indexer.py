@@ -1,5 +1,8 @@
+from unittest import mock
+
+from sentry.sentry_metrics.indexer.cache import StringIndexerCache
 from sentry.sentry_metrics.indexer.models import MetricsKeyIndexer
-from sentry.sentry_metrics.indexer.postgres import PGStringIndexer
+from sentry.sentry_metrics.indexer.postgres import PGStringIndexer, indexer_cache
 from sentry.testutils.cases import TestCase
 
 
@@ -30,3 +33,55 @@ class PostgresIndexerTest(TestCase):
         # test invalid values
         assert PGStringIndexer().resolve(org_id, "beep") is None
         assert PGStringIndexer().reverse_resolve(1234) is None
+
+    def test_bulk_record_cached(self):
+        org_id = self.organization.id
+        other_org_id = self.create_organization().id
+        results = self.indexer.bulk_record({org_id: {"hello", "hey"}})
+
+        with mock.patch.object(
+            MetricsKeyIndexer.objects, "bulk_create", side_effect=AssertionError
+        ), mock.patch.object(MetricsKeyIndexer.objects, "filter", side_effect=AssertionError):
+            assert self.indexer.bulk_record({org_id: {"hello", "hey"}}) == results
+
+        # the string is already known, the other organization is only cached
+        with mock.patch.object(
+            MetricsKeyIndexer.objects, "bulk_create", side_effect=AssertionError
+        ), mock.patch.object(MetricsKeyIndexer.objects, "filter", side_effect=AssertionError):
+            assert self.indexer.bulk_record({org_id: {"hello"}, other_org_id: {"hello"}}) == {
+                "hello": results["hello"]
+            }
+        assert indexer_cache.get_many({(other_org_id, "hello")}) == {
+            (other_org_id, "hello"): results["hello"]
+        }
+
+
+class StringIndexerCacheTest(TestCase):
+    def test_local_cache(self):
+        indexer_cache = StringIndexerCache(local_size=10)
+        indexer_cache.set_many({(1, "hello"): 10})
+
+        with mock.patch("sentry.sentry_metrics.indexer.cache.cache") as shared_cache:
+            assert indexer_cache.get_many({(1, "hello")}) == {(1, "hello"): 10}
+            assert indexer_cache.get_many({(2, "hello")}) == {}
+        assert shared_cache.get_many.call_count == 1
+
+        # the shared cache is also filled
+        indexer_cache.clear()
+        assert indexer_cache.get_many({(1, "hello"), (2, "hello")}) == {(1, "hello"): 10}
+
+    def test_admission_threshold(self):
+        indexer_cache = StringIndexerCache(local_size=10, admission_threshold=2)
+        indexer_cache.set_many({(1, "hello"): 10, (1, "rare"): 11})
+        assert (1, "hello") not in indexer_cache.local_cache
+
+        # looked up a second time
+        assert indexer_cache.get_many({(1, "hello")}) == {(1, "hello"): 10}
+        assert (1, "hello") in indexer_cache.local_cache
+        assert (1, "rare") not in indexer_cache.local_cache
+
+    def test_disabled_local_cache(self):
+        indexer_cache = StringIndexerCache(local_size=0)
+        indexer_cache.set_many({(1, "hello"): 10})
+        assert indexer_cache.local_cache is None
+        assert indexer_cache.get_many({(1, "hello")}) == {(1, "hello"): 10}
@@ -124,6 +124,85 @@ class HandleMessageTest(BaseQuerySubscriptionTest, TestCase):
         mock_callback.assert_called_once_with(data["payload"], sub)
 
 
+class HandleBatchTest(BaseQuerySubscriptionTest, TestCase):
+    registration_key = "registered_batch_test"
+
+    def setUp(self):
+        super().setUp()
+        self.orig_registry = deepcopy(subscriber_registry)
+
+    def tearDown(self):
+        super().tearDown()
+        subscriber_registry.clear()
+        subscriber_registry.update(self.orig_registry)
+
+    def create_subscription(self):
+        with self.tasks():
+            snuba_query = create_snuba_query(
+                QueryDatasets.EVENTS,
+                "hello",
+                "count()",
+                timedelta(minutes=10),
+                timedelta(minutes=1),
+                None,
+            )
+            sub = create_snuba_subscription(self.project, self.registration_key, snuba_query)
+        sub.refresh_from_db()
+        return sub
+
+    def build_update(self, subscription_id, value):
+        data = deepcopy(self.valid_wrapper)
+        data["payload"]["subscription_id"] = subscription_id
+        data["payload"]["result"] = {"data": [{"hello": value}]}
+        return self.build_mock_message(data, topic=settings.KAFKA_METRICS_SUBSCRIPTIONS_RESULTS)
+
+    def test_ordered_per_subscription(self):
+        calls = []
+
+        def callback(contents, subscription):
+            calls.append((subscription.id, contents["values"]["data"][0]["hello"]))
+
+        register_subscriber(self.registration_key)(callback)
+        sub1 = self.create_subscription()
+        sub2 = self.create_subscription()
+
+        consumer = QuerySubscriptionConsumer("hello", max_batch_size=10, worker_count=2)
+        consumer.handle_batch(
+            [
+                self.build_update(sub1.subscription_id, 1),
+                self.build_update(sub2.subscription_id, 1),
+                self.build_update(sub1.subscription_id, 2),
+                self.build_update(sub2.subscription_id, 2),
+                self.build_update(sub1.subscription_id, 3),
+            ]
+        )
+
+        assert [value for sub_id, value in calls if sub_id == sub1.id] == [1, 2, 3]
+        assert [value for sub_id, value in calls if sub_id == sub2.id] == [1, 2]
+
+    def test_skips_invalid_updates(self):
+        mock_callback = mock.Mock(side_effect=[Exception("boom"), None])
+        register_subscriber(self.registration_key)(mock_callback)
+        sub = self.create_subscription()
+
+        invalid = self.build_mock_message({"version": 3, "payload": {}})
+        with mock.patch("sentry.snuba.tasks._snuba_pool") as pool:
+            pool.urlopen.return_value.status = 202
+            self.consumer.handle_batch(
+                [
+                    invalid,
+                    self.build_update(sub.subscription_id, 1),
+                    self.build_update("missing", 1),
+                    self.build_update(sub.subscription_id, 2),
+                ]
+            )
+            assert pool.urlopen.call_count == 1
+
+        assert mock_callback.call_count == 2
+        assert mock_callback.call_args[0][0]["values"] == {"data": [{"hello": 2}]}
+        assert mock_callback.call_args[0][1] == sub
+
+
 class ParseMessageValueTest(BaseQuerySubscriptionTest, unittest.TestCase):
     def run_test(self, message):
         self.consumer.parse_message_value(json.dumps(message))
@@ -5,9 +5,12 @@ import pytest
 from sentry.plugins.base.v2 import Plugin2
 from sentry.tasks.store import preprocess_event
 from sentry.tasks.symbolication import (
+    RetrySymbolication,
     should_demote_symbolication,
     submit_symbolicate,
+    symbolicate_batch,
     symbolicate_event,
+    symbolicate_events,
 )
 from sentry.testutils.helpers.options import override_options
 from sentry.testutils.helpers.task_runner import TaskRunner
@@ -245,3 +248,144 @@ def test_submit_symbolicate_queue_switch(
             data=data,
         )
     assert mock_submit_symbolicate.call_count == 4
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("use_async", [False, True])
+def test_symbolicate_events(
+    default_project,
+    mock_event_processing_store,
+    mock_process_event,
+    mock_get_symbolication_function,
+    use_async,
+):
+    events = [
+        {
+            "cache_key": f"e:{event_id}",
+            "start_time": 1,
+            "data": {"project": default_project.id, "platform": "native", "event_id": event_id},
+        }
+        for event_id in ("a", "b")
+    ]
+    mock_event_processing_store.store.side_effect = lambda data: "e:{}".format(data["event_id"])
+
+    attempts = []
+
+    def symbolicate(data):
+        # Symbolicator asks to retry once for every event
+        attempts.append(data["event_id"])
+        if attempts.count(data["event_id"]) == 1:
+            raise RetrySymbolication(retry_after=0)
+        return dict(data, symbolicated=True)
+
+    mock_get_symbolication_function.return_value = symbolicate
+
+    with override_options({"symbolicate-event.async": use_async}), mock.patch(
+        "sentry.tasks.store.do_process_event"
+    ) as mock_do_process_event:
+        symbolicate_events(events=events)
+
+    assert sorted(attempts) == ["a", "a", "b", "b"]
+    if use_async:
+        # Both events were in flight at the same time
+        assert sorted(attempts[:2]) == ["a", "b"]
+    else:
+        assert attempts == ["a", "a", "b", "b"]
+
+    assert sorted(call.kwargs["data"]["event_id"] for call in mock_do_process_event.mock_calls) == [
+        "a",
+        "b",
+    ]
+    for call in mock_do_process_event.mock_calls:
+        assert call.kwargs["data"]["symbolicated"]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("enabled", [False, True])
+def test_symbolicate_batch(
+    default_project, mock_process_event, mock_save_event, mock_symbolicate_event, enabled
+):
+    datas = [
+        {"project": default_project.id, "platform": "native", "event_id": event_id}
+        for event_id in ("a", "b")
+    ]
+
+    with override_options({"symbolicate-event.batch": enabled}), mock.patch(
+        "sentry.tasks.symbolication.symbolicate_events"
+    ) as mock_symbolicate_events:
+        with symbolicate_batch():
+            for data in datas:
+                preprocess_event(cache_key=f"e:{data['event_id']}", data=data)
+
+    if enabled:
+        assert mock_symbolicate_event.delay.call_count == 0
+        assert mock_symbolicate_events.delay.call_count == 1
+        events = mock_symbolicate_events.delay.call_args.kwargs["events"]
+        assert [event["cache_key"] for event in events] == ["e:a", "e:b"]
+        assert [event["data"]["event_id"] for event in events] == ["a", "b"]
+    else:
+        assert mock_symbolicate_event.delay.call_count == 2
+        assert mock_symbolicate_events.delay.call_count == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("use_async", [False, True])
+def test_symbolicate_events_resubmits_after_deadline(
+    use_async,
+    default_project,
+    mock_event_processing_store,
+    mock_get_symbolication_function,
+    mock_symbolicate_event,
+):
+    events = [
+        {
+            "cache_key": f"e:{event_id}",
+            "start_time": 1,
+            "data": {"project": default_project.id, "platform": "native", "event_id": event_id},
+        }
+        for event_id in ("a", "b")
+    ]
+
+    with mock.patch(
+        "sentry.tasks.symbolication.SYMBOLICATOR_BATCH_START_TIMEOUT", -1
+    ), override_options({"symbolicate-event.async": use_async}):
+        symbolicate_events(events=events)
+
+    assert mock_get_symbolication_function.return_value.call_count == 0
+    assert [call.kwargs["cache_key"] for call in mock_symbolicate_event.delay.mock_calls] == [
+        "e:a",
+        "e:b",
+    ]
+
+
+@pytest.mark.django_db
+def test_symbolicate_events_async_resubmits_failed(
+    default_project,
+    mock_event_processing_store,
+    mock_get_symbolication_function,
+    mock_symbolicate_event,
+):
+    events = [
+        {
+            "cache_key": f"e:{event_id}",
+            "start_time": 1,
+            "data": {"project": default_project.id, "platform": "native", "event_id": event_id},
+        }
+        for event_id in ("a", "b")
+    ]
+
+    def store(data):
+        if data["event_id"] == "b":
+            raise Exception("processing store unavailable")
+        return "e:{}".format(data["event_id"])
+
+    mock_event_processing_store.store.side_effect = store
+    mock_get_symbolication_function.return_value = lambda data: dict(data, symbolicated=True)
+
+    with override_options({"symbolicate-event.async": True}), mock.patch(
+        "sentry.tasks.store.do_process_event"
+    ) as mock_do_process_event:
+        symbolicate_events(events=events)
+
+    assert [call.kwargs["data"]["event_id"] for call in mock_do_process_event.mock_calls] == ["a"]
+    assert [call.kwargs["cache_key"] for call in mock_symbolicate_event.delay.mock_calls] == ["e:b"]
@@ -2,11 +2,15 @@ import pytest
 
 from sentry.grouping.api import get_default_grouping_config_dict, load_grouping_config
 from sentry.stacktraces.processing import (
+    StacktraceProcessor,
     find_stacktraces_in_data,
     get_crash_frame_from_event_data,
+    local_frame_cache,
     normalize_stacktraces_for_grouping,
+    process_stacktraces,
 )
 from sentry.testutils import TestCase
+from sentry.utils.cache import cache
 
 
 class FindStacktracesTest(TestCase):
@@ -157,6 +161,68 @@ class FindStacktracesTest(TestCase):
         assert len(infos[0].stacktrace["frames"]) == 3
 
 
+class CountingProcessor(StacktraceProcessor):
+    cache_processed_frames = True
+    processed = 0
+
+    def handles_frame(self, frame, stacktrace_info):
+        return True
+
+    def preprocess_frame(self, processable_frame):
+        processable_frame.set_cache_key_from_values(
+            [self.project.id, processable_frame["function"]]
+        )
+
+    def process_frame(self, processable_frame, processing_task):
+        CountingProcessor.processed += 1
+        if processable_frame["function"] == "broken":
+            return
+        new_frame = dict(processable_frame.frame, function="processed")
+        return [new_frame], None, None
+
+
+class ProcessedFrameCacheTest(TestCase):
+    def setUp(self):
+        CountingProcessor.processed = 0
+
+    def process(self, *functions):
+        data = {
+            "project": self.project.id,
+            "stacktrace": {"frames": [{"function": function} for function in functions]},
+        }
+        process_stacktraces(
+            data, make_processors=lambda data, infos: [CountingProcessor(data, infos)]
+        )
+        return [frame["function"] for frame in data["stacktrace"]["frames"]]
+
+    def test_reuses_processed_frames(self):
+        assert self.process("foo", "bar") == ["processed", "processed"]
+        assert CountingProcessor.processed == 2
+
+        assert self.process("bar", "baz") == ["processed", "processed"]
+        assert CountingProcessor.processed == 3
+
+    def test_does_not_cache_unprocessed_frames(self):
+        assert self.process("broken") == ["broken"]
+        assert self.process("broken") == ["broken"]
+        assert CountingProcessor.processed == 2
+
+    def test_reads_through_shared_cache(self):
+        self.process("foo")
+        if local_frame_cache is not None:
+            local_frame_cache.clear()
+
+        assert self.process("foo") == ["processed"]
+        assert CountingProcessor.processed == 1
+
+        cache.clear()
+        if local_frame_cache is not None:
+            local_frame_cache.clear()
+
+        assert self.process("foo") == ["processed"]
+        assert CountingProcessor.processed == 2
+
+
 class NormalizeInApptest(TestCase):
     def test_normalize_with_system_frames(self):
         data = {
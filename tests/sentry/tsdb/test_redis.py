@@ -179,6 +179,53 @@ class RedisTSDBTest(TestCase):
         results = self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1], environment_id=1)
         assert results == {1: 0, 2: 0}
 
+    def test_record_batch(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=4)
+        dts = [now + timedelta(hours=i) for i in range(2)]
+
+        def timestamp(d):
+            t = int(to_timestamp(d))
+            return t - (t % 3600)
+
+        frequency_model = TSDBModel.frequent_environments_by_group
+        self.db.record_batch(
+            incrs=[
+                ([(TSDBModel.project, 1), (TSDBModel.group, 2)], dts[0], 1),
+                ([(TSDBModel.project, 1)], dts[0], 1),
+                ([(TSDBModel.project, 1)], dts[1], None),
+            ],
+            records=[
+                ([(TSDBModel.users_affected_by_group, 2, ("foo",))], dts[0], 1),
+                ([(TSDBModel.users_affected_by_group, 2, ("foo", "bar"))], dts[0], 1),
+                ([(TSDBModel.users_affected_by_group, 2, ("baz",))], dts[1], None),
+            ],
+            frequencies=[
+                ([(frequency_model, {2: {1: 1}})], dts[0], None),
+                ([(frequency_model, {2: {1: 1, 3: 1}})], dts[0], None),
+            ],
+        )
+
+        assert self.db.get_range(TSDBModel.project, [1], dts[0], dts[-1]) == {
+            1: [(timestamp(dts[0]), 2), (timestamp(dts[1]), 1)]
+        }
+        assert self.db.get_range(TSDBModel.project, [1], dts[0], dts[-1], environment_ids=[1]) == {
+            1: [(timestamp(dts[0]), 2), (timestamp(dts[1]), 0)]
+        }
+        assert self.db.get_range(TSDBModel.group, [2], dts[0], dts[-1]) == {
+            2: [(timestamp(dts[0]), 1), (timestamp(dts[1]), 0)]
+        }
+
+        assert self.db.get_distinct_counts_series(
+            TSDBModel.users_affected_by_group, [2], dts[0], dts[-1], rollup=3600
+        ) == {2: [(timestamp(dts[0]), 2), (timestamp(dts[1]), 1)]}
+        assert self.db.get_distinct_counts_totals(
+            TSDBModel.users_affected_by_group, [2], dts[0], dts[-1], environment_id=1
+        ) == {2: 2}
+
+        assert self.db.get_most_frequent(frequency_model, [2], dts[0], rollup=3600) == {
+            2: [("1", 2.0), ("3", 1.0)]
+        }
+
     def test_count_distinct(self):
         now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=4)
         dts = [now + timedelta(hours=i) for i in range(4)]
@@ -402,17 +449,14 @@ class RedisTSDBTest(TestCase):
             "organization:2": [("project:5", 1.5)],
         }
 
-        assert (
-            self.db.get_most_frequent(
-                model,
-                ("organization:1", "organization:2"),
-                now - timedelta(hours=1),
-                now,
-                rollup=rollup,
-                environment_id=0,
-            )
-            == {"organization:1": [], "organization:2": []}
-        )
+        assert self.db.get_most_frequent(
+            model,
+            ("organization:1", "organization:2"),
+            now - timedelta(hours=1),
+            now,
+            rollup=rollup,
+            environment_id=0,
+        ) == {"organization:1": [], "organization:2": []}
 
         timestamp = int(to_timestamp(now) // rollup) * rollup
 
@@ -1,5 +1,7 @@
+from unittest import mock
+
 from sentry.tsdb.base import TSDBModel
-from sentry.tsdb.redissnuba import READ, method_specifications, selector_func
+from sentry.tsdb.redissnuba import READ, RedisSnubaTSDB, method_specifications, selector_func
 from sentry.tsdb.snuba import SnubaTSDB
 
 
@@ -12,6 +14,7 @@ def get_callargs(model):
         "models": [model],
         "items": [(model, "key", ["values"])],
         "requests": [(model, "data")],
+        "incrs": [([(model, "key")], "timestamp", None)],
     }
 
 
@@ -36,3 +39,27 @@ def test_redissnuba_connects_to_correct_backend():
                 assert "snuba" == selector_func(method, get_callargs(model))
             else:
                 assert "dummy" == selector_func(method, get_callargs(model))
+
+
+def test_redissnuba_record_batch_splits_by_backend():
+    tsdb = RedisSnubaTSDB()
+    redis_model = TSDBModel.users_affected_by_group
+    assert redis_model not in SnubaTSDB.model_query_settings
+    assert TSDBModel.project in SnubaTSDB.model_query_settings
+
+    with mock.patch.object(
+        tsdb.backends["redis"], "record_batch"
+    ) as redis_record_batch, mock.patch.object(
+        tsdb.backends["dummy"], "record_batch"
+    ) as dummy_record_batch:
+        tsdb.record_batch(
+            incrs=[([(TSDBModel.project, 1)], "timestamp", 1)],
+            records=[([(redis_model, 2, ("foo",))], "timestamp", None)],
+        )
+
+    redis_record_batch.assert_called_once_with(
+        incrs=[], records=[([(redis_model, 2, ("foo",))], "timestamp", None)], frequencies=[]
+    )
+    dummy_record_batch.assert_called_once_with(
+        incrs=[([(TSDBModel.project, 1)], "timestamp", 1)], records=[], frequencies=[]
+    )
@@ -1,4 +1,5 @@
 import _thread
+import time
 from concurrent.futures import CancelledError, Future
 from contextlib import contextmanager
 from queue import Full
@@ -9,6 +10,8 @@ import pytest
 
 from sentry.utils.concurrent import (
     FutureSet,
+    KeyedThreadedExecutor,
+    SingleFlight,
     SynchronousExecutor,
     ThreadedExecutor,
     TimedFuture,
@@ -282,3 +285,114 @@ def test_threaded_executor():
     low_priority_waiting.set()  # let the task finish
     assert low_priority_future.result(timeout=1) == 2
     assert low_priority_future.done()
+
+
+def test_keyed_threaded_executor_limits_keys():
+    executor = KeyedThreadedExecutor(worker_count=2, key_limit=lambda key: 1)
+
+    def waiter(ready, waiting, result):
+        ready.set()
+        waiting.wait()
+        return result
+
+    events = {name: (Event(), Event()) for name in ("a1", "a2", "b1")}
+    futures = {
+        name: executor.submit(lambda name=name: waiter(*events[name], name), key=name[0])
+        for name in ("a1", "a2", "b1")
+    }
+
+    assert events["a1"][0].wait(timeout=1), "a1 not started"
+    assert events["b1"][0].wait(timeout=1), "b1 not started"
+    assert not futures["a2"].running(), "a2 should wait for a1 despite a free worker"
+
+    events["b1"][1].set()
+    assert futures["b1"].result(timeout=1) == "b1"
+    assert not futures["a2"].running()
+
+    events["a1"][1].set()
+    assert futures["a1"].result(timeout=1) == "a1"
+    assert events["a2"][0].wait(timeout=1), "a2 not started"
+    events["a2"][1].set()
+    assert futures["a2"].result(timeout=1) == "a2"
+
+
+def test_keyed_threaded_executor_takes_turns():
+    executor = KeyedThreadedExecutor(worker_count=1)
+    order = []
+
+    blocker_ready = Event()
+    blocker_waiting = Event()
+
+    def blocker():
+        blocker_ready.set()
+        blocker_waiting.wait()
+
+    executor.submit(blocker, key="blocker")
+    assert blocker_ready.wait(timeout=1)
+
+    futures = [
+        executor.submit(lambda name=name: order.append(name), key=name[0])
+        for name in ("a1", "a2", "a3", "b1")
+    ]
+    blocker_waiting.set()
+    for future in futures:
+        future.result(timeout=1)
+
+    assert order == ["a1", "b1", "a2", "a3"]
+
+
+def test_keyed_threaded_executor_error():
+    executor = KeyedThreadedExecutor(worker_count=1)
+
+    def error():
+        raise ValueError("broken")
+
+    with pytest.raises(ValueError):
+        executor.submit(error, key="a").result(timeout=1)
+    assert executor.submit(lambda: 1, key="a").result(timeout=1) == 1
+
+
+def test_keyed_threaded_executor_invalid_limit():
+    executor = KeyedThreadedExecutor(worker_count=1, key_limit=lambda key: 0)
+
+    with pytest.raises(ValueError):
+        executor.submit(lambda: 1, key="a")
+
+
+def test_single_flight():
+    single_flight = SingleFlight()
+    ready = Event()
+    waiting = Event()
+    calls = []
+
+    def leader_function():
+        calls.append("leader")
+        ready.set()
+        waiting.wait()
+        return 1
+
+    leader = execute(lambda: single_flight.call("key", leader_function))
+    assert ready.wait(timeout=1)
+
+    follower = execute(lambda: single_flight.call("key", lambda: calls.append("follower")))
+    other = single_flight.call("other", lambda: 2)
+    # give the follower time to join the call in flight
+    time.sleep(0.1)
+    waiting.set()
+
+    assert leader.result(timeout=1) == (1, False)
+    assert follower.result(timeout=1) == (1, True)
+    assert calls == ["leader"]
+    assert other == (2, False)
+    assert single_flight.call("key", lambda: 3) == (3, False)
+
+
+def test_single_flight_error():
+    single_flight = SingleFlight()
+
+    def error():
+        raise ValueError("broken")
+
+    with pytest.raises(ValueError):
+        single_flight.call("key", error)
+    assert single_flight.call("key", lambda: 1) == (1, False)
@@ -0,0 +1,76 @@
+from unittest import TestCase, mock
+
+from sentry.utils.lru import LRUCache
+
+
+class LRUCacheTest(TestCase):
+    def test_get_set(self):
+        cache = LRUCache(max_weight=10)
+        assert cache.get("a") is None
+        assert cache.get("a", 1) == 1
+        cache.set("a", None)
+        assert "a" in cache
+        assert cache.get("a", 1) is None
+        cache.set("b", 2)
+        assert cache.get_many(["a", "b", "c"]) == {"a": None, "b": 2}
+
+    def test_evicts_least_recently_used_by_weight(self):
+        cache = LRUCache(max_weight=10, weigher=len)
+        cache.set("a", b"aaaa")
+        cache.set("b", b"bbbb")
+        assert cache.get("a") == b"aaaa"
+        cache.set("c", b"cccc")
+        assert cache.weight == 8
+        assert "b" not in cache
+        assert cache.get_many(["a", "c"]) == {"a": b"aaaa", "c": b"cccc"}
+
+    def test_on_evict(self):
+        on_evict = mock.Mock()
+        cache = LRUCache(max_weight=2, on_evict=on_evict)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.delete("b")
+        assert on_evict.call_count == 0
+        cache.set("c", 3)
+        cache.set("d", 4)
+        on_evict.assert_called_once_with("a", 1)
+
+    def test_pop(self):
+        cache = LRUCache(max_weight=10)
+        cache.set("a", 1)
+        assert cache.pop("a") == 1
+        assert cache.pop("a", 2) == 2
+        assert cache.weight == 0
+
+    def test_ignores_values_over_max_weight(self):
+        cache = LRUCache(max_weight=3, weigher=len)
+        cache.set("a", b"aa")
+        cache.set("a", b"aaaa")
+        assert "a" not in cache
+        assert cache.weight == 0
+
+    @mock.patch("sentry.utils.lru.monotonic")
+    def test_ttl(self, monotonic):
+        monotonic.return_value = 100
+        cache = LRUCache(max_weight=10, ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=1)
+        monotonic.return_value = 105
+        assert cache.get_many(["a", "b"]) == {"a": 1}
+        monotonic.return_value = 110
+        assert cache.get("a") is None
+        assert len(cache) == 0
+        assert cache.weight == 0
+
+    def test_delete(self):
+        cache = LRUCache(max_weight=10)
+        for key in ("a", "b", "c", "aa"):
+            cache.set(key, 1)
+        cache.delete("b")
+        cache.delete_many(["c", "d"])
+        assert cache.delete_where(lambda key: key.startswith("a")) == 2
+        assert len(cache) == 0
+        cache.set("a", 1)
+        cache.clear()
+        assert cache.weight == 0
+        assert "a" not in cache
@@ -1,23 +1,34 @@
+import threading
+import time
 import unittest
 from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest import mock
 
 import pytest
 import pytz
+from django.test import override_settings
 from django.utils import timezone
+from snuba_sdk import Column, Condition, Entity, Op, Query
 
+from sentry.app import locks
 from sentry.models import GroupRelease, Project, Release
+from sentry.net.http import connection_from_url
 from sentry.testutils import TestCase
+from sentry.utils import json
 from sentry.utils.snuba import (
     Dataset,
     SnubaQueryParams,
     UnqualifiedQueryError,
     _prepare_query_params,
+    bulk_snql_query,
+    get_cache_key,
     get_json_type,
     get_query_params_to_update_for_projects,
     get_snuba_column_name,
     get_snuba_translators,
     quantize_time,
+    raw_snql_query,
 )
 
 
@@ -374,3 +385,182 @@ class QuantizeTimeTest(unittest.TestCase):
                 break
 
         assert i != j
+
+
+@pytest.fixture
+def fake_snuba():
+    """A local HTTP server answering queries like snuba, slowly."""
+    state = {"requests": [], "running": 0, "max_running": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with lock:
+                state["requests"].append((self.headers["referer"], body))
+                state["running"] += 1
+                state["max_running"] = max(state["max_running"], state["running"])
+
+            time.sleep(0.1)
+
+            with lock:
+                state["running"] -= 1
+
+            response = json.dumps({"data": [{"count": 1}], "meta": []}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    pool = connection_from_url("http://127.0.0.1:%s" % server.server_port)
+    try:
+        with mock.patch("sentry.utils.snuba._snuba_pool", pool):
+            yield state
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def make_query(project_id):
+    now = datetime.utcnow().replace(tzinfo=pytz.UTC)
+    return Query(
+        dataset=Dataset.Events.value,
+        match=Entity("events"),
+        select=[Column("event_id")],
+        where=[
+            Condition(Column("timestamp"), Op.GTE, now - timedelta(hours=1)),
+            Condition(Column("timestamp"), Op.LT, now),
+            Condition(Column("project_id"), Op.EQ, project_id),
+        ],
+    )
+
+
+@override_settings(SENTRY_SNUBA_REFERRER_CONCURRENCY={"test.limited": 1})
+def test_bulk_query_respects_referrer_concurrency(fake_snuba):
+    results = bulk_snql_query([make_query(i) for i in range(4)], referrer="test.limited")
+
+    assert [result["data"] for result in results] == [[{"count": 1}]] * 4
+    assert len(fake_snuba["requests"]) == 4
+    assert fake_snuba["max_running"] == 1
+
+
+def test_bulk_query_runs_concurrently(fake_snuba):
+    bulk_snql_query([make_query(i) for i in range(4)], referrer="test.unlimited")
+
+    assert len(fake_snuba["requests"]) == 4
+    assert fake_snuba["max_running"] > 1
+
+
+def test_identical_queries_in_flight_are_deduplicated(fake_snuba):
+    query = make_query(1)
+    results = bulk_snql_query([query, query], referrer="test.dedup")
+
+    assert [result["data"] for result in results] == [[{"count": 1}]] * 2
+    assert len(fake_snuba["requests"]) == 1
+    assert fake_snuba["requests"][0][0] == "test.dedup"
+
+
+@override_settings(SENTRY_SNUBA_DEDUPLICATE_QUERIES=False)
+def test_identical_queries_without_deduplication(fake_snuba):
+    query = make_query(1)
+    bulk_snql_query([query, query], referrer="test.dedup")
+
+    assert len(fake_snuba["requests"]) == 2
+
+
+def test_cached_query(fake_snuba):
+    query = make_query(1)
+    assert raw_snql_query(query, referrer="test.cache", use_cache=True)["data"] == [{"count": 1}]
+    assert raw_snql_query(query, referrer="test.cache", use_cache=True)["data"] == [{"count": 1}]
+    assert len(fake_snuba["requests"]) == 1
+
+
+@override_settings(SENTRY_SNUBA_CACHE_REFERRERS={"test.cached"})
+def test_cached_referrer(fake_snuba):
+    query = make_query(1)
+    raw_snql_query(query, referrer="test.cached")
+    raw_snql_query(query, referrer="test.cached")
+    assert len(fake_snuba["requests"]) == 1
+
+    raw_snql_query(query, referrer="test.uncached")
+    assert len(fake_snuba["requests"]) == 2
+
+
+@override_settings(SENTRY_SNUBA_CACHE_TTL_SECONDS=0)
+def test_stale_cached_query(fake_snuba):
+    query = make_query(1)
+    raw_snql_query(query, referrer="test.cache", use_cache=True)
+
+    # somebody else is refreshing the result, serve the stale one meanwhile
+    with locks.get(f"{get_cache_key(query)}:fill", duration=10).acquire():
+        assert raw_snql_query(query, referrer="test.cache", use_cache=True)["data"] == [
+            {"count": 1}
+        ]
+    assert len(fake_snuba["requests"]) == 1
+
+    raw_snql_query(query, referrer="test.cache", use_cache=True)
+    assert len(fake_snuba["requests"]) == 2
+
+
+def test_concurrent_cached_queries_are_coalesced(fake_snuba):
+    query = make_query(1)
+    results = []
+
+    def run():
+        results.append(raw_snql_query(query, referrer="test.cache", use_cache=True))
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [result["data"] for result in results] == [[{"count": 1}]] * 4
+    assert len(fake_snuba["requests"]) == 1
+
+
+@override_settings(SENTRY_SNUBA_CACHE_FILL_TIMEOUT=1)
+def test_cache_fill_timeout(fake_snuba):
+    query = make_query(1)
+
+    # the query is running elsewhere, but its result does not show up in time
+    with locks.get(f"{get_cache_key(query)}:fill", duration=10).acquire():
+        assert raw_snql_query(query, referrer="test.cache", use_cache=True)["data"] == [
+            {"count": 1}
+        ]
+    assert len(fake_snuba["requests"]) == 1
+
+
+def test_cache_fill_lock_backend_failure(fake_snuba):
+    query = make_query(1)
+
+    # a broken locks backend must not turn the caller into a waiter
+    with mock.patch.object(
+        locks.backend, "acquire", side_effect=Exception("down")
+    ), mock.patch.object(locks.backend, "locked", side_effect=Exception("down")):
+        start = time.monotonic()
+        assert raw_snql_query(query, referrer="test.cache", use_cache=True)["data"] == [
+            {"count": 1}
+        ]
+        assert time.monotonic() - start < 1
+    assert len(fake_snuba["requests"]) == 1
+
+
+def test_cache_fill_given_up(fake_snuba):
+    query = make_query(1)
+    lock = locks.get(f"{get_cache_key(query)}:fill", duration=10)
+    lock.acquire()
+
+    # the query is running elsewhere, but gives up without filling the cache
+    threading.Timer(0.2, lock.release).start()
+    start = time.monotonic()
+    assert raw_snql_query(query, referrer="test.cache", use_cache=True)["data"] == [{"count": 1}]
+    assert time.monotonic() - start < 2
+    assert len(fake_snuba["requests"]) == 1